@@ -10,6 +10,7 @@ const API_BASE_URL = 'http://localhost:5000/api';
 class InabelIdentifier {
     constructor() {
         this.sessionId = null;
+        this.sessionToken = null;
         this.currentFeature = null;
         this.questionCount = 0;
 
@@ -68,6 +69,8 @@ class InabelIdentifier {
 
             if (result.success) {
                 this.sessionId = result.data.session_id;
+                // Set instead of sessionId when the server runs stateless sessions
+                this.sessionToken = result.data.token;
                 this.currentFeature = result.data.feature;
                 this.questionCount = 1;
 
@@ -98,6 +101,7 @@ class InabelIdentifier {
                 },
                 body: JSON.stringify({
                     session_id: this.sessionId,
+                    token: this.sessionToken,
                     feature: this.currentFeature,
                     answer: answer
                 })
@@ -120,6 +124,7 @@ class InabelIdentifier {
                     this.showNotFound();
                 } else if (data.status === 'continue') {
                     this.currentFeature = data.feature;
+                    this.sessionToken = data.token;
                     this.questionCount += 1;
 
                     const q = data.question || 'Please look closely at the pattern and answer the questions that follow.';
@@ -347,6 +352,7 @@ class InabelIdentifier {
 
     restart() {
         this.sessionId = null;
+        this.sessionToken = null;
         this.currentFeature = null;
         this.questionCount = 0;
         this.showScreen(this.welcomeScreen);
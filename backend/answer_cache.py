@@ -0,0 +1,78 @@
+"""
+Answer cache for Inabel Pattern Identification.
+
+Most users answer the first few questions the same way, so the engine keeps
+narrowing identical response sets to identical candidates and choosing the
+same next question. Both depend only on the *set* of (feature, answer) pairs
+given so far, not on the order they were given in, so results are keyed by
+the canonical, order-independent `decision_tree.response_key` that also
+keys the question tree, and `AnswerCache` keeps a bounded LRU of them, with
+hit-rate statistics.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+# Default number of cached entries.
+DEFAULT_CACHE_SIZE = 4096
+
+
+class AnswerCache:
+    """Thread-safe LRU of engine results keyed by `response_key`-based keys.
+
+    A `max_size` of 0 disables caching (every lookup is a miss).
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        if max_size < 0:
+            raise ValueError("max_size must not be negative")
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for `key` (marking it recently used), or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache `value` (not None) under `key`, evicting the least recently used."""
+        if self.max_size == 0 or value is None:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit-rate counters since start-up."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evicted": self.evicted,
+            }
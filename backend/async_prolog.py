@@ -0,0 +1,325 @@
+"""
+asyncio transport for the Inabel Prolog bridge.
+
+`AsyncPrologProcess` talks to one `swipl` worker through `asyncio.subprocess`
+streams. Requests are multiplexed: every command is written immediately with
+a fresh request id and parked on a future, and a single reader task resolves
+the futures as replies (which echo the id) arrive. Many coroutines can
+therefore have commands queued on the same worker without holding a thread
+each. `AsyncPrologPool` spreads commands over several workers, sending each
+to the one with the fewest commands in flight.
+
+Both reuse the command wrappers of `PrologCommands`, whose methods return
+awaitables here. `AsyncInabelAPI` runs `InabelAPI`'s answer logic against
+the pool, sharing the API's KB, question trees and session store. Calls to
+a store that does blocking I/O (SQLite) run in the loop's default executor.
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from metrics import REGISTRY
+from prolog_interface import EngineSteps, InabelAPI, PrologCommands
+
+
+# Replies can carry the whole pattern catalogue on one line.
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class AsyncPrologProcess(PrologCommands):
+    """One `swipl` worker with multiplexed, non-blocking requests.
+
+    Call `await start()` before sending commands.
+    """
+
+    def __init__(self, prolog_file_path: str = '../inabel.ai.pl') -> None:
+        self.prolog_file_path = prolog_file_path
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._reader: Optional["asyncio.Task[None]"] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._broken = False
+
+    async def start(self) -> "AsyncPrologProcess":
+        self.proc = await asyncio.create_subprocess_exec(
+            "swipl", "-q", "-s", self.prolog_file_path, "-g", "main_json_loop",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+        )
+        self._write_lock = asyncio.Lock()
+        self._reader = asyncio.ensure_future(self._read_replies())
+        return self
+
+    @property
+    def in_flight(self) -> int:
+        """Commands sent but not yet answered."""
+        return len(self._pending)
+
+    def is_alive(self) -> bool:
+        return (
+            self.proc is not None
+            and self.proc.returncode is None
+            and not self._broken
+        )
+
+    async def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.is_alive():
+            raise RuntimeError("Prolog process is not running")
+
+        cmd = str(payload.get("cmd"))
+        started = time.perf_counter()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        line = json.dumps(dict(payload, id=request_id), ensure_ascii=False, separators=(",", ":"))
+        serialized = time.perf_counter()
+        try:
+            async with self._write_lock:
+                self.proc.stdin.write((line + "\n").encode('utf-8'))
+                await self.proc.stdin.drain()
+            written = time.perf_counter()
+            reply = await future
+            REGISTRY.observe('inabel_prolog_command_seconds', serialized - started, cmd=cmd, phase='serialize')
+            REGISTRY.observe('inabel_prolog_command_seconds', written - serialized, cmd=cmd, phase='write')
+            REGISTRY.observe('inabel_prolog_command_seconds', time.perf_counter() - written,
+                             cmd=cmd, phase='wait')
+            return reply
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _call(self, payload: Dict[str, Any], parse: Callable[[Dict[str, Any]], Any]) -> Awaitable[Any]:
+        async def call() -> Any:
+            return parse(await self._send(payload))
+        return call()
+
+    async def ping(self) -> bool:
+        try:
+            resp = await self._send({"cmd": "ping"})
+        except RuntimeError:
+            return False
+        return resp.get("status") == "ok"
+
+    async def _read_replies(self) -> None:
+        """Resolve pending futures from the reply stream until it ends."""
+        error: Optional[Exception] = None
+        try:
+            while True:
+                line = await self.proc.stdout.readline()
+                if not line:
+                    await self.proc.wait()
+                    stderr = (await self.proc.stderr.read()).decode('utf-8', 'replace')
+                    error = RuntimeError(
+                        f"Prolog process terminated unexpectedly or returned no JSON. Stderr: {stderr}"
+                    )
+                    break
+                try:
+                    parsed = json.loads(line)
+                except ValueError:
+                    error = RuntimeError(f"Failed to parse JSON from Prolog. Line was: {line!r}")
+                    break
+                if not isinstance(parsed, dict):
+                    error = RuntimeError(
+                        f"Unexpected JSON type from Prolog (expected object): {type(parsed)}"
+                    )
+                    break
+                # Replies without a known id belong to callers that gave up.
+                future = self._pending.get(parsed.pop("id", None))
+                if future is not None and not future.done():
+                    future.set_result(parsed)
+        except Exception as e:  # e.g. a reply longer than STREAM_LIMIT
+            error = RuntimeError(f"Lost the Prolog reply stream: {e}")
+
+        # The stream can no longer be trusted: fail everyone waiting on it
+        # and make sure the process is gone so the pool replaces it.
+        self._broken = True
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(error)
+        if self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
+
+    async def stop(self) -> None:
+        if self.is_alive():
+            try:
+                await asyncio.wait_for(self._send({"cmd": "stop"}), timeout=1.0)
+            except Exception:
+                pass
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.terminate()
+            await self.proc.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class AsyncPrologPool(PrologCommands):
+    """Several `AsyncPrologProcess` workers behind one command interface.
+
+    Each command goes to the live worker with the fewest commands in flight;
+    dead workers are replaced, and a command that failed because its worker
+    died is retried once. Call `await start()` first.
+    """
+
+    def __init__(self, prolog_file_path: str = '../inabel.ai.pl', size: int = 1) -> None:
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.prolog_file_path = prolog_file_path
+        self.size = size
+        self._workers: List[AsyncPrologProcess] = []
+        self._requests = 0
+        self._replaced = 0
+
+    async def start(self) -> "AsyncPrologPool":
+        self._workers = list(await asyncio.gather(
+            *(AsyncPrologProcess(self.prolog_file_path).start() for _ in range(self.size))
+        ))
+        return self
+
+    async def _worker(self) -> AsyncPrologProcess:
+        """Least-loaded worker, replacing dead ones first."""
+        for i, worker in enumerate(list(self._workers)):
+            if worker.is_alive():
+                continue
+            fresh = await AsyncPrologProcess(self.prolog_file_path).start()
+            if self._workers[i] is worker:
+                self._workers[i] = fresh
+                self._replaced += 1
+            else:
+                fresh, worker = worker, fresh  # Another caller replaced it first.
+            await worker.stop()
+        return min(self._workers, key=lambda w: w.in_flight)
+
+    async def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self._requests += 1
+        worker = await self._worker()
+        try:
+            return await worker._send(payload)
+        except RuntimeError:
+            if worker.is_alive():
+                raise
+        # The worker died mid-command; retry once on a replacement.
+        worker = await self._worker()
+        return await worker._send(payload)
+
+    def _call(self, payload: Dict[str, Any], parse: Callable[[Dict[str, Any]], Any]) -> Awaitable[Any]:
+        async def call() -> Any:
+            return parse(await self._send(payload))
+        return call()
+
+    async def ping(self) -> bool:
+        results = await asyncio.gather(*(w.ping() for w in self._workers))
+        return all(results)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and per-worker multiplexing state."""
+        in_flight = [w.in_flight for w in self._workers]
+        return {
+            "size": self.size,
+            "alive": sum(1 for w in self._workers if w.is_alive()),
+            "in_flight": sum(in_flight),
+            "max_in_flight": max(in_flight, default=0),
+            "requests": self._requests,
+            "replaced": self._replaced,
+        }
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(w.stop() for w in self._workers))
+
+
+class AsyncInabelAPI:
+    """`InabelAPI`'s session logic with non-blocking engine calls.
+
+    Static data, question trees, the session store and the token codec are
+    shared with `api`. Engine calls go to `pool` for the Prolog engine; the
+    in-process Python engine is used as is. Session store calls run in a
+    thread unless the store is in memory.
+    """
+
+    def __init__(self, api: InabelAPI, pool: Optional[AsyncPrologPool] = None) -> None:
+        self.api = api
+        self.pool = pool
+        if isinstance(api.engine, PrologCommands):
+            if pool is None:
+                raise ValueError("The Prolog engine needs an AsyncPrologPool")
+            self.engine: Any = pool
+        else:
+            self.engine = api.engine
+
+    async def _in_store_thread(self, function: Callable[..., Any], *args: Any) -> Any:
+        """`function(*args)`, run in the default executor if it touches a
+        session store that blocks (an in-memory store is called directly)."""
+        if self.api.sessions.backend == 'memory':
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def _drive(self, steps: EngineSteps) -> Any:
+        """Run engine steps to completion, awaiting engine calls."""
+        try:
+            method, args = next(steps)
+            while True:
+                with REGISTRY.timer('inabel_engine_call_seconds', method=method):
+                    result = getattr(self.engine, method)(*args)
+                    if inspect.isawaitable(result):
+                        result = await result
+                method, args = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    async def start_session(self, session_id: str, selector: Optional[str] = None) -> Dict[str, Any]:
+        """Async `InabelAPI.start_session`."""
+        return await self._in_store_thread(self.api.start_session, session_id, selector)
+
+    async def answer_question(self, session_id: str, feature: str, answer: str) -> Dict[str, Any]:
+        """Async `InabelAPI.answer_question`."""
+        started = time.perf_counter()
+        session = await self._in_store_thread(self.api._load_session, session_id)
+        result = await self._drive(self.api._answer_session_steps(session, feature, answer))
+        await self._in_store_thread(self.api._store_session, session_id, session, result)
+        self.api._observe_answer(started, result, 'session')
+        return result
+
+    async def session_stats(self) -> Dict[str, Any]:
+        """The session store's `stats()`."""
+        return await self._in_store_thread(self.api.sessions.stats)
+
+    async def answer_token(self, token: str, feature: str, answer: str) -> Dict[str, Any]:
+        """Async `InabelAPI.answer_token`."""
+        started = time.perf_counter()
+        result = await self._drive(self.api._answer_token_steps(token, feature, answer))
+        self.api._observe_answer(started, result, 'token')
+        return result
+
+    async def identify_batch(self, response_sets: List[List[tuple]]) -> List[Dict[str, Any]]:
+        """Async `InabelAPI.identify_batch`; Prolog chunks run concurrently."""
+        unique, positions = self.api._dedupe_response_sets(response_sets)
+        if self.engine is self.pool:
+            chunk = self.api.IDENTIFY_CHUNK
+            replies = await asyncio.gather(*(
+                self.pool.identify_patterns(unique[i:i + chunk])
+                for i in range(0, len(unique), chunk)
+            ))
+            patterns = [p for reply in replies for p in reply]
+        else:
+            patterns = self.engine.identify_patterns(unique)
+        return [self.api._identify_result(patterns[i]) for i in positions]
+
+    async def identify_items(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """Async `InabelAPI.identify_items`."""
+        results, valid, response_sets = self.api._parse_items(items)
+        for i, result in zip(valid, await self.identify_batch(response_sets)):
+            results[i].update(result)
+        return results
+
+    async def identify_pattern(self, responses: List[tuple]) -> Optional[Dict[str, Any]]:
+        """One-shot identification through the engine."""
+        result = self.engine.identify_pattern(responses)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Questions-to-identification benchmark for Inabel Pattern Identification.
+
+Plays one session per pattern in the KB through `InabelAPI`, answering every
+question truthfully (yes if the pattern has the feature), and reports the
+average and worst-case number of questions per next-question selector.
+
+Usage:
+    python bench_questions.py [--kb ../inabel.ai.pl] [--engine python] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from prolog_interface import InabelAPI
+from question_selector import SELECTORS
+
+
+def simulate_session(api: InabelAPI, pattern_name: str, selector: str) -> Dict[str, Any]:
+    """Answer a full session as if looking at `pattern_name`."""
+    features = set(api.kb.patterns_by_name[pattern_name].get('features', []))
+    session_id = f"bench-{selector}-{pattern_name}"
+    step = api.start_session(session_id, selector=selector)
+    feature = step.get('feature')
+    result: Dict[str, Any] = {'status': 'continue', 'questions_asked': 0}
+
+    while feature:
+        answer = 'yes' if feature in features else 'no'
+        result = api.answer_question(session_id, feature, answer)
+        if result.get('status') != 'continue':
+            break
+        feature = result.get('feature')
+    else:
+        api.sessions.delete(session_id)
+
+    identified = (result.get('pattern') or {}).get('name')
+    return {
+        'pattern': pattern_name,
+        'status': result.get('status'),
+        'identified': identified,
+        'correct': identified == pattern_name,
+        'questions': result.get('questions_asked', 0),
+        'method': result.get('identification_method'),
+    }
+
+
+def run_benchmark(api: InabelAPI, selectors: List[str]) -> Dict[str, Any]:
+    """Simulate every pattern under each selector and summarise."""
+    report: Dict[str, Any] = {}
+    for selector in selectors:
+        runs = [simulate_session(api, name, selector) for name in api.kb.pattern_names]
+        questions = [r['questions'] for r in runs]
+        report[selector] = {
+            'patterns': len(runs),
+            'avg_questions': sum(questions) / len(questions) if questions else 0.0,
+            'max_questions': max(questions) if questions else 0,
+            'correct': sum(1 for r in runs if r['correct']),
+            'runs': runs,
+        }
+    return report
+
+
+def main() -> int:
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--kb', default=os.path.join(here, '..', 'inabel.ai.pl'))
+    parser.add_argument('--engine', default='python', choices=['python', 'prolog'])
+    parser.add_argument('--selector', action='append', choices=sorted(SELECTORS),
+                        help='selector to benchmark (repeatable; default: all)')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    api = InabelAPI(args.kb, engine=args.engine)
+    try:
+        report = run_benchmark(api, args.selector or sorted(SELECTORS))
+    finally:
+        api.prolog_interface.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{'selector':<18} {'avg':>6} {'worst':>6} {'correct':>9}")
+    for selector, summary in report.items():
+        print(
+            f"{selector:<18} {summary['avg_questions']:>6.2f} {summary['max_questions']:>6} "
+            f"{summary['correct']:>5}/{summary['patterns']}"
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
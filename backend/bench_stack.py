@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Benchmark and load test for the Inabel identification stack.
+
+Measures, for the real KB and optionally for larger synthetic KBs:
+
+* prolog   -- raw `PrologProcess` commands per second, per command
+* answer   -- `InabelAPI.answer_question` latency percentiles
+* sessions -- full-session throughput, one session per pattern in the KB
+* http     -- concurrent-client throughput against `server.py`, started as a
+              subprocess on a free port
+
+Each `--scale` size adds a KB of that many patterns built by `generate_kb.py`
+(shaped by `--features`, `--overlap` and `--unique-density`). Results are
+written as JSON (`--output`) together with the git commit, Python version and
+parameters, and a previous result file can be compared against with
+`--compare`.
+
+Usage:
+    python bench_stack.py [--scale 1000 --scale 10000] [--output results.json]
+                          [--compare baseline.json] [--only answer --only http]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_questions import simulate_session
+from generate_kb import generate_kb, write_kb
+from knowledge_base import file_hash
+from prolog_interface import InabelAPI, PrologProcess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCHMARKS = ('prolog', 'answer', 'sessions', 'http')
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Mean and nearest-rank percentiles of `samples` (seconds), in ms."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered))) - 1))] * 1000.0
+
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000.0,
+        'p50_ms': rank(0.50),
+        'p90_ms': rank(0.90),
+        'p99_ms': rank(0.99),
+        'max_ms': ordered[-1] * 1000.0,
+    }
+
+
+def scaled_kb(size: int, args: argparse.Namespace, directory: str) -> str:
+    """Generate a synthetic KB of `size` patterns; returns its path."""
+    features = args.features or max(20, size // 5)
+    kb = generate_kb(size, features, overlap=args.overlap,
+                     unique_density=args.unique_density, seed=args.seed)
+    path = os.path.join(directory, f"kb-{size}.pl")
+    write_kb(kb, path)
+    return path
+
+
+def bench_prolog(kb_path: str, seconds: float) -> Dict[str, Any]:
+    """Raw commands per second on one `PrologProcess`."""
+    proc = PrologProcess(kb_path)
+    try:
+        proc.warm_up()
+        names = proc.get_all_pattern_names()
+        features = proc.get_all_features()
+        first, last = features[0], features[-1]
+        commands: Dict[str, Callable[[], Any]] = {
+            'ping': proc.ping,
+            'get_all_features': proc.get_all_features,
+            'filter_patterns': lambda: proc.filter_patterns([(first, 'yes'), (last, 'no')]),
+            'refine': lambda: proc.refine_candidates(names, last, 'no'),
+            'get_next_question': lambda: proc.get_next_question([(first, 'no')], names),
+            'get_pattern_by_name': lambda: proc.get_pattern_by_name(names[-1]),
+            'identify_pattern': lambda: proc.identify_pattern([(last, 'yes')]),
+        }
+        results = {}
+        for name, command in commands.items():
+            samples = []
+            deadline = time.perf_counter() + seconds / len(commands)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                command()
+                samples.append(time.perf_counter() - started)
+            results[name] = dict(percentiles(samples), ops_per_s=len(samples) / sum(samples))
+        return results
+    finally:
+        proc.stop()
+
+
+def bench_answer(api: InabelAPI, sessions: int, seed: int) -> Dict[str, Any]:
+    """answer_question latency over random sessions (random yes/no answers)."""
+    rng = random.Random(seed)
+    samples = []
+    for i in range(sessions):
+        step = api.start_session(f'bench-answer-{i}')
+        while step.get('feature') and step.get('status', 'continue') == 'continue':
+            started = time.perf_counter()
+            step = api.answer_question(f'bench-answer-{i}', step['feature'], rng.choice(('yes', 'no')))
+            samples.append(time.perf_counter() - started)
+    return dict(percentiles(samples), sessions=sessions)
+
+
+def bench_sessions(api: InabelAPI, limit: Optional[int], seed: int) -> Dict[str, Any]:
+    """One truthful session per pattern (or `limit` sampled patterns)."""
+    names = list(api.kb.pattern_names)
+    if limit is not None and limit < len(names):
+        names = random.Random(seed).sample(names, limit)
+    started = time.perf_counter()
+    runs = [simulate_session(api, name, api.default_selector) for name in names]
+    elapsed = time.perf_counter() - started
+    answers = sum(r['questions'] for r in runs)
+    return {
+        'sessions': len(runs),
+        'seconds': elapsed,
+        'sessions_per_s': len(runs) / elapsed if elapsed else 0.0,
+        'answers_per_s': answers / elapsed if elapsed else 0.0,
+        'avg_questions': answers / len(runs) if runs else 0.0,
+        'correct': sum(1 for r in runs if r['correct']),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _post(url: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        url, json.dumps(body).encode('utf-8'), {'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def bench_http(kb_path: str, clients: int, seconds: float, engine: str,
+               workers: Optional[int], seed: int, prefork: int = 0) -> Dict[str, Any]:
+    """Concurrent truthful sessions against a `server.py` subprocess.
+
+    With `prefork`, the server forks that many processes (INABEL_PREFORK)
+    that share sessions through a temporary SQLite file.
+    """
+    port = _free_port()
+    base = f'http://127.0.0.1:{port}/api'
+    env = dict(os.environ, INABEL_KB=kb_path, INABEL_PORT=str(port), INABEL_ENGINE=engine,
+               INABEL_KB_WATCH='0', INABEL_LOG_LEVEL='WARNING')
+    if workers:
+        env['INABEL_PROLOG_WORKERS'] = str(workers)
+    scratch = tempfile.TemporaryDirectory()
+    if prefork:
+        env.update(INABEL_PREFORK=str(prefork),
+                   INABEL_SESSION_DB=os.path.join(scratch.name, 'sessions.db'))
+    log = tempfile.TemporaryFile()
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, 'server.py')],
+                              env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + 600
+        while True:
+            try:
+                with urllib.request.urlopen(f'{base}/health', timeout=5) as response:
+                    health = json.loads(response.read())
+                break
+            except OSError:
+                if server.poll() is not None or time.time() > deadline:
+                    log.seek(0)
+                    raise RuntimeError(f"server.py did not start:\n{log.read().decode(errors='replace')}")
+                time.sleep(0.2)
+        with urllib.request.urlopen(f'{base}/patterns', timeout=60) as response:
+            patterns = json.loads(response.read())['data']['patterns']
+
+        samples: List[float] = []
+        completed = [0]
+        errors = [0]
+        lock = threading.Lock()
+        stop_at = time.perf_counter() + seconds
+
+        def client(index: int) -> None:
+            rng = random.Random(seed + index)
+            local, done, failed = [], 0, 0
+            while time.perf_counter() < stop_at:
+                features = set(rng.choice(patterns)['features'])
+                try:
+                    started = time.perf_counter()
+                    step = _post(f'{base}/start', {})['data']
+                    local.append(time.perf_counter() - started)
+                    session_id, feature = step['session_id'], step['feature']
+                    while feature:
+                        started = time.perf_counter()
+                        step = _post(f'{base}/answer', {
+                            'session_id': session_id, 'feature': feature,
+                            'answer': 'yes' if feature in features else 'no',
+                        })['data']
+                        local.append(time.perf_counter() - started)
+                        feature = step.get('feature') if step.get('status') == 'continue' else None
+                    done += 1
+                except OSError:
+                    failed += 1
+            with lock:
+                samples.extend(local)
+                completed[0] += done
+                errors[0] += failed
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return dict(
+            percentiles(samples),
+            clients=clients,
+            seconds=elapsed,
+            requests_per_s=len(samples) / elapsed,
+            sessions_per_s=completed[0] / elapsed,
+            errors=errors[0],
+            prolog_workers=health['prolog_pool']['size'],
+            server_processes=prefork or 1,
+        )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+        scratch.cleanup()
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected benchmarks for the real KB and each scaled KB."""
+    only = set(args.only or BENCHMARKS)
+    report: Dict[str, Any] = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'engine': args.engine,
+            'seed': args.seed,
+            'generator': {'features': args.features, 'overlap': args.overlap,
+                          'unique_density': args.unique_density},
+            'benchmarks': sorted(only),
+        },
+        'kbs': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        kbs = [('base', args.kb)]
+        kbs += [(str(size), scaled_kb(size, args, tmp)) for size in args.scale]
+        for label, kb_path in kbs:
+            print(f"[{label}] {kb_path}", file=sys.stderr)
+            started = time.perf_counter()
+            api = InabelAPI(kb_path, engine=args.engine, cache_dir=os.path.join(tmp, 'cache'))
+            results: Dict[str, Any] = {
+                'patterns': len(api.kb.pattern_names),
+                'features': len(api.kb.features),
+                'kb_version': file_hash(kb_path),
+                'startup_ms': (time.perf_counter() - started) * 1000.0,
+            }
+            try:
+                if 'prolog' in only:
+                    results['prolog'] = bench_prolog(kb_path, args.seconds)
+                if 'answer' in only:
+                    results['answer'] = bench_answer(api, args.answer_sessions, args.seed)
+                if 'sessions' in only:
+                    results['sessions'] = bench_sessions(api, args.session_limit, args.seed)
+            finally:
+                api.prolog_interface.stop()
+            if 'http' in only:
+                results['http'] = bench_http(kb_path, args.clients, args.seconds,
+                                             args.engine, args.server_workers, args.seed,
+                                             args.prefork)
+            report['kbs'][label] = results
+    return report
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# (benchmark, metric, True if higher is better) pairs compared by --compare.
+HEADLINE_METRICS = [
+    ('answer', 'p50_ms', False),
+    ('answer', 'p99_ms', False),
+    ('sessions', 'sessions_per_s', True),
+    ('http', 'requests_per_s', True),
+    ('http', 'p99_ms', False),
+]
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Headline metrics of `report` against `baseline`, per KB.
+
+    `change_pct` is positive when the new result is better.
+    """
+    rows = []
+    for label, results in report['kbs'].items():
+        old = baseline.get('kbs', {}).get(label)
+        if not old:
+            continue
+        metrics = [(b, m, up) for b, m, up in HEADLINE_METRICS]
+        metrics += [('prolog', f'{cmd}.ops_per_s', True) for cmd in results.get('prolog', {})]
+        for bench, metric, higher_is_better in metrics:
+            new_value, old_value = _lookup(results, bench, metric), _lookup(old, bench, metric)
+            if new_value is None or not old_value:
+                continue
+            change = (new_value - old_value) / old_value * 100.0
+            rows.append({
+                'kb': label, 'metric': f'{bench}.{metric}', 'baseline': old_value,
+                'current': new_value, 'change_pct': change if higher_is_better else -change,
+            })
+    return rows
+
+
+def _lookup(results: Dict[str, Any], bench: str, metric: str) -> Optional[float]:
+    value: Any = results.get(bench)
+    for part in metric.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, (int, float)) else None
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    for label, results in report['kbs'].items():
+        print(f"\n== KB {label}: {results['patterns']} patterns, {results['features']} features, "
+              f"start-up {results['startup_ms']:.0f} ms")
+        for command, r in results.get('prolog', {}).items():
+            print(f"  prolog {command:<20} {r['ops_per_s']:>9.0f} ops/s  p50 {r['p50_ms']:.3f} ms")
+        if 'answer' in results:
+            r = results['answer']
+            print(f"  answer_question        p50 {r['p50_ms']:.3f}  p90 {r['p90_ms']:.3f}  "
+                  f"p99 {r['p99_ms']:.3f}  max {r['max_ms']:.3f} ms  ({r['count']} answers)")
+        if 'sessions' in results:
+            r = results['sessions']
+            print(f"  full sessions          {r['sessions_per_s']:>9.1f} sessions/s  "
+                  f"{r['answers_per_s']:.0f} answers/s  {r['correct']}/{r['sessions']} correct")
+        if 'http' in results:
+            r = results['http']
+            print(f"  http ({r['clients']} clients)       {r['requests_per_s']:>9.1f} req/s  "
+                  f"{r['sessions_per_s']:.1f} sessions/s  p50 {r['p50_ms']:.2f}  "
+                  f"p99 {r['p99_ms']:.2f} ms  errors {r['errors']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--kb', default=os.path.join(HERE, '..', 'inabel.ai.pl'))
+    parser.add_argument('--engine', default='prolog', choices=['python', 'prolog'])
+    parser.add_argument('--scale', type=int, action='append', default=[],
+                        help='also benchmark a generated KB of this many patterns (repeatable)')
+    parser.add_argument('--features', type=int, default=None,
+                        help='shared features of generated KBs (default: patterns / 5)')
+    parser.add_argument('--overlap', type=float, default=0.3,
+                        help='feature overlap of generated KBs (see generate_kb.py)')
+    parser.add_argument('--unique-density', type=float, default=0.2,
+                        help='share of generated patterns with a unique feature')
+    parser.add_argument('--only', action='append', choices=BENCHMARKS,
+                        help='benchmark to run (repeatable; default: all)')
+    parser.add_argument('--seconds', type=float, default=5.0,
+                        help='duration of the prolog and http benchmarks')
+    parser.add_argument('--answer-sessions', type=int, default=200,
+                        help='random sessions timed by the answer benchmark')
+    parser.add_argument('--session-limit', type=int, default=None,
+                        help='sample at most this many patterns for full sessions')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent HTTP clients')
+    parser.add_argument('--server-workers', type=int, default=None,
+                        help='INABEL_PROLOG_WORKERS for the benchmarked server')
+    parser.add_argument('--prefork', type=int, default=0,
+                        help='run the benchmarked server with INABEL_PREFORK processes')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON results here')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='with --compare, exit 1 if any metric got worse by more than this %%')
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    print_summary(report)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            rows = compare(report, json.load(fh))
+        report['comparison'] = rows
+        print("\n== Compared with", args.compare, "(positive = better)")
+        for row in rows:
+            print(f"  {row['kb']:>6} {row['metric']:<36} {row['baseline']:>12.3f} -> "
+                  f"{row['current']:>12.3f}  {row['change_pct']:+7.1f}%")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare and args.max_regression is not None:
+        worst = [r for r in report['comparison'] if r['change_pct'] < -args.max_regression]
+        if worst:
+            print(f"\n{len(worst)} metric(s) regressed by more than {args.max_regression}%")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
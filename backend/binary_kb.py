@@ -0,0 +1,233 @@
+"""
+Compiled binary KB snapshot for Inabel Pattern Identification.
+
+`write_binary_kb` compiles a `KnowledgeBase` into one little-endian file:
+
+    header     magic, format, KB version (SHA-256), counts, section offsets
+    terms      (offset, length) of every interned feature name; ids
+               0..F-1 are the features in `get_all_features/1` order, then
+               any features that only have a question
+    questions  (term id, offset, length) per `feature_question/2` fact
+    patterns   (name offset, name length, metadata offset, metadata length)
+    masks      one fixed-width pattern bitmask per feature id < F, exactly
+               as `PatternIndex` builds them
+    metadata   each pattern's full JSON dict, back to back
+    strings    UTF-8 text referenced by the tables above
+
+`BinaryKnowledgeBase` memory-maps the file. Names, features, questions and
+bitmasks are read at load time; a pattern's metadata (meaning, images,
+references) is decoded only when that pattern is first looked up. The
+mapping is read-only and backed by the page cache, so every worker on a
+host that maps the same file shares one copy of it.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from knowledge_base import KnowledgeBase, file_hash
+from pattern_index import PatternIndex
+
+MAGIC = b'INABELKB'
+FORMAT_VERSION = 1
+
+# magic, format, version, patterns, features, terms, questions, mask width,
+# then the offsets of the terms, questions, patterns, masks, metadata and
+# strings sections.
+_HEADER = struct.Struct('<8sI64sIIIII6Q')
+_TERM = struct.Struct('<II')
+_QUESTION = struct.Struct('<III')
+_PATTERN = struct.Struct('<IIQI')
+
+
+def write_binary_kb(kb: KnowledgeBase, path: str) -> None:
+    """Atomically write `kb` as a binary snapshot to `path`."""
+    index = PatternIndex(kb)
+    terms = list(kb.features)
+    term_ids = {term: i for i, term in enumerate(terms)}
+    for feature in kb.feature_questions:
+        if feature not in term_ids:
+            term_ids[feature] = len(terms)
+            terms.append(feature)
+
+    strings = bytearray()
+
+    def intern(text: str) -> tuple:
+        data = text.encode('utf-8')
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    term_table = b''.join(_TERM.pack(*intern(term)) for term in terms)
+    question_table = b''.join(
+        _QUESTION.pack(term_ids[feature], *intern(question))
+        for feature, question in kb.feature_questions.items()
+    )
+    metadata = bytearray()
+    pattern_rows = []
+    for pattern in kb.patterns:
+        blob = json.dumps(pattern, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        pattern_rows.append(_PATTERN.pack(*intern(pattern['name']), len(metadata), len(blob)))
+        metadata.extend(blob)
+    pattern_table = b''.join(pattern_rows)
+    width = (len(index.pattern_names) + 7) // 8
+    masks = b''.join(index.feature_masks[f].to_bytes(width, 'little') for f in kb.features)
+
+    sections = [term_table, question_table, pattern_table, masks, bytes(metadata), bytes(strings)]
+    offsets = []
+    position = _HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, kb.version.encode('ascii'), len(kb.patterns),
+        len(kb.features), len(terms), len(kb.feature_questions), width, *offsets,
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(header)
+        for section in sections:
+            fh.write(section)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def is_binary_kb(path: str) -> bool:
+    """True if `path` starts with the binary snapshot magic."""
+    try:
+        with open(path, 'rb') as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class _LazyPatterns(Mapping):
+    """Pattern name -> pattern dict, decoded from the mapped file on first use.
+
+    Like `KnowledgeBase.patterns_by_name`, the first pattern with a name wins.
+    """
+
+    def __init__(self, kb: "BinaryKnowledgeBase", positions: Dict[str, int]) -> None:
+        self._kb = kb
+        self._positions = positions
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self._kb.pattern_at(self._positions[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._positions
+
+
+class BinaryKnowledgeBase(KnowledgeBase):
+    """`KnowledgeBase` backed by a memory-mapped binary snapshot.
+
+    Serves the same attributes as `KnowledgeBase`; `patterns` decodes every
+    pattern on first access, `patterns_by_name` only the ones looked up.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._map
+        if len(buf) < _HEADER.size:
+            raise ValueError(f"{path} is not a binary KB snapshot")
+        (magic, fmt, version, n_patterns, n_features, n_terms, n_questions, width,
+         terms_at, questions_at, patterns_at, masks_at, self._metadata_at,
+         strings_at) = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a format {FORMAT_VERSION} binary KB snapshot")
+        self.version = version.rstrip(b'\0').decode('ascii')
+
+        def text(offset: int, length: int) -> str:
+            return str(buf[strings_at + offset:strings_at + offset + length], 'utf-8')
+
+        terms = [text(*_TERM.unpack_from(buf, terms_at + i * _TERM.size)) for i in range(n_terms)]
+        self.features: List[str] = terms[:n_features]
+
+        self.feature_questions: Dict[str, str] = {}
+        for i in range(n_questions):
+            term, offset, length = _QUESTION.unpack_from(buf, questions_at + i * _QUESTION.size)
+            self.feature_questions[terms[term]] = text(offset, length)
+        self.all_feature_questions: Dict[str, str] = {
+            f: self.feature_questions[f] for f in self.features if f in self.feature_questions
+        }
+
+        self._rows = []
+        self.pattern_names: List[str] = []
+        positions: Dict[str, int] = {}
+        for i in range(n_patterns):
+            name_at, name_len, meta_at, meta_len = _PATTERN.unpack_from(
+                buf, patterns_at + i * _PATTERN.size
+            )
+            name = text(name_at, name_len)
+            self._rows.append((meta_at, meta_len))
+            self.pattern_names.append(name)
+            positions.setdefault(name, i)
+        self._decoded: Dict[int, Dict[str, Any]] = {}
+        self.patterns_by_name: Mapping = _LazyPatterns(self, positions)
+        self._patterns: Optional[List[Dict[str, Any]]] = None
+
+        # Read by `PatternIndex` instead of walking every pattern's features.
+        self.feature_masks: Dict[str, int] = {
+            feature: int.from_bytes(buf[masks_at + i * width:masks_at + (i + 1) * width], 'little')
+            for i, feature in enumerate(self.features)
+        }
+
+    def pattern_at(self, position: int) -> Dict[str, Any]:
+        """The pattern dict at `position` in KB order, decoded once."""
+        pattern = self._decoded.get(position)
+        if pattern is None:
+            offset, length = self._rows[position]
+            start = self._metadata_at + offset
+            pattern = json.loads(str(self._map[start:start + length], 'utf-8'))
+            self._decoded[position] = pattern
+        return pattern
+
+    @property
+    def patterns(self) -> List[Dict[str, Any]]:  # type: ignore[override]
+        if self._patterns is None:
+            self._patterns = [self.pattern_at(i) for i in range(len(self._rows))]
+        return self._patterns
+
+    @classmethod
+    def load(cls, path: str) -> "BinaryKnowledgeBase":  # type: ignore[override]
+        return cls(path)
+
+
+def load_snapshot(path: str) -> KnowledgeBase:
+    """Load a KB snapshot, binary or JSON (as written by knowledge_base.py)."""
+    if is_binary_kb(path):
+        return BinaryKnowledgeBase(path)
+    return KnowledgeBase.load(path)
+
+
+if __name__ == '__main__':
+    # Compile a binary KB snapshot: python binary_kb.py [kb.pl] [inabel_kb.bin]
+    from prolog_interface import PrologProcess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    kb_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, '..', 'inabel.ai.pl')
+    out_path = sys.argv[2] if len(sys.argv) > 2 else 'inabel_kb.bin'
+
+    proc = PrologProcess(kb_path)
+    try:
+        kb = KnowledgeBase.from_prolog(proc, version=file_hash(kb_path))
+    finally:
+        proc.stop()
+    write_binary_kb(kb, out_path)
+    print(f"Compiled {len(kb.patterns)} patterns and {len(kb.features)} features "
+          f"to {out_path} ({os.path.getsize(out_path)} bytes)")
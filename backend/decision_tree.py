@@ -0,0 +1,165 @@
+"""
+Precomputed question policy for Inabel Pattern Identification.
+
+The outcome of `InabelAPI.answer_question` depends only on the set of
+(feature, answer) pairs given so far, and the KB does not change between
+deploys. `QuestionTree` therefore walks every path a session can take from
+the opening question -- using the same rules as `answer_question` and the
+bitset `PatternIndex` -- and records, for each reachable answer set, either
+the next feature to ask or the terminal result. Answering a question then
+becomes a dictionary lookup.
+
+Trees are serialised to JSON so that workers start warm, and a cached tree is
+discarded automatically when the KB file's hash no longer matches.
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pattern_index import PatternIndex, popcount
+from question_selector import get_selector
+
+# Bumped whenever the serialised tree changes shape or meaning; cached trees
+# written by another format are rebuilt.
+FORMAT_VERSION = 1
+
+
+def response_key(responses: Iterable[tuple]) -> str:
+    """Canonical, order-independent key for a list of (feature, answer) pairs."""
+    return "&".join(sorted(f"{feature}={answer}" for feature, answer in responses))
+
+
+def evaluate(
+    index: PatternIndex,
+    unique_features: Dict[str, str],
+    selector: str,
+    min_questions: int,
+    responses: List[tuple],
+    mask: int,
+) -> Dict[str, Any]:
+    """Decide what `answer_question` does after `responses`.
+
+    `mask` is the candidate set consistent with `responses`. The returned
+    outcome is one of:
+      * {"status": "complete", "pattern": name, "method": ..., ["unique_feature": f]}
+      * {"status": "not_found"}
+      * {"status": "continue", "feature": f, "remaining": n}
+    """
+    feature, answer = responses[-1]
+    if answer == 'yes' and feature in unique_features:
+        return {
+            "status": "complete",
+            "pattern": unique_features[feature],
+            "method": "unique_feature",
+            "unique_feature": feature,
+        }
+
+    if not mask:
+        return {"status": "not_found"}
+
+    remaining = popcount(mask)
+    if remaining == 1 and len(responses) >= min_questions:
+        return {"status": "complete", "pattern": index.names_of(mask)[0], "method": "elimination"}
+
+    answered: Set[str] = {f for (f, _) in responses}
+    next_feature = get_selector(selector)(index, mask, answered)
+    if not next_feature:
+        # Same fallback as answer_question: any feature not yet answered.
+        next_feature = next((f for f in index.features if f not in answered), None)
+
+    if next_feature:
+        return {"status": "continue", "feature": next_feature, "remaining": remaining}
+    return {"status": "complete", "pattern": index.names_of(mask)[0], "method": "best_match"}
+
+
+class QuestionTree:
+    """Answer-set -> outcome table for one selector."""
+
+    def __init__(
+        self,
+        selector: str,
+        kb_hash: str,
+        min_questions: int,
+        start_feature: Optional[str],
+        nodes: Dict[str, Dict[str, Any]],
+    ) -> None:
+        self.selector = selector
+        self.kb_hash = kb_hash
+        self.min_questions = min_questions
+        self.start_feature = start_feature
+        self.nodes = nodes
+
+    @classmethod
+    def build(
+        cls,
+        index: PatternIndex,
+        unique_features: Dict[str, str],
+        selector: str,
+        min_questions: int,
+        start_feature: Optional[str],
+        kb_hash: str,
+    ) -> "QuestionTree":
+        """Explore every answer path starting from `start_feature`."""
+        nodes: Dict[str, Dict[str, Any]] = {}
+        # Each stack entry: (responses so far, candidate mask, feature asked next)
+        stack = [([], index.all_mask, start_feature)] if start_feature else []
+        while stack:
+            responses, mask, feature = stack.pop()
+            for answer in ('yes', 'no'):
+                branch = responses + [(feature, answer)]
+                key = response_key(branch)
+                if key in nodes:
+                    continue
+                branch_mask = index.refine(mask, feature, answer)
+                outcome = evaluate(index, unique_features, selector, min_questions, branch, branch_mask)
+                nodes[key] = outcome
+                if outcome["status"] == "continue":
+                    stack.append((branch, branch_mask, outcome["feature"]))
+        return cls(selector, kb_hash, min_questions, start_feature, nodes)
+
+    def lookup(self, responses: Iterable[tuple]) -> Optional[Dict[str, Any]]:
+        """Outcome for an answer set, or None if the tree never reaches it."""
+        return self.nodes.get(response_key(responses))
+
+    def save(self, path: str) -> None:
+        """Atomically write the tree to `path` as JSON."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(
+                {
+                    "format": FORMAT_VERSION,
+                    "selector": self.selector,
+                    "kb_hash": self.kb_hash,
+                    "min_questions": self.min_questions,
+                    "start_feature": self.start_feature,
+                    "nodes": self.nodes,
+                },
+                fh,
+                ensure_ascii=False,
+            )
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, kb_hash: str, min_questions: int) -> Optional["QuestionTree"]:
+        """Load a cached tree, or None if missing, in another format or built
+        for another KB."""
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if (data.get("format") != FORMAT_VERSION or data.get("kb_hash") != kb_hash
+                or data.get("min_questions") != min_questions):
+            return None
+        return cls(
+            data["selector"],
+            data["kb_hash"],
+            data["min_questions"],
+            data.get("start_feature"),
+            data["nodes"],
+        )
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Synthetic knowledge base generator for Inabel Pattern Identification.
+
+Generates `pattern/7` and `feature_question/2` facts for N patterns over a
+pool of M shared features, followed by the identification engine from
+`inabel.ai.pl`, so the result loads and answers exactly like the real KB.
+
+Two knobs shape the feature sets:
+
+* `overlap` (0..1) -- probability that each shared feature of a pattern is
+  drawn from a small hot set of common features instead of uniformly from
+  the whole pool. 0 spreads features out (few candidates per answer); 1
+  makes every pattern share the same few features (long sessions, many
+  candidates).
+* `unique_density` (0..1) -- fraction of patterns that also get a feature
+  of their own, found in no other pattern (the `unique_feature` shortcut).
+
+Generation is deterministic for a given seed, and feature sets are kept
+distinct so every pattern can be identified.
+
+Usage:
+    python generate_kb.py 10000 [--features 2000] [--overlap 0.3]
+                          [--unique-density 0.2] [--seed 1] [-o kb-10000.pl]
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from knowledge_base import KnowledgeBase
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Start of the rules section of inabel.ai.pl; everything before it is facts.
+RULES_MARKER = ('% =====================================================================\n'
+                '% IDENTIFICATION ENGINE')
+
+
+def generate_kb(
+    patterns: int,
+    features: int,
+    features_per_pattern: int = 4,
+    overlap: float = 0.3,
+    unique_density: float = 0.2,
+    seed: int = 1,
+) -> KnowledgeBase:
+    """Build a synthetic `KnowledgeBase` of `patterns` patterns.
+
+    Shared features are `f00000`...; unique features are `u<pattern index>`.
+    Each pattern has `features_per_pattern` shared features (fewer if the
+    pool is smaller) plus, for `unique_density` of the patterns, one unique
+    feature.
+    """
+    if not 0.0 <= overlap <= 1.0 or not 0.0 <= unique_density <= 1.0:
+        raise ValueError("overlap and unique_density must be between 0 and 1")
+    if patterns < 0 or features < 1 or features_per_pattern < 1:
+        raise ValueError("need patterns >= 0, features >= 1 and features_per_pattern >= 1")
+
+    rng = random.Random(seed)
+    width = len(str(max(patterns, features) - 1))
+    pool = [f"f{i:0{width}d}" for i in range(features)]
+    per_pattern = min(features_per_pattern, features)
+    hot = pool[:max(per_pattern, features // 10)]
+
+    generated: List[Dict[str, Any]] = []
+    questions: Dict[str, str] = {f: f"Does the pattern show feature {f}?" for f in pool}
+    seen = set()
+    for i in range(patterns):
+        name = f"pattern_{i:0{width}d}"
+        unique = rng.random() < unique_density
+        for _attempt in range(20):
+            chosen: List[str] = []
+            while len(chosen) < per_pattern:
+                feature = rng.choice(hot if rng.random() < overlap else pool)
+                if feature not in chosen:
+                    chosen.append(feature)
+            if unique or frozenset(chosen) not in seen:
+                break
+        else:
+            # The pool is too small for another distinct set; fall back to
+            # a unique feature so the pattern stays identifiable.
+            unique = True
+        seen.add(frozenset(chosen))
+        if unique:
+            feature = f"u{i:0{width}d}"
+            chosen.append(feature)
+            questions[feature] = f"Does the pattern show the signature motif {feature}?"
+        generated.append({
+            'name': name,
+            'features': chosen,
+            'meaning': f"Synthetic pattern {i} over {len(chosen)} features",
+            'icon': 'bi-grid',
+            'placeholderPattern': 'synthetic-pattern',
+            'images': [f"images/{name}.jpg"],
+            'references': [{'text': f"Synthetic reference {i}", 'url': f"https://example.org/{name}"}],
+        })
+    return KnowledgeBase(generated, questions)
+
+
+def _quote(text: str) -> str:
+    return "'" + str(text).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def write_kb(kb: KnowledgeBase, path: str, rules_from: str = os.path.join(HERE, '..', 'inabel.ai.pl')) -> None:
+    """Write `kb` as Prolog facts, followed by the rules of `rules_from`."""
+    with open(rules_from, encoding='utf-8') as fh:
+        source = fh.read()
+    rules = source[source.index(RULES_MARKER):]
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write('% Generated knowledge base; see generate_kb.py.\n\n')
+        for p in kb.patterns:
+            refs = ', '.join(f"ref({_quote(r['text'])}, {_quote(r['url'])})" for r in p['references'])
+            out.write(
+                f"pattern({_quote(p['name'])},\n"
+                f"    [{', '.join(_quote(f) for f in p['features'])}],\n"
+                f"    {_quote(p['meaning'])},\n"
+                f"    {_quote(p['icon'])},\n"
+                f"    {_quote(p['placeholderPattern'])},\n"
+                f"    [{', '.join(_quote(i) for i in p['images'])}],\n"
+                f"    [{refs}]).\n\n"
+            )
+        for feature, question in kb.feature_questions.items():
+            out.write(f"feature_question({_quote(feature)}, {_quote(question)}).\n")
+        out.write('\n\n' + rules)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('patterns', type=int, help='number of patterns')
+    parser.add_argument('--features', type=int, default=None,
+                        help='size of the shared feature pool (default: patterns / 5, at least 20)')
+    parser.add_argument('--features-per-pattern', type=int, default=4)
+    parser.add_argument('--overlap', type=float, default=0.3)
+    parser.add_argument('--unique-density', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', default=None, help='default: kb-<patterns>.pl')
+    args = parser.parse_args()
+
+    features = args.features or max(20, args.patterns // 5)
+    kb = generate_kb(args.patterns, features, args.features_per_pattern,
+                     args.overlap, args.unique_density, args.seed)
+    output = args.output or f"kb-{args.patterns}.pl"
+    write_kb(kb, output)
+    print(f"Wrote {len(kb.patterns)} patterns over {len(kb.features)} features to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Bulk identification for Inabel Pattern Identification.
+
+Reads newline-delimited JSON records, one response set per line:
+
+    {"id": "rec-1", "responses": [{"feature": "dizzying", "answer": "yes"}, ...]}
+
+and writes one JSON result per line, in input order, as soon as each chunk of
+records is done:
+
+    {"line": 1, "id": "rec-1", "status": "found", "pattern": "binakul"}
+
+Records are identified in chunks by `InabelAPI.identify_items`, with
+--workers chunks identified in parallel (one Prolog worker each) and at most
+twice that many buffered, so memory stays bounded by the chunk size and
+worker count however long the input is. Lines that are not valid records
+produce a "status": "error" result.
+
+Usage:
+    python identify_bulk.py [records.ndjson] [-o results.ndjson] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from prolog_interface import InabelAPI
+
+
+Chunk = List[Tuple[int, str]]
+
+
+def read_chunks(stream: Iterable[str], size: int) -> Iterator[Chunk]:
+    """(line number, text) pairs for the non-blank lines, `size` at a time."""
+    chunk: Chunk = []
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        chunk.append((line_no, line))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def identify_chunk(
+    api: InabelAPI, chunk: Chunk, full_pattern: bool = False
+) -> List[Tuple[str, str]]:
+    """Identify one chunk of NDJSON lines; returns (status, result line) pairs."""
+    results: List[Dict[str, Any]] = []
+    items: List[Any] = []
+    slots: List[int] = []
+    for line_no, line in chunk:
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            results.append({'line': line_no, 'status': 'error', 'error': f'invalid JSON: {e}'})
+            continue
+        results.append({'line': line_no})
+        items.append(item)
+        slots.append(len(results) - 1)
+
+    for slot, result in zip(slots, api.identify_items(items)):
+        pattern = result.pop('pattern', None)
+        if pattern is not None:
+            result['pattern'] = pattern if full_pattern else pattern.get('name')
+        result.pop('message', None)
+        results[slot].update(result)
+    return [
+        (r['status'], json.dumps(r, ensure_ascii=False, separators=(',', ':')))
+        for r in results
+    ]
+
+
+def run(
+    api: InabelAPI,
+    source: TextIO,
+    sink: TextIO,
+    workers: int = 1,
+    chunk_size: int = 500,
+    full_pattern: bool = False,
+) -> Dict[str, int]:
+    """Stream `source` through the API into `sink`; returns status counts."""
+    counts = {'found': 0, 'not_found': 0, 'error': 0}
+
+    def write(results: List[Tuple[str, str]]) -> None:
+        for status, line in results:
+            counts[status] += 1
+            sink.write(line + '\n')
+        sink.flush()
+
+    # At most 2 chunks per worker are queued or running; results are written
+    # in input order as soon as the oldest chunk is done.
+    pending: Deque["Future[List[Tuple[str, str]]]"] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in read_chunks(source, chunk_size):
+            pending.append(executor.submit(identify_chunk, api, chunk, full_pattern))
+            while pending and (len(pending) >= 2 * workers or pending[0].done()):
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return counts
+
+
+def main() -> int:
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('input', nargs='?', default='-', help='NDJSON records (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', help='NDJSON results (default: stdout)')
+    parser.add_argument('--kb', default=os.path.join(here, '..', 'inabel.ai.pl'))
+    parser.add_argument('--engine', default='prolog', choices=['python', 'prolog'])
+    parser.add_argument('--kb-snapshot', default=None,
+                        help='KB snapshot written by knowledge_base.py or binary_kb.py')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='chunks identified in parallel (and Prolog workers)')
+    parser.add_argument('--chunk-size', type=int, default=InabelAPI.IDENTIFY_CHUNK,
+                        help='records per chunk')
+    parser.add_argument('--full-pattern', action='store_true',
+                        help='emit the full pattern record instead of its name')
+    args = parser.parse_args()
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error('--workers and --chunk-size must be at least 1')
+
+    api = InabelAPI(
+        args.kb,
+        workers=args.workers,
+        engine=args.engine,
+        kb_snapshot=args.kb_snapshot,
+        question_tree=False,
+    )
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    started = time.perf_counter()
+    try:
+        counts = run(api, source, sink, args.workers, args.chunk_size, args.full_pattern)
+    finally:
+        api.prolog_interface.stop()
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(
+        f"{total} records in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f}/s): "
+        + ", ".join(f"{k}={v}" for k, v in counts.items()),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+In-process identification engine for Inabel Pattern Identification.
+
+`PythonEngine` re-implements `filter_patterns_by_responses/3`,
+`pattern_matches/2` and `get_next_question/3` over a `KnowledgeBase`
+exported from `inabel.ai.pl`, with the same results, using the bitset
+`PatternIndex` for candidate filtering. This lets `InabelAPI` answer questions
+without a pipe round trip per lookup.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from knowledge_base import KnowledgeBase
+from pattern_index import PatternIndex
+
+
+class PythonEngine:
+    """Pure-Python implementation of the Prolog identification commands.
+
+    Exposes the same methods as `PrologProcess`, so `InabelAPI` can use
+    either one interchangeably.
+    """
+
+    def __init__(self, kb: KnowledgeBase, index: Optional[PatternIndex] = None) -> None:
+        self.kb = kb
+        self.index = index if index is not None else PatternIndex(kb)
+
+    def get_all_pattern_names(self) -> List[str]:
+        return list(self.kb.pattern_names)
+
+    def get_all_features(self) -> List[str]:
+        return list(self.kb.features)
+
+    def get_feature_question(self, feature: str) -> Optional[str]:
+        return self.kb.feature_questions.get(feature)
+
+    def get_all_feature_questions(self) -> Dict[str, str]:
+        return dict(self.kb.all_feature_questions)
+
+    def identify_pattern(self, responses: List[tuple]) -> Optional[Dict[str, Any]]:
+        mask = self.index.filter_mask(responses)
+        if not mask:
+            return None
+        # A single candidate, or the best (first) match among several.
+        first = mask & -mask
+        return self.kb.patterns_by_name[self.index.pattern_names[first.bit_length() - 1]]
+
+    def identify_patterns(self, response_sets: List[List[tuple]]) -> List[Optional[Dict[str, Any]]]:
+        return [self.identify_pattern(responses) for responses in response_sets]
+
+    def get_next_question(self, responses: List[tuple], candidates: List[str]) -> Optional[str]:
+        return self.index.first_relevant_feature(
+            self.index.mask_of(candidates),
+            [f for (f, _) in responses],
+        )
+
+    def filter_patterns(self, responses: List[tuple]) -> List[str]:
+        return self.index.names_of(self.index.filter_mask(responses))
+
+    def refine_candidates(self, candidates: List[str], feature: str, answer: str) -> List[str]:
+        return self.index.names_of(
+            self.index.refine(self.index.mask_of(candidates), feature, answer)
+        )
+
+    def get_pattern_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.kb.patterns_by_name.get(name)
+
+    def get_all_patterns(self) -> List[Dict[str, Any]]:
+        return list(self.kb.patterns)
+
+    def get_next_question_with_text(
+        self, responses: List[tuple], candidates: List[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        feature = self.get_next_question(responses, candidates)
+        if feature is None:
+            return None, None
+        return feature, self.kb.feature_questions.get(feature)
+
+    def stop(self) -> None:
+        pass
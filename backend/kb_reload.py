@@ -0,0 +1,237 @@
+"""
+Hot reload of the Inabel knowledge base.
+
+`KBReloader` owns the serving `InabelAPI` and watches `inabel.ai.pl`. When
+the file's content changes, a complete new `InabelAPI` (Prolog workers, KB
+snapshot, pattern index, unique features, question tree, catalogue body) is
+built in the background while the old one keeps serving, then swapped in
+with a single reference assignment: request handlers read `reloader.api`
+once and use it for the whole request.
+
+Sessions remember the KB version they started on (tokens are signed with
+it), so answers to a session that began before a reload are routed to the
+API it started on until it finishes. Replaced APIs are kept until none of
+their sessions has been used for `retire_after` seconds (the session TTL),
+then their workers are stopped.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from knowledge_base import file_hash
+from prolog_interface import InabelAPI
+
+logger = logging.getLogger(__name__)
+
+
+class KBReloader:
+    """Serve the current `InabelAPI` and rebuild it when the KB file changes.
+
+    `factory` builds an `InabelAPI` from `prolog_file_path`; it is called
+    once here (unless the first `api` is passed in) and again for every
+    reload, and should pass all of them the same session store.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], InabelAPI],
+        prolog_file_path: str,
+        retire_after: float = 3600.0,
+        api: Optional[InabelAPI] = None,
+    ) -> None:
+        self.factory = factory
+        self.prolog_file_path = prolog_file_path
+        self.retire_after = retire_after
+        self.api = api if api is not None else factory()
+        # Replaced APIs still finishing their sessions:
+        # kb_version -> (api, last time one of its sessions was used)
+        self._previous: Dict[str, Tuple[InabelAPI, float]] = {}
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._stat = self._file_stat()
+        self._seen_version: Optional[str] = None
+        self._failed_version: Optional[str] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_ms: Optional[float] = None
+
+    def _file_stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.prolog_file_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    # Routing
+
+    def api_for_session(self, session: Optional[Dict[str, Any]]) -> Optional[InabelAPI]:
+        """The API a loaded session started on (None if it was retired)."""
+        api = self.api
+        version = session.get('kb_version') if session else None
+        if version is None or version == api.kb.version:
+            return api
+        return self._previous_api(version)
+
+    def api_for_token(self, token: str) -> Optional[InabelAPI]:
+        """The API whose KB a session token was signed for."""
+        api = self.api
+        if api.token_codec is None or api.token_codec.decode(token) is not None:
+            return api
+        with self._lock:
+            versions = list(self._previous)
+        for version in versions:
+            previous = self._previous_api(version)
+            if previous is not None and previous.token_codec.decode(token) is not None:
+                return previous
+        return None
+
+    def _previous_api(self, version: str) -> Optional[InabelAPI]:
+        with self._lock:
+            entry = self._previous.get(version)
+            if entry is None:
+                return None
+            self._previous[version] = (entry[0], time.monotonic())
+            return entry[0]
+
+    def answer_question(self, session_id: str, feature: str, answer: str) -> Dict[str, Any]:
+        """`InabelAPI.answer_question` on the session's own KB."""
+        # Read the session once: routing on it and answering share the read,
+        # so its TTL is refreshed (and a hit counted) once per answer.
+        session = self.api._load_session(session_id)
+        api = self.api_for_session(session)
+        if api is None:
+            return {'error': 'Session expired after a knowledge base update'}
+        return api.answer_loaded_session(session_id, session, feature, answer)
+
+    def answer_token(self, token: str, feature: str, answer: str) -> Dict[str, Any]:
+        """`InabelAPI.answer_token` on the token's own KB."""
+        api = self.api_for_token(token)
+        if api is None:
+            return {'error': 'Invalid session token'}
+        return api.answer_token(token, feature, answer)
+
+    # Reloading
+
+    def check(self) -> bool:
+        """Reload if the KB file changed; returns True if a new KB was swapped in.
+
+        A changed file is only loaded once two consecutive checks see the
+        same content, so a save in progress is not picked up half-written.
+        A KB that fails to load is not retried until the file changes again.
+        """
+        stat = self._file_stat()
+        if stat is None or (stat == self._stat and self._seen_version is None):
+            self.retire_idle()
+            return False
+        self._stat = stat
+        version = file_hash(self.prolog_file_path)
+        if version in (self.api.kb.version, self._failed_version):
+            self._seen_version = None
+            self.retire_idle()
+            return False
+        if version != self._seen_version:
+            self._seen_version = version
+            return False
+        self._seen_version = None
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Build an API from the KB file as it is now and swap it in.
+
+        Returns False if the KB is unchanged or the new one failed to load;
+        the current API keeps serving either way.
+        """
+        with self._reload_lock:
+            version = file_hash(self.prolog_file_path)
+            if version == self.api.kb.version:
+                return False
+            started = time.perf_counter()
+            with self._lock:
+                # Reverted to a KB that is still finishing sessions: reuse it.
+                reverted = self._previous.pop(version, None)
+            if reverted is not None:
+                fresh = reverted[0]
+            else:
+                try:
+                    fresh = self.factory()
+                    fresh.get_patterns_catalogue()
+                except Exception as e:
+                    self.failures += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    self._failed_version = version
+                    logger.exception("Reloading the KB from %s failed", self.prolog_file_path)
+                    return False
+
+            # Requests already holding the old API finish on it; it stays
+            # in `_previous` until its sessions go idle.
+            with self._lock:
+                old, self.api = self.api, fresh
+                self._previous[old.kb.version] = (old, time.monotonic())
+            self.reloads += 1
+            self.last_error = None
+            self._failed_version = None
+            self.last_reload_ms = (time.perf_counter() - started) * 1000.0
+            logger.info(
+                "Reloaded KB %s -> %s (%d patterns) in %.0f ms",
+                old.kb.version[:12], fresh.kb.version[:12],
+                len(fresh.kb.pattern_names), self.last_reload_ms,
+            )
+            return True
+
+    def retire_idle(self, now: Optional[float] = None) -> int:
+        """Stop replaced APIs whose sessions have been idle for `retire_after`."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [
+                version for version, (_, last_used) in self._previous.items()
+                if now - last_used >= self.retire_after
+            ]
+            retired = [self._previous.pop(version)[0] for version in idle]
+        for api in retired:
+            api.prolog_interface.stop()
+        return len(retired)
+
+    def watch(self, interval: float = 2.0) -> None:
+        """Check the KB file every `interval` seconds in a daemon thread."""
+        if self._watcher is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("Checking %s for changes failed", self.prolog_file_path)
+
+        self._watcher = threading.Thread(target=loop, name='kb-reload', daemon=True)
+        self._watcher.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Reload counters and the KB versions still serving sessions."""
+        with self._lock:
+            previous = [version[:12] for version in self._previous]
+        return {
+            "watching": self._watcher is not None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_reload_ms": self.last_reload_ms,
+            "previous_versions": previous,
+        }
+
+    def stop(self) -> None:
+        """Stop watching and stop the workers of every API."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._lock:
+            apis = [self.api] + [api for api, _ in self._previous.values()]
+            self._previous.clear()
+        for api in apis:
+            api.prolog_interface.stop()
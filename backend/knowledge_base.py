@@ -0,0 +1,126 @@
+"""
+Knowledge base snapshot for Inabel Pattern Identification.
+
+`inabel.ai.pl` stays the source of truth. Its `pattern/7` and
+`feature_question/2` facts are exported once from a `PrologProcess` (one
+`export_kb` round trip) or read back from a JSON snapshot of that export, and
+the Python-side engine and indexes are built from this view.
+
+The KB does not change while a process runs, so all static metadata (pattern
+names, features, question texts, pattern dicts) is served from this snapshot.
+Each snapshot carries a `version`: the SHA-256 of the `.pl` file it was
+exported from, so stale snapshots and derived caches can be detected.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents, used to version KB-derived caches."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class KnowledgeBase:
+    """Read-only view of the facts exported from `inabel.ai.pl`.
+
+    Patterns keep their KB order, which the Prolog predicates depend on
+    (candidate order, best match, feature order).
+    """
+
+    def __init__(
+        self,
+        patterns: List[Dict[str, Any]],
+        feature_questions: Dict[str, str],
+        version: str = '',
+    ) -> None:
+        self.patterns = patterns
+        self.feature_questions = feature_questions
+        self.version = version
+        self.pattern_names: List[str] = [p["name"] for p in patterns]
+
+        self.patterns_by_name: Dict[str, Dict[str, Any]] = {}
+        for pattern in patterns:
+            # Like pattern/7 lookups in Prolog, the first fact wins.
+            self.patterns_by_name.setdefault(pattern["name"], pattern)
+
+        self.features: List[str] = self._ordered_features()
+
+        # Mirror the `get_all_feature_questions` command: questions for the
+        # features that appear in some pattern, in `get_all_features/1` order.
+        self.all_feature_questions: Dict[str, str] = {
+            f: feature_questions[f] for f in self.features if f in feature_questions
+        }
+
+    def _ordered_features(self) -> List[str]:
+        """Mirror `get_all_features/1`, i.e. the `feature/1` facts.
+
+        `build_feature_index/0` asserts them once at load time with each
+        feature placed at its *last* occurrence in the pattern facts.
+        """
+        flat = [f for p in self.patterns for f in p.get("features", [])]
+        seen = set()
+        ordered = []
+        for feature in reversed(flat):
+            if feature not in seen:
+                seen.add(feature)
+                ordered.append(feature)
+        ordered.reverse()
+        return ordered
+
+    @classmethod
+    def from_export(cls, export: Dict[str, Any], version: str = '') -> "KnowledgeBase":
+        """Build from the reply of the `export_kb` command."""
+        feature_questions: Dict[str, str] = {}
+        for entry in export.get("questions", []):
+            feature_questions.setdefault(entry["feature"], entry["question"])
+        return cls(export.get("patterns", []), feature_questions, version)
+
+    @classmethod
+    def from_prolog(cls, prolog_interface: Any, version: str = '') -> "KnowledgeBase":
+        """Export the KB from a running `PrologProcess` (or pool)."""
+        return cls.from_export(prolog_interface.export_kb(), version)
+
+    @classmethod
+    def load(cls, path: str) -> "KnowledgeBase":
+        """Load a snapshot previously written by `save`."""
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(data["patterns"], data["feature_questions"], data.get("version", ''))
+
+    def save(self, path: str) -> None:
+        """Write a JSON snapshot of the KB to `path`."""
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "version": self.version,
+                    "patterns": self.patterns,
+                    "feature_questions": self.feature_questions,
+                },
+                fh,
+                ensure_ascii=False,
+            )
+
+
+if __name__ == '__main__':
+    # Export a KB snapshot: python knowledge_base.py [kb.pl] [snapshot.json]
+    from prolog_interface import PrologProcess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    kb_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, '..', 'inabel.ai.pl')
+    out_path = sys.argv[2] if len(sys.argv) > 2 else 'inabel_kb.json'
+
+    proc = PrologProcess(kb_path)
+    try:
+        kb = KnowledgeBase.from_prolog(proc, version=file_hash(kb_path))
+    finally:
+        proc.stop()
+    kb.save(out_path)
+    print(f"Exported {len(kb.patterns)} patterns and {len(kb.feature_questions)} questions to {out_path}")
@@ -0,0 +1,142 @@
+"""
+Latency metrics for Inabel Pattern Identification.
+
+Timing hooks in the Prolog bridge, the answer logic and the servers record
+durations into `Histogram`s held by a `MetricsRegistry`. Each histogram is
+identified by a metric name plus labels (e.g. the Prolog command and phase)
+and keeps cumulative bucket counts, a count and a sum, like a Prometheus
+histogram. `render()` produces the Prometheus text exposition format served
+at `GET /api/metrics`.
+
+The module-level `REGISTRY` is shared by everything in the process.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Upper bounds of the latency buckets, in seconds (+Inf is implicit).
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Help text for the metrics recorded by this package.
+METRIC_HELP = {
+    'inabel_prolog_command_seconds':
+        'Prolog command time by phase (serialize, write, wait, parse).',
+    'inabel_prolog_checkout_wait_seconds':
+        'Time spent waiting for a free Prolog worker.',
+    'inabel_engine_call_seconds':
+        'Engine calls made by the answer logic, by method.',
+    'inabel_answer_phase_seconds':
+        'answer_question time by phase.',
+    'inabel_answer_seconds':
+        'Total answer_question / answer_token time, by reply status.',
+    'inabel_http_request_seconds':
+        'HTTP request time by endpoint and status code.',
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Thread-safe cumulative latency histogram."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts (keyed by upper bound), count and sum."""
+        with self._lock:
+            cumulative, total = {}, 0
+            for bound, n in zip(self.buckets, self.counts):
+                total += n
+                cumulative[bound] = total
+            return {'buckets': cumulative, 'count': self.count, 'sum': self.sum}
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and labels."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Record one duration."""
+        self.histogram(name, **labels).observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Record the duration of the `with` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """{metric name: [{labels, buckets, count, sum}, ...]}."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), histogram in items:
+            result.setdefault(name, []).append(dict(histogram.snapshot(), labels=dict(labels)))
+        return result
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, series in self.snapshot().items():
+            lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for entry in series:
+                labels = entry['labels']
+                for bound, count in entry['buckets'].items():
+                    lines.append(f"{name}_bucket{_format_labels(labels, le=f'{bound:g}')} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {entry['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {entry['sum']:.9g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    pairs = dict(labels, **extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs.items()) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = MetricsRegistry()
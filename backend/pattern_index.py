@@ -0,0 +1,101 @@
+"""
+Bitset index over the Inabel pattern/feature matrix.
+
+Every pattern gets one bit (in KB order) and every feature maps to the
+integer bitmask of the patterns that have it. Candidate sets are plain ints,
+so filtering by a YES answer is an AND, a NO answer is an AND-NOT, and
+counting candidates is a popcount -- regardless of how many patterns the KB
+holds. The index is built once from a `KnowledgeBase` and shared by the
+unique-feature check, candidate filtering and next-question selection.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from knowledge_base import KnowledgeBase
+
+
+def popcount(mask: int) -> int:
+    """Number of set bits in `mask`."""
+    return mask.bit_count()
+
+
+class PatternIndex:
+    """Feature -> pattern bitmasks for a `KnowledgeBase`.
+
+    Pattern names are assumed to be unique in the KB.
+    """
+
+    def __init__(self, kb: KnowledgeBase) -> None:
+        self.pattern_names: List[str] = list(kb.pattern_names)
+        self.features: List[str] = list(kb.features)
+        self.bits: Dict[str, int] = {}
+        for i, name in enumerate(self.pattern_names):
+            self.bits.setdefault(name, 1 << i)
+        self.all_mask = (1 << len(self.pattern_names)) - 1
+
+        # A binary snapshot (binary_kb.py) carries the masks precomputed.
+        stored = getattr(kb, "feature_masks", None)
+        if stored is not None:
+            self.feature_masks: Dict[str, int] = dict(stored)
+            return
+        self.feature_masks = {f: 0 for f in self.features}
+        for name in self.pattern_names:
+            bit = self.bits[name]
+            for feature in kb.patterns_by_name[name].get("features", []):
+                self.feature_masks[feature] = self.feature_masks.get(feature, 0) | bit
+
+    def mask_of(self, pattern_names: Iterable[str]) -> int:
+        """Bitmask for a collection of pattern names (unknown names ignored)."""
+        mask = 0
+        for name in pattern_names:
+            mask |= self.bits.get(name, 0)
+        return mask
+
+    def names_of(self, mask: int) -> List[str]:
+        """Pattern names for a bitmask, in KB order."""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.pattern_names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def refine(self, mask: int, feature: str, answer: str) -> int:
+        """Narrow a candidate mask by one (feature, answer) pair.
+
+        Mirrors `pattern_matches/2`: a YES keeps patterns that have the
+        feature (none, if no pattern does), a NO drops them, and any other
+        answer is ignored.
+        """
+        if answer == "yes":
+            return mask & self.feature_masks.get(feature, 0)
+        if answer == "no":
+            return mask & ~self.feature_masks.get(feature, 0)
+        return mask
+
+    def filter_mask(self, responses: Iterable[tuple], mask: Optional[int] = None) -> int:
+        """Candidates (as a mask) consistent with all `responses`."""
+        if mask is None:
+            mask = self.all_mask
+        for feature, answer in responses:
+            mask = self.refine(mask, feature, answer)
+            if not mask:
+                break
+        return mask
+
+    def first_relevant_feature(self, mask: int, answered: Iterable[str]) -> Optional[str]:
+        """Mirror `get_next_question/3`: the first unanswered feature, in
+        `get_all_features/1` order, that any candidate in `mask` has."""
+        answered = set(answered)
+        for feature in self.features:
+            if feature not in answered and self.feature_masks[feature] & mask:
+                return feature
+        return None
+
+    def unique_features(self) -> Dict[str, str]:
+        """Features that appear in exactly one pattern -> that pattern's name."""
+        unique = {}
+        for feature, mask in self.feature_masks.items():
+            if popcount(mask) == 1:
+                unique[feature] = self.names_of(mask)[0]
+        return unique
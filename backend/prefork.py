@@ -0,0 +1,144 @@
+"""
+Pre-fork mode for the Flask server (`INABEL_PREFORK=N python server.py`).
+
+The parent process builds everything derived from the KB once: the KB
+snapshot, pattern index, unique features, the question tree for the
+configured selector, the `/api/patterns` body and the token codec. It then
+stops its Prolog worker, freezes the garbage collector's view of those objects and
+forks N server processes that accept connections on one shared listening
+socket. The children read the parent's objects through copy-on-write pages
+(and the memory-mapped binary KB through the page cache), so each extra
+process only adds its own Prolog workers, caches and request state.
+
+The parent does not serve requests; it restarts children that exit and
+stops them all on SIGINT/SIGTERM. Sessions must be visible to every
+process: use `INABEL_SESSION_DB` (SQLite) or `INABEL_SESSION_MODE=token`.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict
+
+from werkzeug.serving import make_server
+
+from kb_reload import KBReloader
+from metrics import REGISTRY
+
+logger = logging.getLogger('inabel.prefork')
+
+# Children that exit sooner than this after starting are restarted with a
+# delay, so a broken configuration does not fork in a tight loop.
+RESTART_BACKOFF = 1.0
+
+# Longest wait, in seconds, for the question tree before forking anyway
+# (INABEL_PREFORK_TREE_WAIT).
+DEFAULT_TREE_WAIT = 60.0
+
+
+def prepare(reloader: KBReloader, tree_wait: float = DEFAULT_TREE_WAIT) -> None:
+    """Build every shared structure in the parent and stop its Prolog pool.
+
+    Only the configured selector's question tree is built here, and only
+    for up to `tree_wait` seconds; a process that gets a session with a tree
+    that is not ready builds it itself, in the background, and uses live
+    question selection meanwhile.
+    """
+    api = reloader.api
+    if api.use_question_tree and api.wait_for_question_tree(timeout=tree_wait) is None:
+        logger.warning("Question tree not ready after %g s; forking without it", tree_wait)
+    api.get_patterns_catalogue()
+    for name in api.kb.pattern_names:
+        api._complete_result(name, 0, 'prefork')
+    api.prolog_interface.stop()
+    # Objects that exist now are never collected in the children, so the
+    # collector does not write to (and un-share) their pages.
+    gc.collect()
+    gc.freeze()
+
+
+def run_child(app: Any, reloader: KBReloader, listener: socket.socket,
+              prolog_workers: int, watch_interval: float) -> None:
+    """Serve requests in a forked process until it is told to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    REGISTRY.reset()  # /api/metrics reports this process only.
+    api = reloader.api
+    if api.engine is api.prolog_interface:
+        api.restart_workers(prolog_workers)
+    if watch_interval > 0:
+        reloader.watch(watch_interval)
+    server = make_server('0.0.0.0', 0, app, threaded=True, fd=listener.fileno())
+    logger.info("Server process %d ready", os.getpid())
+    server.serve_forever()
+
+
+def serve(app: Any, reloader: KBReloader, processes: int, host: str, port: int,
+          prolog_workers: int, watch_interval: float = 0.0,
+          tree_wait: float = DEFAULT_TREE_WAIT) -> None:
+    """Fork `processes` servers sharing the parent's KB and a listening socket."""
+    sessions = reloader.api.sessions
+    if reloader.api.token_codec is None and sessions.backend == 'memory':
+        raise ValueError(
+            "Pre-fork mode needs sessions shared by all processes: "
+            "set INABEL_SESSION_DB or INABEL_SESSION_MODE=token"
+        )
+    prepare(reloader, tree_wait)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_child(app, reloader, listener, prolog_workers, watch_interval)
+            except BaseException:
+                logger.exception("Server process %d failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(processes):
+        spawn()
+    logger.info("Forked %d server processes on port %d", processes, port)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        logger.warning("Server process %d exited (status %d); restarting", pid, status)
+        if time.monotonic() - started < RESTART_BACKOFF:
+            time.sleep(RESTART_BACKOFF)
+        spawn()
+    listener.close()
+    sys.exit(0)
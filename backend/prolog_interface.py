@@ -11,22 +11,239 @@ long-lived `swipl` subprocess that loads `inabel.ai.pl` and communicates
 using a JSON protocol over stdin/stdout.
 """
 
+import hashlib
+import itertools
 import json
+import logging
+import os
+import queue
 import subprocess
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple
 
+from answer_cache import DEFAULT_CACHE_SIZE, AnswerCache
+from binary_kb import FORMAT_VERSION as KB_FORMAT_VERSION
+from binary_kb import BinaryKnowledgeBase, is_binary_kb, load_snapshot, write_binary_kb
+from decision_tree import FORMAT_VERSION as TREE_FORMAT_VERSION
+from decision_tree import QuestionTree, response_key
+from inference_engine import PythonEngine
+from knowledge_base import KnowledgeBase, file_hash
+from metrics import REGISTRY
+from pattern_index import PatternIndex
+from question_selector import get_selector
+from session_store import MemorySessionStore, SessionStore
+from session_token import SessionTokenCodec
 
-class PrologProcess:
+logger = logging.getLogger(__name__)
+
+
+# Engine calls made by InabelAPI's answer logic: a generator that yields
+# (engine method name, args) and is sent back each call's result.
+EngineSteps = Generator[Tuple[str, tuple], Any, Any]
+
+
+class PrologCommands:
+    """Typed wrappers around the JSON commands understood by `inabel.ai.pl`.
+
+    Subclasses only need to implement `_send(payload) -> response`; this lets
+    a single process and a pool of processes expose the same interface. Each
+    command is a payload plus a function that parses the reply, joined by
+    `_call`, so an asynchronous transport can reuse the same wrappers by
+    overriding `_call` (see `async_prolog.py`).
+    """
+
+    def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _call(self, payload: Dict[str, Any], parse: Callable[[Dict[str, Any]], Any]) -> Any:
+        return parse(self._send(payload))
+
+    # Low-level protocol wrappers
+
+    def ping(self) -> bool:
+        try:
+            resp = self._send({"cmd": "ping"})
+        except RuntimeError:
+            return False
+        return resp.get("status") == "ok"
+
+    def get_all_pattern_names(self) -> List[str]:
+        return self._call(
+            {"cmd": "get_all_pattern_names"},
+            lambda resp: resp.get("names", []),
+        )
+
+    def get_all_features(self) -> List[str]:
+        return self._call(
+            {"cmd": "get_all_features"},
+            lambda resp: resp.get("features", []),
+        )
+
+    def get_feature_question(self, feature: str) -> Optional[str]:
+        return self._call(
+            {"cmd": "get_feature_question", "feature": feature},
+            lambda resp: resp.get("question"),
+        )
+
+    def get_all_feature_questions(self) -> Dict[str, str]:
+        # Prolog builds a dict under "features"
+        return self._call(
+            {"cmd": "get_all_feature_questions"},
+            lambda resp: resp.get("features", {}),
+        )
+
+    def identify_pattern(self, responses: List[tuple]) -> Optional[Dict[str, Any]]:
+        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
+        return self._call(
+            {"cmd": "identify_pattern", "responses": payload_responses},
+            lambda resp: resp.get("pattern") if resp.get("status") == "found" else None,
+        )
+
+    def get_next_question(self, responses: List[tuple], candidates: List[str]) -> Optional[str]:
+        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
+        return self._call(
+            {
+                "cmd": "get_next_question",
+                "responses": payload_responses,
+                "candidates": candidates,
+            },
+            lambda resp: resp.get("feature") if resp.get("status") == "ok" else None,
+        )
+
+    def filter_patterns(self, responses: List[tuple]) -> List[str]:
+        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
+        return self._call(
+            {"cmd": "filter_patterns", "responses": payload_responses},
+            lambda resp: resp.get("candidates", []),
+        )
+
+    def refine_candidates(self, candidates: List[str], feature: str, answer: str) -> List[str]:
+        """Narrow an existing candidate list by one new (feature, answer) pair."""
+        return self._call(
+            {
+                "cmd": "refine",
+                "candidates": candidates,
+                "feature": feature,
+                "answer": answer,
+            },
+            lambda resp: resp.get("candidates", []),
+        )
+
+    def get_pattern_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._call(
+            {"cmd": "get_pattern_by_name", "name": name},
+            lambda resp: resp.get("pattern") if resp.get("status") == "found" else None,
+        )
+
+    def batch(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run several independent commands in one round trip.
+
+        Returns one reply per command, in order.
+        """
+        return self._call(
+            {"cmd": "batch", "commands": commands},
+            lambda resp: resp.get("results", []),
+        )
+
+    # Batched helpers: one round trip each
+
+    def identify_patterns(self, response_sets: List[List[tuple]]) -> List[Optional[Dict[str, Any]]]:
+        """`identify_pattern` for several response sets in one round trip."""
+        commands = [
+            {
+                "cmd": "identify_pattern",
+                "responses": [{"feature": f, "answer": a} for (f, a) in responses],
+            }
+            for responses in response_sets
+        ]
+        return self._call(
+            {"cmd": "batch", "commands": commands},
+            lambda resp: [
+                r.get("pattern") if r.get("status") == "found" else None
+                for r in resp.get("results", [])
+            ],
+        )
+
+    def get_next_question_with_text(
+        self, responses: List[tuple], candidates: List[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Next feature to ask about together with its question text."""
+        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
+        return self._call(
+            {
+                "cmd": "get_next_question",
+                "responses": payload_responses,
+                "candidates": candidates,
+            },
+            lambda resp: (resp.get("feature"), resp.get("question"))
+            if resp.get("status") == "ok" else (None, None),
+        )
+
+    def get_all_patterns(self) -> List[Dict[str, Any]]:
+        """Every pattern dict, in KB order, in one round trip."""
+        return self._call(
+            {"cmd": "get_all_patterns"},
+            lambda resp: resp.get("patterns", []),
+        )
+
+    def export_kb(self) -> Dict[str, Any]:
+        """Export all pattern/7 and feature_question/2 facts in one call."""
+        return self._call(
+            {"cmd": "export_kb"},
+            lambda resp: {
+                "patterns": resp.get("patterns", []),
+                "questions": resp.get("questions", []),
+            },
+        )
+
+
+def compile_kb(prolog_file_path: str) -> str:
+    """Precompile the KB to a `.qlf` file with `qcompile/1` and return its path.
+
+    Workers started from the `.qlf` skip parsing and compiling the source.
+    An existing `.qlf` is reused while it is newer than the source; if
+    compiling fails (e.g. a read-only directory) the source path is returned.
+    """
+    qlf_path = os.path.splitext(prolog_file_path)[0] + '.qlf'
+    try:
+        if os.path.getmtime(qlf_path) >= os.path.getmtime(prolog_file_path):
+            return qlf_path
+    except OSError:
+        pass
+    quoted = prolog_file_path.replace('\\', '\\\\').replace("'", "\\'")
+    result = subprocess.run(
+        ["swipl", "-q", "-g", f"qcompile('{quoted}')", "-t", "halt"],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0 or not os.path.exists(qlf_path):
+        return prolog_file_path
+    return qlf_path
+
+
+class PrologProcess(PrologCommands):
     """Manage a long-lived SWI-Prolog process speaking a JSON protocol.
 
     The Prolog side (in `inabel.ai.pl`) must define `main_json_loop/0` that:
       * reads one JSON line from stdin
       * handles the command
-      * writes a single-line JSON response to stdout
+      * writes a single-line JSON response to stdout, echoing the request's
+        "id" field so replies can be matched to requests
+
+    A single process has one stdin/stdout pipe, so `_send` holds a lock for
+    the whole request/response exchange. Use `PrologProcessPool` to serve
+    several requests concurrently.
     """
 
     def __init__(self, prolog_file_path: str = '../inabel.ai.pl') -> None:
         self.prolog_file_path = prolog_file_path
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self.started = time.perf_counter()
         self.proc = subprocess.Popen(
             [
                 "swipl",
@@ -44,105 +261,71 @@ class PrologProcess:
 
     def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Send a JSON command and wait for a JSON response."""
+        with self._lock:
+            return self._exchange(payload)
+
+    def _exchange(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         if not self.proc or self.proc.stdin is None or self.proc.stdout is None:
             raise RuntimeError("Prolog process is not running")
 
-        line = json.dumps(payload, ensure_ascii=False)
+        # One compact JSON object per line in both directions. The request id
+        # is echoed back by `main_json_loop/0` so replies can be matched.
+        # Each phase of the exchange is timed per command (see metrics.py).
+        cmd = str(payload.get("cmd"))
+        started = time.perf_counter()
+        request_id = next(self._request_ids)
+        line = json.dumps(dict(payload, id=request_id), ensure_ascii=False, separators=(",", ":"))
+        serialized = time.perf_counter()
         self.proc.stdin.write(line + "\n")
         self.proc.stdin.flush()
-        # Prolog's json_write_dict pretty-prints JSON across multiple lines,
-        # so we need to read until we have a complete JSON object.
-        buffer = ""
-        brace_depth = 0
+        written = time.perf_counter()
+        REGISTRY.observe('inabel_prolog_command_seconds', serialized - started, cmd=cmd, phase='serialize')
+        REGISTRY.observe('inabel_prolog_command_seconds', written - serialized, cmd=cmd, phase='write')
 
         while True:
             response_line = self.proc.stdout.readline()
+            received = time.perf_counter()
             if not response_line:
                 # Process ended or no output; surface stderr for debugging
+                self.proc.wait()
                 stderr = self.proc.stderr.read() if self.proc.stderr else ""
                 raise RuntimeError(
                     f"Prolog process terminated unexpectedly or returned no JSON. Stderr: {stderr}"
                 )
 
-            # Accumulate raw text; don't strip internal whitespace
-            buffer += response_line
-
-            # Track curly brace depth to detect end of JSON object
-            for ch in response_line:
-                if ch == "{":
-                    brace_depth += 1
-                elif ch == "}":
-                    brace_depth -= 1
-
-            # Once we've closed all opened braces, try to parse the buffer
-            if brace_depth <= 0 and buffer.strip():
-                try:
-                    parsed = json.loads(buffer)
-                except json.JSONDecodeError:
-                    # If parsing fails, reset and keep listening; also surface
-                    # stderr to aid debugging rather than hanging forever.
-                    stderr = self.proc.stderr.read() if self.proc.stderr else ""
-                    raise RuntimeError(
-                        "Failed to parse JSON from Prolog. "
-                        f"Buffer was: {buffer!r}. Stderr: {stderr}"
-                    )
-
-                if isinstance(parsed, dict):
-                    return parsed
-                else:
-                    raise RuntimeError(
-                        f"Unexpected JSON type from Prolog (expected object): {type(parsed)}"
-                    )
-
-    # Low-level protocol wrappers
-
-    def get_all_pattern_names(self) -> List[str]:
-        resp = self._send({"cmd": "get_all_pattern_names"})
-        return resp.get("names", [])
-
-    def get_all_features(self) -> List[str]:
-        resp = self._send({"cmd": "get_all_features"})
-        return resp.get("features", [])
+            try:
+                parsed = json.loads(response_line)
+            except json.JSONDecodeError:
+                raise RuntimeError(
+                    f"Failed to parse JSON from Prolog. Line was: {response_line!r}"
+                )
 
-    def get_feature_question(self, feature: str) -> Optional[str]:
-        resp = self._send({"cmd": "get_feature_question", "feature": feature})
-        return resp.get("question")
+            if not isinstance(parsed, dict):
+                raise RuntimeError(
+                    f"Unexpected JSON type from Prolog (expected object): {type(parsed)}"
+                )
 
-    def get_all_feature_questions(self) -> Dict[str, str]:
-        resp = self._send({"cmd": "get_all_feature_questions"})
-        # Prolog builds a dict under "features"
-        return resp.get("features", {})
+            reply_id = parsed.pop("id", None)
+            if reply_id is None or reply_id == request_id:
+                REGISTRY.observe('inabel_prolog_command_seconds', received - written, cmd=cmd, phase='wait')
+                REGISTRY.observe('inabel_prolog_command_seconds', time.perf_counter() - received,
+                                 cmd=cmd, phase='parse')
+                return parsed
+            # Otherwise this is a stale reply to an earlier request whose
+            # caller gave up (e.g. after an exception); skip it.
 
-    def identify_pattern(self, responses: List[tuple]) -> Optional[Dict[str, Any]]:
-        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
-        resp = self._send({"cmd": "identify_pattern", "responses": payload_responses})
-        if resp.get("status") == "found":
-            return resp.get("pattern")
-        return None
+    def warm_up(self) -> float:
+        """Wait until the KB is loaded and answering.
 
-    def get_next_question(self, responses: List[tuple], candidates: List[str]) -> Optional[str]:
-        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
-        resp = self._send(
-            {
-                "cmd": "get_next_question",
-                "responses": payload_responses,
-                "candidates": candidates,
-            }
-        )
-        if resp.get("status") == "ok":
-            return resp.get("feature")
-        return None
-
-    def filter_patterns(self, responses: List[tuple]) -> List[str]:
-        payload_responses = [{"feature": f, "answer": a} for (f, a) in responses]
-        resp = self._send({"cmd": "filter_patterns", "responses": payload_responses})
-        return resp.get("candidates", [])
+        Returns the seconds since the process was spawned.
+        """
+        if not self.ping():
+            raise RuntimeError("Prolog worker did not start; is swipl installed and the KB valid?")
+        return time.perf_counter() - self.started
 
-    def get_pattern_by_name(self, name: str) -> Optional[Dict[str, Any]]:
-        resp = self._send({"cmd": "get_pattern_by_name", "name": name})
-        if resp.get("status") == "found":
-            return resp.get("pattern")
-        return None
+    def is_alive(self) -> bool:
+        """Return True while the underlying `swipl` process is running."""
+        return self.proc is not None and self.proc.poll() is None
 
     def stop(self) -> None:
         if self.proc and self.proc.poll() is None:
@@ -154,6 +337,237 @@ class PrologProcess:
         self.proc = None
 
 
+class PrologProcessPool(PrologCommands):
+    """A fixed-size pool of `PrologProcess` workers.
+
+    Each command checks a worker out for the duration of one request/response
+    exchange, so concurrent Flask request threads never share a pipe. Workers
+    that have died are replaced on checkout and check-in, and a command that
+    fails because its worker died is retried once on a fresh worker.
+
+    All workers are spawned at once and warmed up (KB loaded and answering)
+    before the pool is returned. With `spare=True` one extra warmed worker
+    is kept in reserve, so replacing a dead worker does not wait for `swipl`
+    to start; a new spare is prepared in the background after each swap.
+    With `health_check_interval` > 0 a background thread runs `health_check`
+    that often, so hung workers are found without a request waiting on them.
+    A `lazy` pool spawns nothing until `start()` or its first command.
+    """
+
+    def __init__(
+        self,
+        prolog_file_path: str = '../inabel.ai.pl',
+        size: int = 1,
+        checkout_timeout: Optional[float] = None,
+        spare: bool = False,
+        health_check_interval: float = 0.0,
+        lazy: bool = False,
+    ) -> None:
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.prolog_file_path = prolog_file_path
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self._idle: "queue.Queue[PrologProcess]" = queue.Queue()
+        self._workers: List[PrologProcess] = []
+        self._stats_lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._replaced = 0
+        self._spares_used = 0
+        self.spare = spare
+        self._spare: Optional[PrologProcess] = None
+        self._spare_pending = False
+        self._stopped = False
+        self._stop_event = threading.Event()
+        self.health_check_interval = health_check_interval
+        self._start_lock = threading.Lock()
+        self.started = False
+        self.startup_ms = 0.0
+        if not lazy:
+            self.start()
+
+    def start(self) -> None:
+        """Spawn and warm up the workers (once; a no-op after `stop`)."""
+        with self._start_lock:
+            if self.started or self._stopped:
+                return
+            # Spawn every worker first so they load the KB in parallel.
+            for _ in range(self.size):
+                self._workers.append(PrologProcess(self.prolog_file_path))
+            self.startup_ms = max(w.warm_up() for w in self._workers) * 1000.0
+            for worker in self._workers:
+                self._idle.put(worker)
+            self.started = True
+        if self.spare:
+            self._prepare_spare()
+        if self.health_check_interval > 0:
+            threading.Thread(
+                target=self._check_health_periodically, name="prolog-health", daemon=True
+            ).start()
+
+    def _prepare_spare(self) -> None:
+        """Start and warm a spare worker in the background (if none is pending)."""
+        with self._stats_lock:
+            if self._stopped or self._spare_pending or self._spare is not None:
+                return
+            self._spare_pending = True
+
+        def prepare() -> None:
+            worker = None
+            try:
+                worker = PrologProcess(self.prolog_file_path)
+                worker.warm_up()
+            except Exception:
+                if worker is not None:
+                    worker.stop()
+                worker = None  # Retried on the next replacement.
+            with self._stats_lock:
+                self._spare_pending = False
+                if worker is not None and not self._stopped:
+                    self._spare, worker = worker, None
+            if worker is not None:
+                worker.stop()
+
+        threading.Thread(target=prepare, name="prolog-spare", daemon=True).start()
+
+    def _replace(self, worker: PrologProcess) -> PrologProcess:
+        """Swap a dead worker for the warmed spare, or a freshly spawned one."""
+        try:
+            worker.stop()
+        except Exception:
+            pass
+        with self._stats_lock:
+            fresh, self._spare = self._spare, None
+        if fresh is not None and fresh.is_alive():
+            with self._stats_lock:
+                self._spares_used += 1
+        else:
+            fresh = PrologProcess(self.prolog_file_path)
+        if self.spare:
+            self._prepare_spare()
+        with self._stats_lock:
+            self._replaced += 1
+            self._workers = [fresh if w is worker else w for w in self._workers]
+        return fresh
+
+    @contextmanager
+    def checkout(self) -> Iterator[PrologProcess]:
+        """Borrow a live worker, returning it to the pool afterwards."""
+        if self._stopped:
+            raise RuntimeError("Prolog process pool has been stopped")
+        if not self.started:
+            self.start()
+        started = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise RuntimeError("Timed out waiting for a free Prolog worker")
+        waited = time.perf_counter() - started
+        REGISTRY.observe('inabel_prolog_checkout_wait_seconds', waited)
+        with self._stats_lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            if not worker.is_alive():
+                worker = self._replace(worker)
+            yield worker
+        finally:
+            if not worker.is_alive():
+                worker = self._replace(worker)
+            self._idle.put(worker)
+
+    def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with self.checkout() as worker:
+            try:
+                return worker._send(payload)
+            except RuntimeError:
+                if worker.is_alive():
+                    raise
+        # The worker died mid-command and has been replaced on check-in.
+        with self.checkout() as worker:
+            return worker._send(payload)
+
+    def health_check(self, timeout: float = 2.0) -> int:
+        """Ping every idle worker, replacing any that do not answer.
+
+        A worker that is still running but does not reply within `timeout`
+        seconds is killed and replaced too. Returns the number of workers
+        that had to be replaced.
+        """
+        if self._stopped:
+            return 0
+        replaced = 0
+        for _ in range(self._idle.qsize()):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if not self._answers_ping(worker, timeout):
+                    worker = self._replace(worker)
+                    replaced += 1
+            finally:
+                self._idle.put(worker)
+        return replaced
+
+    def _check_health_periodically(self) -> None:
+        while not self._stop_event.wait(self.health_check_interval):
+            try:
+                replaced = self.health_check()
+            except Exception:
+                logger.exception("Prolog worker health check failed")
+                continue
+            if replaced:
+                logger.warning("Replaced %d unresponsive Prolog worker(s)", replaced)
+
+    @staticmethod
+    def _answers_ping(worker: PrologProcess, timeout: float) -> bool:
+        if not worker.is_alive():
+            return False
+        # A hung worker would block the read forever; killing it ends the
+        # read, and ping() then reports False.
+        timer = threading.Timer(timeout, worker.proc.kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            return worker.ping()
+        finally:
+            timer.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and queue-wait metrics."""
+        with self._stats_lock:
+            checkouts = self._checkouts
+            return {
+                "size": self.size,
+                "started": self.started,
+                "idle": self._idle.qsize(),
+                "in_use": self.size - self._idle.qsize() if self.started else 0,
+                "checkouts": checkouts,
+                "replaced": self._replaced,
+                "spare_ready": self._spare is not None,
+                "spares_used": self._spares_used,
+                "startup_ms": self.startup_ms,
+                "wait_avg_ms": (self._wait_total / checkouts * 1000.0) if checkouts else 0.0,
+                "wait_max_ms": self._wait_max * 1000.0,
+            }
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        with self._stats_lock:
+            self._stopped = True
+            workers = list(self._workers)
+            if self._spare is not None:
+                workers.append(self._spare)
+                self._spare = None
+        for worker in workers:
+            worker.stop()
+
+
 class InabelAPI:
     """REST API wrapper for the Prolog interface.
 
@@ -167,77 +581,221 @@ class InabelAPI:
     # when using shared features. Unique features can bypass this.
     MIN_CONFIDENCE_QUESTIONS = 3
 
-    def __init__(self, prolog_file_path: str = '../inabel.ai.pl') -> None:
-        # Instantiate the underlying Prolog process with the given KB path.
-        self.prolog_interface = PrologProcess(prolog_file_path)
-        # Simple in-memory session store: session_id -> {responses, candidates}
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+    # Response sets per Prolog `batch` command in identify_batch.
+    IDENTIFY_CHUNK = 500
+
+    def __init__(
+        self,
+        prolog_file_path: str = '../inabel.ai.pl',
+        workers: int = 1,
+        engine: str = 'prolog',
+        kb_snapshot: Optional[str] = None,
+        selector: str = 'first',
+        question_tree: bool = True,
+        cache_dir: Optional[str] = None,
+        session_store: Optional[SessionStore] = None,
+        session_secret: Optional[bytes] = None,
+        precompiled: bool = False,
+        spare_worker: bool = False,
+        answer_cache_size: int = DEFAULT_CACHE_SIZE,
+        kb_cache: bool = True,
+        health_check_interval: float = 0.0,
+    ) -> None:
+        # Milliseconds from construction to the end of each start-up phase,
+        # reported by the servers.
+        started = time.perf_counter()
+        self.startup_timings: Dict[str, float] = {}
+
+        def mark(phase: str) -> None:
+            self.startup_timings[phase] = (time.perf_counter() - started) * 1000.0
+
+        if engine not in ('prolog', 'python'):
+            raise ValueError(f"Unknown engine: {engine!r}")
+
+        # Pool of Prolog processes for the given KB path, so that concurrent
+        # requests never share a stdin/stdout pipe. Workers can load a
+        # precompiled .qlf of the KB instead of consulting the source, keep a
+        # warmed spare for fast crash recovery, and be pinged every
+        # `health_check_interval` seconds in the background. Only the Prolog
+        # engine needs the workers; with the Python engine the pool stays
+        # unstarted.
+        self.prolog_load_path = compile_kb(prolog_file_path) if precompiled else prolog_file_path
+        mark('compile_ms')
+        self.health_check_interval = health_check_interval
+        self.prolog_interface = PrologProcessPool(
+            self.prolog_load_path, size=workers, spare=spare_worker,
+            health_check_interval=health_check_interval, lazy=True,
+        )
+        if engine == 'prolog':
+            self.prolog_interface.start()
+        mark('workers_ms')
+
+        # Export the KB facts once (or load a snapshot of them) and index the
+        # pattern/feature matrix as bitmasks. The snapshot serves all static
+        # metadata and is versioned by the KB file's content hash; a snapshot
+        # file exported from a different KB version is ignored. The index is
+        # shared by the unique-feature check and, with the Python engine, by
+        # candidate filtering and next-question selection.
+        # Without an explicit snapshot, a binary one (see binary_kb.py) is
+        # kept in the cache dir and memory-mapped by the next start-up.
+        kb_version = file_hash(prolog_file_path)
+        self.kb_name = os.path.splitext(os.path.basename(prolog_file_path))[0]
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.dirname(os.path.abspath(prolog_file_path)), '.inabel_cache'
+        )
+        cached_kb = None
+        if kb_cache and not kb_snapshot:
+            cached_kb = self._cache_path('kb', KB_FORMAT_VERSION, kb_version, 'bin')
+        self.kb = load_snapshot(kb_snapshot) if kb_snapshot else None
+        if cached_kb and is_binary_kb(cached_kb):
+            try:
+                self.kb = BinaryKnowledgeBase(cached_kb)
+            except (OSError, ValueError):
+                self.kb = None
+        if self.kb is None or self.kb.version != kb_version:
+            self.kb = self._export_kb(kb_version)
+            if cached_kb:
+                try:
+                    write_binary_kb(self.kb, cached_kb)
+                except OSError:
+                    pass  # A read-only cache dir only costs an export next time.
+        self.index = PatternIndex(self.kb)
+        mark('kb_ms')
+
+        # The engine answers the identification queries. "prolog" sends every
+        # query over the pipe; "python" mirrors the same logic in-process.
+        if engine == 'python':
+            self.engine: Any = PythonEngine(self.kb, self.index)
+        else:
+            self.engine = self.prolog_interface
+
+        # Default next-question strategy; sessions may pick their own.
+        get_selector(selector)
+        self.default_selector = selector
+
+        # Candidates and next question per canonical response set, shared by
+        # every session that gives the same answers (see answer_cache.py).
+        self.answer_cache = AnswerCache(answer_cache_size)
+
+        # Pre-serialized /api/patterns body (see get_patterns_catalogue)
+        self._catalogue_cache: Optional[Tuple[bytes, str]] = None
+
+        # "complete" replies, one per pattern, so that finishing a session
+        # never has to ask the engine for the pattern's details. Filled on
+        # first use, so a memory-mapped KB only decodes the patterns found.
+        self._complete_results: Dict[str, Dict[str, Any]] = {}
+
+        # Session store (TTL + LRU bounded; in-memory unless a shared store
+        # is passed in):
+        # session_id -> {responses, answered, candidates, selector, kb_version}
+        # `candidates` is narrowed incrementally by each new answer; it is
+        # None while the session follows the precomputed question tree.
+        if session_store is None:
+            session_store = MemorySessionStore()
+        self.sessions: SessionStore = session_store
+
+        # Stateless mode (optional): sessions travel as HMAC-signed tokens
+        # over the KB's feature list, so no server keeps per-session state.
+        # Tokens expire after the session store's TTL, like stored sessions.
+        self.token_codec: Optional[SessionTokenCodec] = None
+        if session_secret:
+            self.token_codec = SessionTokenCodec(
+                session_secret, self.index.features, self.kb.version, ttl=self.sessions.ttl
+            )
         
         # Dynamically compute unique features from the Prolog knowledge base.
         # A unique feature is one that appears in exactly ONE pattern.
         # This decouples Python from hardcoded pattern data.
         self.unique_features = self._compute_unique_features()
+
+        # Precomputed question policies (one per selector), cached on disk and
+        # keyed by the KB version so that a changed KB rebuilds them. Trees
+        # are loaded or built in the background; until a selector's tree is
+        # ready its sessions use live selection, which gives the same replies.
+        self.use_question_tree = question_tree
+        self.question_trees: Dict[str, QuestionTree] = {}
+        self._tree_builds: Dict[str, Tuple[int, threading.Thread]] = {}
+        self._tree_lock = threading.Lock()
+        if question_tree:
+            self._start_tree_build(selector)
+        mark('total_ms')
     
+    def _cache_path(self, kind: str, format_version: int, kb_version: str, ext: str) -> str:
+        """Cache file for `kind`, named after the KB file, the cache format
+        and the KB content hash, e.g. `inabel.ai-kb-v1-3f2a9c0d1e4b5a6f.bin`.
+
+        Different KB files, KB versions and formats never share a file; the
+        loaders still check the full hash stored inside.
+        """
+        name = f"{self.kb_name}-{kind}-v{format_version}-{kb_version[:16]}.{ext}"
+        return os.path.join(self.cache_dir, name)
+
+    def _export_kb(self, kb_version: str) -> KnowledgeBase:
+        """Export the KB from the running pool, or from one short-lived
+        worker when the pool is not started (Python engine)."""
+        if self.prolog_interface.started:
+            return KnowledgeBase.from_prolog(self.prolog_interface, version=kb_version)
+        worker = PrologProcess(self.prolog_load_path)
+        try:
+            return KnowledgeBase.from_prolog(worker, version=kb_version)
+        finally:
+            worker.stop()
+
+    def restart_workers(self, workers: int) -> None:
+        """Replace the Prolog pool with `workers` freshly started processes.
+
+        A pipe to `swipl` cannot be shared between processes, so a pre-forked
+        server worker (see prefork.py) starts its own pool after the
+        parent has stopped the one it exported the KB with.
+        """
+        old_pool = self.prolog_interface
+        self.prolog_interface = PrologProcessPool(
+            self.prolog_load_path, size=workers, spare=old_pool.spare,
+            health_check_interval=self.health_check_interval, lazy=not old_pool.started,
+        )
+        if self.engine is old_pool:
+            self.engine = self.prolog_interface
+        old_pool.stop()
+
     def _compute_unique_features(self) -> Dict[str, str]:
         """
-        Analyze the Prolog KB to find features that uniquely identify a pattern.
+        Find features that uniquely identify a pattern in the Prolog KB.
         
         Returns:
             Dict mapping feature -> pattern_name for features that appear in only one pattern
         """
-        # Get all patterns with their features
-        patterns = self.get_all_patterns()
-        
-        # Count how many patterns have each feature
-        feature_count: Dict[str, List[str]] = {}  # feature -> list of pattern names
-        
-        for pattern in patterns:
-            pattern_name = pattern.get('name', '')
-            features = pattern.get('features', [])
-            
-            for feature in features:
-                if feature not in feature_count:
-                    feature_count[feature] = []
-                feature_count[feature].append(pattern_name)
-        
-        # Find features that appear in exactly one pattern
-        unique_features = {}
-        for feature, pattern_names in feature_count.items():
-            if len(pattern_names) == 1:
-                unique_features[feature] = pattern_names[0]
-        
-        return unique_features
+        return self.index.unique_features()
 
 
-    def start_session(self, session_id: str) -> Dict[str, Any]:
-        """Start a new identification session."""
-        self.sessions[session_id] = {
+    def start_session(self, session_id: str, selector: Optional[str] = None) -> Dict[str, Any]:
+        """Start a new identification session.
+
+        `selector` names the next-question strategy for this session (see
+        `question_selector.SELECTORS`); it defaults to the API-wide selector.
+        """
+        selector = selector or self.default_selector
+        get_selector(selector)
+        # Pattern names and question texts come from the KB snapshot.
+        feature_questions = self.kb.all_feature_questions
+        self.sessions.save(session_id, {
             "responses": [],
-            "candidates": self.prolog_interface.get_all_pattern_names(),
-        }
+            "answered": set(),
+            "candidates": list(self.kb.pattern_names),
+            "selector": selector,
+            "kb_version": self.kb.version,
+        })
 
         # Instead of asking Prolog for the very first feature (which may return
         # None depending on KB logic), just pick a stable starting feature
-        # from the complete feature list and ask Prolog only for the question
-        # text.
-        feature_questions = self.prolog_interface.get_all_feature_questions()
-
-        if feature_questions:
-            # Choose the first key in sorted order so it's deterministic.
-            # You can change this list/ordering to whatever “good first question”
-            # you prefer (e.g., "geometric").
-            all_features_sorted = sorted(feature_questions.keys())
-            next_feature = all_features_sorted[0]
-            question = feature_questions.get(next_feature)
-        else:
-            next_feature = None
-            question = None
+        # from the complete feature list and use the question text we have.
+        next_feature = self._opening_feature(selector, feature_questions)
+        question = feature_questions.get(next_feature) if next_feature else None
 
         return {
             "session_id": session_id,
             "question": question,
             "feature": next_feature,
-            "total_patterns": len(self.sessions[session_id]["candidates"]),
+            "total_patterns": len(self.kb.pattern_names),
         }
 
     
@@ -258,33 +816,178 @@ class InabelAPI:
         Returns:
             Dictionary with next question or final result
         """
-        if session_id not in self.sessions:
+        started = time.perf_counter()
+        result = self._drive(self._answer_question_steps(session_id, feature, answer))
+        self._observe_answer(started, result, 'session')
+        return result
+
+    def answer_loaded_session(
+        self, session_id: str, session: Optional[Dict[str, Any]], feature: str, answer: str
+    ) -> Dict[str, Any]:
+        """`answer_question` for a session the caller already read from
+        `sessions` (None if it was not found), so that routing on it (see
+        kb_reload.KBReloader) does not read the store twice."""
+        started = time.perf_counter()
+        result = self._drive(self._answer_session_steps(session, feature, answer))
+        self._store_session(session_id, session, result)
+        self._observe_answer(started, result, 'session')
+        return result
+
+    def _answer_question_steps(self, session_id: str, feature: str, answer: str) -> EngineSteps:
+        session = self._load_session(session_id)
+        result = yield from self._answer_session_steps(session, feature, answer)
+        self._store_session(session_id, session, result)
+        return result
+
+    # Session store access is kept out of the engine steps, so that
+    # `AsyncInabelAPI` can run it off the event loop.
+
+    def _load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with REGISTRY.timer('inabel_answer_phase_seconds', phase='session_load'):
+            return self.sessions.get(session_id)
+
+    def _answer_session_steps(
+        self, session: Optional[Dict[str, Any]], feature: str, answer: str
+    ) -> EngineSteps:
+        if session is None:
             return {'error': 'Invalid session ID'}
-        
-        session = self.sessions[session_id]
+        if session.get('kb_version') not in (None, self.kb.version):
+            # Started on another KB; see kb_reload.KBReloader for routing.
+            return {'error': 'Session belongs to another knowledge base version'}
+        return (yield from self._advance_steps(session, feature, answer))
+
+    def _store_session(
+        self, session_id: str, session: Optional[Dict[str, Any]], result: Dict[str, Any]
+    ) -> None:
+        """Keep a session that continues; drop one that has finished."""
+        if 'status' not in result:
+            return  # Rejected before the session was touched.
+        with REGISTRY.timer('inabel_answer_phase_seconds', phase='session_save'):
+            if result['status'] == 'continue':
+                self.sessions.save(session_id, session)
+            else:
+                self.sessions.delete(session_id)  # Clean up session
+
+    def start_token_session(self, selector: Optional[str] = None) -> Dict[str, Any]:
+        """Start a stateless session: like `start_session`, but the state is
+        returned to the client as a signed `token` instead of being stored."""
+        codec = self._token_codec()
+        selector = selector or self.default_selector
+        get_selector(selector)
+        feature_questions = self.kb.all_feature_questions
+        next_feature = self._opening_feature(selector, feature_questions)
+        return {
+            "token": codec.encode(selector, []),
+            "question": feature_questions.get(next_feature) if next_feature else None,
+            "feature": next_feature,
+            "total_patterns": len(self.kb.pattern_names),
+        }
+
+    def answer_token(self, token: str, feature: str, answer: str) -> Dict[str, Any]:
+        """`answer_question` for a stateless session token.
+
+        The session is rebuilt from the token; a "continue" reply carries the
+        updated token for the next answer.
+        """
+        started = time.perf_counter()
+        result = self._drive(self._answer_token_steps(token, feature, answer))
+        self._observe_answer(started, result, 'token')
+        return result
+
+    def _answer_token_steps(self, token: str, feature: str, answer: str) -> EngineSteps:
+        codec = self._token_codec()
+        decoded = codec.decode(token)
+        if decoded is None:
+            return {'error': 'Invalid session token'}
+        if not codec.can_encode(feature, answer):
+            return {'error': 'Unknown feature or answer'}
+
+        selector, responses = decoded
+        session = {
+            "responses": responses,
+            "answered": {f for f, _ in responses},
+            "candidates": None,
+            "selector": selector,
+        }
+        result = yield from self._advance_steps(session, feature, answer)
+        if result['status'] == 'continue':
+            result['token'] = codec.encode(selector, session['responses'])
+        return result
+
+    def _token_codec(self) -> SessionTokenCodec:
+        if self.token_codec is None:
+            raise RuntimeError("Session tokens need a session_secret")
+        return self.token_codec
+
+    # The answer logic below is written as EngineSteps generators, so the
+    # same code runs against the synchronous engines here and against the
+    # asyncio Prolog pool in `async_prolog.AsyncInabelAPI`.
+
+    def _drive(self, steps: EngineSteps) -> Any:
+        """Run engine steps to completion against `self.engine`."""
+        try:
+            method, args = next(steps)
+            while True:
+                with REGISTRY.timer('inabel_engine_call_seconds', method=method):
+                    result = getattr(self.engine, method)(*args)
+                method, args = steps.send(result)
+        except StopIteration as done:
+            return done.value
+
+    @staticmethod
+    def _observe_answer(started: float, result: Dict[str, Any], mode: str) -> None:
+        """Record the total time of one answer, labelled by its outcome."""
+        REGISTRY.observe(
+            'inabel_answer_seconds', time.perf_counter() - started,
+            mode=mode, status=result.get('status', 'error'),
+        )
+
+    def _advance_steps(
+        self, session: Dict[str, Any], feature: str, answer: str
+    ) -> EngineSteps:
+        """Apply one answer to `session` in place and decide the next step."""
         session['responses'].append((feature, answer))
+        session['answered'].add(feature)
         
         questions_asked = len(session['responses'])
+
+        # Common case: the answer set is on the precomputed question path.
+        with REGISTRY.timer('inabel_answer_phase_seconds', phase='tree_lookup'):
+            tree = self._question_tree(session['selector'])
+            outcome = tree.lookup(session['responses']) if tree else None
+        if outcome is not None:
+            session['candidates'] = None
+            return self._tree_result(outcome, questions_asked)
         
         # Check if user said "yes" to a unique feature - immediate identification!
         if answer == 'yes' and feature in self.unique_features:
-            pattern_name = self.unique_features[feature]
-            pattern = self.prolog_interface.get_pattern_by_name(pattern_name)
-            del self.sessions[session_id]  # Clean up session
-            return {
-                'status': 'complete',
-                'pattern': pattern,
-                'questions_asked': questions_asked,
-                'identification_method': 'unique_feature',
-                'unique_feature': feature
-            }
+            return self._complete_result(
+                self.unique_features[feature], questions_asked, 'unique_feature',
+                unique_feature=feature,
+            )
         
-        # Filter candidates using Prolog (uses both YES and NO answers)
-        session['candidates'] = self.prolog_interface.filter_patterns(session['responses'])
+        # Candidates and the next question depend only on the set of
+        # answers, so sessions with the same answers share cached results.
+        key = response_key(session['responses'])
+        candidates = self.answer_cache.get(('candidates', key))
+        if candidates is None:
+            if session['candidates'] is None:
+                # Left the precomputed path: recover the candidates from the
+                # earlier answers with the local index.
+                session['candidates'] = self.index.names_of(
+                    self.index.filter_mask(session['responses'][:-1])
+                )
+
+            # Narrow the previous candidates by the new answer only (uses both
+            # YES and NO answers)
+            candidates = yield (
+                'refine_candidates', (session['candidates'], feature, answer)
+            )
+            self.answer_cache.put(('candidates', key), candidates)
+        session['candidates'] = candidates
         
         # Check if no patterns match
         if len(session['candidates']) == 0:
-            del self.sessions[session_id]  # Clean up session
             return {
                 'status': 'not_found',
                 'message': 'Could not identify the pattern based on your responses.',
@@ -293,33 +996,29 @@ class InabelAPI:
         
         # For shared features: require minimum questions before concluding
         if len(session['candidates']) == 1 and questions_asked >= self.MIN_CONFIDENCE_QUESTIONS:
-            pattern = self.prolog_interface.get_pattern_by_name(session['candidates'][0])
-            del self.sessions[session_id]  # Clean up session
-            return {
-                'status': 'complete',
-                'pattern': pattern,
-                'questions_asked': questions_asked,
-                'identification_method': 'elimination'
-            }
+            return self._complete_result(session['candidates'][0], questions_asked, 'elimination')
         
-        # Need more questions - get the next relevant one
-        next_feature = self.prolog_interface.get_next_question(
-            session['responses'],
-            session['candidates']
-        )
+        # Need more questions - get the next relevant one (with its question
+        # text when the engine can supply both at once)
+        next_key = ('next', session['selector'], key)
+        selected = self.answer_cache.get(next_key)
+        if selected is None:
+            selected = yield from self._select_next_feature(session)
+            self.answer_cache.put(next_key, selected)
+        next_feature, question = selected
         
         # Fallback: if Prolog doesn't return a feature, pick from remaining features
         if not next_feature:
-            all_features = self.prolog_interface.get_all_features()
-            answered_features = {f for (f, _) in session["responses"]}
+            all_features = self.kb.features
             
             for f in all_features:
-                if f not in answered_features:
+                if f not in session["answered"]:
                     next_feature = f
                     break
 
         if next_feature:
-            question = self.prolog_interface.get_feature_question(next_feature)
+            if question is None:
+                question = self.kb.feature_questions.get(next_feature)
             return {
                 "status": "continue",
                 "question": question,
@@ -329,29 +1028,278 @@ class InabelAPI:
             }
         else:
             # No more questions, but multiple candidates remain: pick best match.
-            pattern = self.prolog_interface.get_pattern_by_name(session["candidates"][0])
-            del self.sessions[session_id]
+            return self._complete_result(
+                session["candidates"][0], questions_asked, 'best_match',
+                note="Multiple patterns matched, returning best match",
+            )
+    
+    def _opening_feature(self, selector: str, feature_questions: Dict[str, str]) -> Optional[str]:
+        """The first feature asked in a session using `selector`."""
+        if not feature_questions:
+            return None
+        if selector != 'first':
+            # Let the session's strategy choose the opening question too.
+            return get_selector(selector)(self.index, self.index.all_mask, set())
+        # Choose the first key in sorted order so it's deterministic.
+        # You can change this list/ordering to whatever “good first question”
+        # you prefer (e.g., "geometric").
+        return sorted(feature_questions.keys())[0]
+
+    def _question_tree(self, selector: str) -> Optional[QuestionTree]:
+        """The question policy for `selector`, or None until it is ready.
+
+        The first request for a selector starts loading or building its tree
+        in the background.
+        """
+        if not self.use_question_tree:
+            return None
+        tree = self.question_trees.get(selector)
+        if tree is None:
+            self._start_tree_build(selector)
+        return tree
+
+    def wait_for_question_tree(
+        self, selector: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Optional[QuestionTree]:
+        """Load or build the tree for `selector` (default: the API-wide one)
+        and wait up to `timeout` seconds for it."""
+        if not self.use_question_tree:
+            return None
+        selector = selector or self.default_selector
+        if selector not in self.question_trees:
+            self._start_tree_build(selector).join(timeout)
+        return self.question_trees.get(selector)
+
+    def _start_tree_build(self, selector: str) -> threading.Thread:
+        """Start loading or building `selector`'s tree, once per selector.
+
+        Builds are keyed by process id: a build thread does not survive
+        fork(), so a forked server process starts its own if needed.
+        """
+        with self._tree_lock:
+            pid, thread = self._tree_builds.get(selector, (None, None))
+            if thread is None or pid != os.getpid():
+                thread = threading.Thread(
+                    target=self._build_question_tree, args=(selector,),
+                    name=f"question-tree-{selector}", daemon=True,
+                )
+                self._tree_builds[selector] = (os.getpid(), thread)
+                thread.start()
+        return thread
+
+    def _build_question_tree(self, selector: str) -> None:
+        path = self._cache_path(
+            f"question_tree-{selector}", TREE_FORMAT_VERSION, self.kb.version, 'json'
+        )
+        try:
+            tree = QuestionTree.load(path, self.kb.version, self.MIN_CONFIDENCE_QUESTIONS)
+            if tree is None or tree.selector != selector:
+                start_feature = self._opening_feature(selector, self.kb.all_feature_questions)
+                tree = QuestionTree.build(
+                    self.index,
+                    self.unique_features,
+                    selector,
+                    self.MIN_CONFIDENCE_QUESTIONS,
+                    start_feature,
+                    self.kb.version,
+                )
+                try:
+                    tree.save(path)
+                except OSError:
+                    pass  # A read-only cache dir only costs a rebuild next time.
+        except Exception:
+            # Sessions keep using live selection.
+            logger.exception("Building the %s question tree failed", selector)
+            return
+        self.question_trees[selector] = tree
+
+    def _tree_result(self, outcome: Dict[str, Any], questions_asked: int) -> Dict[str, Any]:
+        """Build the answer_question reply for a precomputed outcome."""
+        if outcome["status"] == "continue":
             return {
-                "status": "complete",
-                "pattern": pattern,
-                "questions_asked": questions_asked,
-                "identification_method": "best_match",
-                "note": "Multiple patterns matched, returning best match",
+                "status": "continue",
+                "question": self.kb.feature_questions.get(outcome["feature"]),
+                "feature": outcome["feature"],
+                "remaining_candidates": outcome["remaining"],
+                "questions_asked": questions_asked
             }
-    
+
+        if outcome["status"] == "not_found":
+            return {
+                'status': 'not_found',
+                'message': 'Could not identify the pattern based on your responses.',
+                'questions_asked': questions_asked
+            }
+
+        if outcome["method"] == 'unique_feature':
+            extra = {'unique_feature': outcome["unique_feature"]}
+        elif outcome["method"] == 'best_match':
+            extra = {'note': "Multiple patterns matched, returning best match"}
+        else:
+            extra = {}
+        return self._complete_result(
+            outcome["pattern"], questions_asked, outcome["method"], **extra
+        )
+
+    def _complete_result(
+        self, pattern_name: str, questions_asked: int, method: str, **extra: Any
+    ) -> Dict[str, Any]:
+        """A "complete" reply for `pattern_name`, from the result table."""
+        result = self._complete_results.get(pattern_name)
+        if result is None:
+            pattern = self.kb.patterns_by_name.get(pattern_name)
+            result = {'status': 'complete', 'pattern': pattern}
+            if pattern is not None:
+                self._complete_results[pattern_name] = result
+        return dict(result, questions_asked=questions_asked,
+                    identification_method=method, **extra)
+
+    def _select_next_feature(self, session: Dict[str, Any]) -> EngineSteps:
+        """Choose the next feature to ask about using the session's selector.
+
+        Returns (feature, question text); the text is None when it still has
+        to be looked up. The default "first" strategy is answered by the
+        engine itself, so the Prolog engine keeps using `get_next_question/3`.
+        """
+        if session["selector"] == 'first':
+            return (yield (
+                'get_next_question_with_text', (session['responses'], session['candidates'])
+            ))
+        select = get_selector(session["selector"])
+        feature = select(
+            self.index,
+            self.index.mask_of(session['candidates']),
+            session['answered'],
+        )
+        return feature, None
+
     def get_all_patterns(self) -> List[Dict[str, Any]]:
-        """Get information about all patterns."""
-        pattern_names = self.prolog_interface.get_all_pattern_names()
-        patterns = []
-        for name in pattern_names:
-            pattern = self.prolog_interface.get_pattern_by_name(name)
-            if pattern:
-                patterns.append(pattern)
-        return patterns
+        """Get information about all patterns (from the KB snapshot)."""
+        return self.kb.patterns
+
+    def get_pattern(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get one pattern by name (from the KB snapshot)."""
+        return self.kb.patterns_by_name.get(name)
+
+    def get_patterns_catalogue(self) -> Tuple[bytes, str]:
+        """Pre-serialized `/api/patterns` response body and its ETag."""
+        if self._catalogue_cache is None:
+            patterns = self.get_all_patterns()
+            body = json.dumps(
+                {
+                    'success': True,
+                    'data': {
+                        'patterns': patterns,
+                        'count': len(patterns)
+                    }
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode('utf-8')
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            self._catalogue_cache = (body, etag)
+        return self._catalogue_cache
     
     def get_all_features_with_questions(self) -> Dict[str, str]:
         """Get all features with their question texts."""
-        return self.prolog_interface.get_all_feature_questions()
+        return dict(self.kb.all_feature_questions)
+
+    def identify_batch(self, response_sets: List[List[tuple]]) -> List[Dict[str, Any]]:
+        """One-shot identification for many response sets, results in order.
+
+        Identical response sets are evaluated once. The Python engine checks
+        them all against the pattern index; the Prolog engine gets them in
+        `batch` chunks of IDENTIFY_CHUNK, spread over the worker pool.
+        """
+        unique, positions = self._dedupe_response_sets(response_sets)
+        if self.engine is self.prolog_interface:
+            chunks = [
+                unique[i:i + self.IDENTIFY_CHUNK]
+                for i in range(0, len(unique), self.IDENTIFY_CHUNK)
+            ]
+            if len(chunks) <= 1:
+                patterns = self.engine.identify_patterns(unique) if unique else []
+            else:
+                with ThreadPoolExecutor(max_workers=self.prolog_interface.size) as executor:
+                    patterns = [
+                        p for chunk in executor.map(self.engine.identify_patterns, chunks) for p in chunk
+                    ]
+        else:
+            patterns = self.engine.identify_patterns(unique)
+        return [self._identify_result(patterns[i]) for i in positions]
+
+    def identify_items(self, items: List[Any]) -> List[Dict[str, Any]]:
+        """`identify_batch` for JSON items {"id"?: ..., "responses": [...]}.
+
+        Each result echoes the item's "id" if it has one; items that are not
+        in that shape get {"status": "error", "error": ...} in their slot.
+        """
+        results, valid, response_sets = self._parse_items(items)
+        for i, result in zip(valid, self.identify_batch(response_sets)):
+            results[i].update(result)
+        return results
+
+    @classmethod
+    def _parse_items(cls, items: List[Any]) -> Tuple[List[Dict[str, Any]], List[int], List[List[tuple]]]:
+        """Result stubs, indexes of the valid items, and their response sets."""
+        results: List[Dict[str, Any]] = []
+        valid: List[int] = []
+        response_sets: List[List[tuple]] = []
+        for i, item in enumerate(items):
+            result: Dict[str, Any] = {}
+            if isinstance(item, dict) and 'id' in item:
+                result['id'] = item['id']
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("each item must be an object with 'responses'")
+                response_sets.append(cls.parse_responses(item.get('responses')))
+                valid.append(i)
+            except ValueError as e:
+                result.update(status='error', error=str(e))
+            results.append(result)
+        return results, valid, response_sets
+
+    @staticmethod
+    def parse_responses(raw: Any) -> List[tuple]:
+        """(feature, answer) pairs from a JSON list of {feature, answer} objects.
+
+        Raises ValueError if `raw` is not in that shape.
+        """
+        if not isinstance(raw, list):
+            raise ValueError("responses must be a list")
+        responses = []
+        for item in raw:
+            if not isinstance(item, dict) or not isinstance(item.get('feature'), str) \
+                    or not isinstance(item.get('answer'), str):
+                raise ValueError("each response needs string 'feature' and 'answer' fields")
+            responses.append((item['feature'], item['answer']))
+        return responses
+
+    @staticmethod
+    def _dedupe_response_sets(
+        response_sets: List[List[tuple]],
+    ) -> Tuple[List[List[tuple]], List[int]]:
+        """Distinct response sets, and each input's index into them."""
+        unique: List[List[tuple]] = []
+        seen: Dict[tuple, int] = {}
+        positions = []
+        for responses in response_sets:
+            key = response_key(responses)
+            if key not in seen:
+                seen[key] = len(unique)
+                unique.append(responses)
+            positions.append(seen[key])
+        return unique, positions
+
+    @staticmethod
+    def _identify_result(pattern: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Per-item result, shaped like the `/api/identify` reply data."""
+        if pattern:
+            return {'status': 'found', 'pattern': pattern}
+        return {
+            'status': 'not_found',
+            'message': 'Could not identify the pattern based on provided responses.'
+        }
 
 
 # Example usage
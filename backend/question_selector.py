@@ -0,0 +1,67 @@
+"""
+Next-question selection strategies for Inabel Pattern Identification.
+
+A selector takes the shared `PatternIndex`, the current candidate mask and
+the set of already-answered features, and returns the next feature to ask
+about (or None when nothing is left to ask).
+
+* ``first`` mirrors `get_next_question/3`: the first unanswered feature, in
+  `get_all_features/1` order, that any candidate has.
+* ``information_gain`` asks the feature that splits the remaining candidates
+  closest to 50/50. With every candidate equally likely, the expected entropy
+  reduction of a yes/no question is the binary entropy of the split, which
+  grows monotonically as the split approaches 50/50, so both criteria pick
+  the same feature.
+"""
+
+from typing import Callable, Dict, Optional, Set
+
+from pattern_index import PatternIndex, popcount
+
+
+Selector = Callable[[PatternIndex, int, Set[str]], Optional[str]]
+
+
+def select_first_relevant(index: PatternIndex, mask: int, answered: Set[str]) -> Optional[str]:
+    """Mirror `get_next_question/3`."""
+    return index.first_relevant_feature(mask, answered)
+
+
+def select_information_gain(index: PatternIndex, mask: int, answered: Set[str]) -> Optional[str]:
+    """Pick the unanswered feature whose yes/no split is most balanced.
+
+    Ties go to the earlier feature in `get_all_features/1` order. When no
+    feature splits the candidates (e.g. one candidate is left but more
+    questions are needed for confidence), fall back to the first relevant
+    feature so the session can still confirm the remaining pattern.
+    """
+    total = popcount(mask)
+    best_feature = None
+    best_score = 0
+    for feature in index.features:
+        if feature in answered:
+            continue
+        having = popcount(index.feature_masks[feature] & mask)
+        score = min(having, total - having)
+        if score > best_score:
+            best_feature = feature
+            best_score = score
+    if best_feature is None:
+        return index.first_relevant_feature(mask, answered)
+    return best_feature
+
+
+SELECTORS: Dict[str, Selector] = {
+    'first': select_first_relevant,
+    'information_gain': select_information_gain,
+}
+
+
+def get_selector(name: str) -> Selector:
+    """Look up a selector by name, raising ValueError for unknown names."""
+    try:
+        return SELECTORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown question selector: {name!r} (expected one of {sorted(SELECTORS)})"
+        )
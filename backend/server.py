@@ -6,7 +6,12 @@ Prolog interface to avoid low-level FLI assertion failures when using
 `pyswip` with newer SWI versions.
 """
 
+import logging
 import os
+import time
+
+# Reference point for the time-to-first-request report.
+server_started = time.perf_counter()
 
 # Configure SWI-Prolog execution style before pyswip is imported. The
 # "traditional" style is generally more compatible with ctypes-based
@@ -14,35 +19,134 @@ import os
 # failures on recent SWI releases.
 os.environ.setdefault("SWI_EXEC_STYLE", "traditional")
 
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
 from flask_cors import CORS
 import uuid
-from prolog_interface import InabelAPI
+from kb_reload import KBReloader
+from metrics import REGISTRY
+from server_config import (
+    create_api,
+    engine_name,
+    fast_start,
+    kb_watch_interval,
+    log_level,
+    max_batch,
+    max_sessions,
+    port,
+    prefork_tree_wait,
+    prefork_workers,
+    prolog_file_path,
+    prolog_workers,
+    question_selector,
+    session_mode,
+    session_store,
+    session_ttl,
+)
+
+logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('inabel.server')
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
 
-# Initialize Prolog interface
-prolog_file_path = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
-inabel_api = InabelAPI(prolog_file_path)
+# Initialize Prolog interface. Each worker is a separate `swipl` process, so
+# concurrent requests can be served on several cores at once (see
+# server_config.py for the INABEL_* settings). Edits to the KB file are
+# picked up in the background; each request uses the API that is current when
+# it starts (sessions stay on the KB they started on). In pre-fork mode this
+# process only builds the KB and indexes with a single Prolog worker; every
+# forked server process starts its own pool and watcher (prefork.py).
+kb_reloader = KBReloader(
+    create_api, prolog_file_path, retire_after=session_ttl,
+    api=create_api(workers=1) if prefork_workers else None,
+)
+if kb_watch_interval > 0 and not prefork_workers:
+    kb_reloader.watch(kb_watch_interval)
+first_request_ms = None
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+    """Time every request by endpoint (the URL rule, not the raw path)."""
+    started = g.get('request_started')
+    if started is not None:
+        REGISTRY.observe(
+            'inabel_http_request_seconds', time.perf_counter() - started,
+            endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=str(response.status_code),
+        )
+    return response
+
+
+@app.after_request
+def report_first_request(response):
+    """Log how long after start-up the first request was served."""
+    global first_request_ms
+    if first_request_ms is None:
+        first_request_ms = (time.perf_counter() - server_started) * 1000.0
+        logger.info("First request served %.0f ms after start-up", first_request_ms)
+    return response
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
+    inabel_api = kb_reloader.api
     return jsonify({
         'status': 'healthy',
         'service': 'Inabel Pattern Identification API',
-        'prolog_loaded': True
+        'prolog_loaded': True,
+        'kb_version': inabel_api.kb.version,
+        'pattern_count': len(inabel_api.kb.pattern_names),
+        'prolog_pool': inabel_api.prolog_interface.stats(),
+        'startup': dict(inabel_api.startup_timings, first_request_ms=first_request_ms),
+        'answer_cache': inabel_api.answer_cache.stats(),
+        'kb_reload': kb_reloader.stats(),
+        'session_mode': session_mode,
+        'sessions': inabel_api.sessions.stats(),
+        'pid': os.getpid()
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Latency histograms in the Prometheus text format (?format=json for JSON)."""
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'success': True,
+            'data': REGISTRY.snapshot()
+        })
+    return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/start', methods=['POST'])
 def start_identification():
-    """Start a new identification session."""
+    """Start a new identification session.
+
+    Accepts an optional JSON body {"selector": "information_gain"} to choose
+    the next-question strategy for this session. In token mode the reply
+    carries a `token` instead of a `session_id`.
+    """
     try:
-        session_id = str(uuid.uuid4())
-        session_data = inabel_api.start_session(session_id)
+        data = request.get_json(silent=True) or {}
+        inabel_api = kb_reloader.api
+        try:
+            if session_mode == 'token':
+                session_data = inabel_api.start_token_session(selector=data.get('selector'))
+            else:
+                session_id = str(uuid.uuid4())
+                session_data = inabel_api.start_session(session_id, selector=data.get('selector'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
@@ -57,21 +161,31 @@ def start_identification():
 
 @app.route('/api/answer', methods=['POST'])
 def submit_answer():
-    """Submit an answer to a question."""
+    """Submit an answer to a question.
+
+    Identifies the session by `session_id`, or by `token` for stateless
+    sessions (the reply then carries the next `token`).
+    """
     try:
         data = request.json
         session_id = data.get('session_id')
+        token = data.get('token')
         feature = data.get('feature')
         answer = data.get('answer')  # 'yes' or 'no'
         
-        if not session_id or not feature or not answer:
+        if not (session_id or token) or not feature or not answer:
             return jsonify({
                 'success': False,
                 'error': 'Missing required fields'
             }), 400
         
-        result = inabel_api.answer_question(session_id, feature, answer)
-        print("DEBUG /api/answer result:", result, flush=True)
+        if token and kb_reloader.api.token_codec is not None:
+            result = kb_reloader.answer_token(token, feature, answer)
+        elif token:
+            result = {'error': 'Invalid session token'}
+        else:
+            result = kb_reloader.answer_question(session_id, feature, answer)
+        logger.debug("/api/answer result: %s", result)
         
         return jsonify({
             'success': True,
@@ -86,17 +200,17 @@ def submit_answer():
 
 @app.route('/api/patterns', methods=['GET'])
 def get_all_patterns():
-    """Get all patterns in the database."""
+    """Get all patterns in the database.
+
+    Served from a pre-serialized body with an ETag, so clients that send
+    If-None-Match get a 304 without the catalogue being rebuilt.
+    """
     try:
-        patterns = inabel_api.get_all_patterns()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'patterns': patterns,
-                'count': len(patterns)
-            }
-        })
+        body, etag = kb_reloader.api.get_patterns_catalogue()
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -108,7 +222,7 @@ def get_all_patterns():
 def get_pattern(pattern_name):
     """Get details of a specific pattern."""
     try:
-        pattern = inabel_api.prolog_interface.get_pattern_by_name(pattern_name)
+        pattern = kb_reloader.api.get_pattern(pattern_name)
         
         if pattern:
             return jsonify({
@@ -131,7 +245,7 @@ def get_pattern(pattern_name):
 def get_all_features():
     """Get all features with their questions."""
     try:
-        features = inabel_api.get_all_features_with_questions()
+        features = kb_reloader.api.get_all_features_with_questions()
         
         return jsonify({
             'success': True,
@@ -160,7 +274,7 @@ def identify_pattern():
         # Convert to tuple format
         response_tuples = [(r['feature'], r['answer']) for r in responses]
         
-        pattern = inabel_api.prolog_interface.identify_pattern(response_tuples)
+        pattern = kb_reloader.api.engine.identify_pattern(response_tuples)
         
         if pattern:
             return jsonify({
@@ -185,6 +299,44 @@ def identify_pattern():
         }), 500
 
 
+@app.route('/api/identify/batch', methods=['POST'])
+def identify_batch():
+    """
+    Identify many complete response sets at once (bulk catalogue tagging).
+
+    Body: {"items": [{"id": optional, "responses": [{feature, answer}, ...]}, ...]}
+    Results come back in item order, each with its own status.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('items')
+        if not isinstance(items, list):
+            return jsonify({
+                'success': False,
+                'error': "'items' must be a list"
+            }), 400
+        if len(items) > max_batch:
+            return jsonify({
+                'success': False,
+                'error': f'At most {max_batch} items per batch'
+            }), 413
+
+        results = kb_reloader.api.identify_items(items)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results,
+                'count': len(results)
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
@@ -203,23 +355,49 @@ def internal_error(error):
     }), 500
 
 
-if __name__ == '__main__':
+def print_banner():
+    """Print the start-up summary shown when a server is run directly."""
     print("=" * 60)
     print("Inabel Pattern Identification API Server")
     print("=" * 60)
     print(f"Prolog KB loaded from: {prolog_file_path}")
+    inabel_api = kb_reloader.api
+    print(f"KB version: {inabel_api.kb.version[:12]}"
+          + (f" (reloaded on change, checked every {kb_watch_interval:g}s)" if kb_watch_interval > 0 else ""))
+    print(f"Prolog workers: {prolog_workers}" + (" (precompiled KB, warm spare)" if fast_start else "")
+          + (f" in each of {prefork_workers} server processes" if prefork_workers else ""))
+    print("Start-up (cumulative): " + ", ".join(
+        f"{phase[:-3]} {ms:.0f} ms" for phase, ms in inabel_api.startup_timings.items()
+    ))
+    print(f"Inference engine: {engine_name}")
+    print(f"Question selector: {question_selector}")
+    if session_mode == 'token':
+        print("Sessions: stateless signed tokens")
+    else:
+        print(f"Session store: {session_store.backend} (ttl {session_ttl:g}s, max {max_sessions})")
     print("\nAvailable endpoints:")
     print("  GET  /api/health           - Health check")
+    print("  GET  /api/metrics          - Latency histograms (Prometheus)")
     print("  POST /api/start            - Start identification session")
     print("  POST /api/answer           - Submit answer")
     print("  POST /api/identify         - One-shot identification")
+    print("  POST /api/identify/batch   - Bulk identification")
     print("  GET  /api/patterns         - Get all patterns")
     print("  GET  /api/pattern/<name>   - Get specific pattern")
     print("  GET  /api/features         - Get all features")
     print("=" * 60)
-    print("\nStarting server on http://localhost:5000")
+    print(f"\nStarting server on http://localhost:{port}")
     print("=" * 60)
-    
-    # Disable Flask auto-reloader to avoid initializing the Prolog
-    # engine multiple times, which can cause crashes with pyswip.
-    app.run(debug=False, host='0.0.0.0', port=5000)
+
+
+if __name__ == '__main__':
+    print_banner()
+
+    if prefork_workers:
+        from prefork import serve
+        serve(app, kb_reloader, prefork_workers, '0.0.0.0', port,
+              prolog_workers, kb_watch_interval, prefork_tree_wait)
+    else:
+        # Disable Flask auto-reloader to avoid initializing the Prolog
+        # engine multiple times, which can cause crashes with pyswip.
+        app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
@@ -0,0 +1,346 @@
+"""ASGI Backend Server for Inabel Pattern Identification.
+
+Serves the same endpoints as `server.py` on an asyncio event loop, so idle or
+slow clients cost a coroutine instead of an OS thread. Prolog commands go to
+`swipl` workers over `asyncio.subprocess` pipes, multiplexed by request id
+(see `async_prolog.py`).
+
+Requires `starlette` and an ASGI server such as `uvicorn`:
+
+    pip install starlette uvicorn
+    uvicorn server_asgi:app --port 5000     # or: python server_asgi.py
+"""
+
+import contextlib
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Match, Route
+
+from async_prolog import AsyncInabelAPI, AsyncPrologPool
+from metrics import REGISTRY
+from server_config import (
+    create_api,
+    engine_name,
+    log_level,
+    max_batch,
+    max_sessions,
+    port,
+    prolog_file_path,
+    prolog_workers,
+    question_selector,
+    session_mode,
+    session_store,
+    session_ttl,
+)
+
+logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('inabel.server_asgi')
+
+# KB metadata, question trees and sessions live in the shared InabelAPI. Its
+# blocking Prolog pool is only needed to export the KB at start-up; engine
+# commands go through the asyncio pool started with the app.
+inabel_api = create_api(workers=1)
+inabel_api.prolog_interface.stop()
+prolog_pool = AsyncPrologPool(inabel_api.prolog_load_path, size=prolog_workers)
+async_api = AsyncInabelAPI(inabel_api, prolog_pool)
+
+
+async def read_json(request: Request) -> Dict[str, Any]:
+    """Request body as a dict ({} when missing or not JSON)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def error(message: str, status_code: int) -> JSONResponse:
+    return JSONResponse({'success': False, 'error': message}, status_code=status_code)
+
+
+async def health_check(request: Request) -> JSONResponse:
+    """Health check endpoint."""
+    return JSONResponse({
+        'status': 'healthy',
+        'service': 'Inabel Pattern Identification API',
+        'prolog_loaded': True,
+        'kb_version': inabel_api.kb.version,
+        'pattern_count': len(inabel_api.kb.pattern_names),
+        'prolog_pool': prolog_pool.stats(),
+        'startup': inabel_api.startup_timings,
+        'answer_cache': inabel_api.answer_cache.stats(),
+        'session_mode': session_mode,
+        'sessions': await async_api.session_stats()
+    })
+
+
+async def metrics(request: Request) -> Response:
+    """Latency histograms in the Prometheus text format (?format=json for JSON)."""
+    if request.query_params.get('format') == 'json':
+        return JSONResponse({'success': True, 'data': REGISTRY.snapshot()})
+    return PlainTextResponse(REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+
+async def start_identification(request: Request) -> JSONResponse:
+    """Start a new identification session (see `server.start_identification`)."""
+    try:
+        data = await read_json(request)
+        try:
+            if session_mode == 'token':
+                session_data = inabel_api.start_token_session(selector=data.get('selector'))
+            else:
+                session_id = str(uuid.uuid4())
+                session_data = await async_api.start_session(session_id, selector=data.get('selector'))
+        except ValueError as e:
+            return error(str(e), 400)
+
+        return JSONResponse({
+            'success': True,
+            'data': session_data
+        })
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def submit_answer(request: Request) -> JSONResponse:
+    """Submit an answer to a question (see `server.submit_answer`)."""
+    try:
+        data = await read_json(request)
+        session_id = data.get('session_id')
+        token = data.get('token')
+        feature = data.get('feature')
+        answer = data.get('answer')  # 'yes' or 'no'
+
+        if not (session_id or token) or not feature or not answer:
+            return error('Missing required fields', 400)
+
+        if token and inabel_api.token_codec is not None:
+            result = await async_api.answer_token(token, feature, answer)
+        elif token:
+            result = {'error': 'Invalid session token'}
+        else:
+            result = await async_api.answer_question(session_id, feature, answer)
+        logger.debug("/api/answer result: %s", result)
+
+        return JSONResponse({
+            'success': True,
+            'data': result
+        })
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def get_all_patterns(request: Request) -> Response:
+    """Get all patterns in the database, with ETag / 304 support."""
+    try:
+        body, etag = inabel_api.get_patterns_catalogue()
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+        # If-None-Match uses the weak comparison (RFC 9110 13.1.2), as Flask's
+        # make_conditional does: a W/ prefix on either tag is ignored.
+        if_none_match = request.headers.get('if-none-match', '').strip()
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        tags = [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+        if f'"{etag}"' in tags or if_none_match == '*':
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def get_pattern(request: Request) -> JSONResponse:
+    """Get details of a specific pattern."""
+    try:
+        pattern = inabel_api.get_pattern(request.path_params['pattern_name'])
+        if pattern:
+            return JSONResponse({
+                'success': True,
+                'data': pattern
+            })
+        return error('Pattern not found', 404)
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def get_all_features(request: Request) -> JSONResponse:
+    """Get all features with their questions."""
+    try:
+        features = inabel_api.get_all_features_with_questions()
+        return JSONResponse({
+            'success': True,
+            'data': {
+                'features': features,
+                'count': len(features)
+            }
+        })
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def identify_pattern(request: Request) -> JSONResponse:
+    """One-shot identification from a complete set of responses."""
+    try:
+        data = await read_json(request)
+        responses = data.get('responses', [])  # List of {feature, answer} objects
+        response_tuples = [(r['feature'], r['answer']) for r in responses]
+
+        pattern = await async_api.identify_pattern(response_tuples)
+
+        if pattern:
+            return JSONResponse({
+                'success': True,
+                'data': {
+                    'status': 'found',
+                    'pattern': pattern
+                }
+            })
+        return JSONResponse({
+            'success': True,
+            'data': {
+                'status': 'not_found',
+                'message': 'Could not identify the pattern based on provided responses.'
+            }
+        })
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def identify_batch(request: Request) -> JSONResponse:
+    """Identify many complete response sets at once (see `server.identify_batch`)."""
+    try:
+        data = await read_json(request)
+        items = data.get('items')
+        if not isinstance(items, list):
+            return error("'items' must be a list", 400)
+        if len(items) > max_batch:
+            return error(f'At most {max_batch} items per batch', 413)
+
+        results = await async_api.identify_items(items)
+
+        return JSONResponse({
+            'success': True,
+            'data': {
+                'results': results,
+                'count': len(results)
+            }
+        })
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def http_error(request: Request, exc: HTTPException) -> JSONResponse:
+    """Handle 404 and other HTTP errors."""
+    if exc.status_code == 404:
+        return error('Endpoint not found', 404)
+    return error(exc.detail, exc.status_code)
+
+
+async def internal_error(request: Request, exc: Exception) -> JSONResponse:
+    """Handle 500 errors."""
+    return error('Internal server error', 500)
+
+
+class RequestTimer:
+    """ASGI middleware timing every HTTP request by route (see metrics.py)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Callable[[], Awaitable[Any]],
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = {'code': 500}
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REGISTRY.observe(
+                'inabel_http_request_seconds', time.perf_counter() - started,
+                endpoint=route_path(scope),
+                method=scope['method'],
+                status=str(status['code']),
+            )
+
+
+def route_path(scope: Dict[str, Any]) -> str:
+    """The matching route's path template (not the raw path), or 'unmatched'."""
+    for route in routes:
+        if route.matches(scope)[0] == Match.FULL:
+            return route.path
+    return 'unmatched'
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    # The in-process Python engine never talks to Prolog after start-up.
+    uses_pool = async_api.engine is prolog_pool
+    if uses_pool:
+        await prolog_pool.start()
+    try:
+        yield
+    finally:
+        if uses_pool:
+            await prolog_pool.stop()
+
+
+routes = [
+    Route('/api/health', health_check, methods=['GET']),
+    Route('/api/metrics', metrics, methods=['GET']),
+    Route('/api/start', start_identification, methods=['POST']),
+    Route('/api/answer', submit_answer, methods=['POST']),
+    Route('/api/patterns', get_all_patterns, methods=['GET']),
+    Route('/api/pattern/{pattern_name}', get_pattern, methods=['GET']),
+    Route('/api/features', get_all_features, methods=['GET']),
+    Route('/api/identify', identify_pattern, methods=['POST']),
+    Route('/api/identify/batch', identify_batch, methods=['POST']),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(RequestTimer),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    exception_handlers={HTTPException: http_error, 500: internal_error},
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("=" * 60)
+    print("Inabel Pattern Identification API Server (ASGI)")
+    print("=" * 60)
+    print(f"Prolog KB loaded from: {prolog_file_path}")
+    print(f"KB version: {inabel_api.kb.version[:12]}")
+    print(f"Prolog workers: {prolog_workers} (asyncio, multiplexed)")
+    print(f"Inference engine: {engine_name}")
+    print(f"Question selector: {question_selector}")
+    if session_mode == 'token':
+        print("Sessions: stateless signed tokens")
+    else:
+        print(f"Session store: {session_store.backend} (ttl {session_ttl:g}s, max {max_sessions})")
+    print("=" * 60)
+    print(f"\nStarting server on http://localhost:{port}")
+    print("=" * 60)
+
+    uvicorn.run(app, host='0.0.0.0', port=port)
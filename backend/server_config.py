@@ -0,0 +1,107 @@
+"""Environment configuration shared by the Inabel API servers.
+
+Both `server.py` (Flask, threaded) and `server_asgi.py` (asyncio) read the
+same INABEL_* variables through this module.
+"""
+
+import os
+from typing import Optional
+
+from answer_cache import DEFAULT_CACHE_SIZE
+from prolog_interface import InabelAPI
+from session_store import (
+    DEFAULT_MAX_SESSIONS,
+    DEFAULT_TTL,
+    MemorySessionStore,
+    SQLiteSessionStore,
+)
+
+# The KB file (INABEL_KB, default: ../inabel.ai.pl). Each Prolog worker is a
+# separate `swipl` process, so concurrent requests can be served on several
+# cores at once.
+prolog_file_path = os.environ.get('INABEL_KB') or os.path.join(
+    os.path.dirname(__file__), '..', 'inabel.ai.pl'
+)
+prolog_workers = int(os.environ.get('INABEL_PROLOG_WORKERS', os.cpu_count() or 1))
+# "prolog" (default) queries swipl for every lookup; "python" runs the same
+# identification logic in-process over facts exported from the KB.
+engine_name = os.environ.get('INABEL_ENGINE', 'prolog')
+# Optional KB snapshot: JSON (knowledge_base.py) or binary (binary_kb.py).
+kb_snapshot = os.environ.get('INABEL_KB_SNAPSHOT') or None
+# Default next-question strategy ("first" or "information_gain"); clients can
+# override it per session in the /api/start body.
+question_selector = os.environ.get('INABEL_QUESTION_SELECTOR', 'first')
+# Sessions expire after INABEL_SESSION_TTL seconds of inactivity and at most
+# INABEL_MAX_SESSIONS are kept (least recently used are evicted first). Set
+# INABEL_SESSION_DB to an SQLite file to share sessions between processes.
+session_ttl = float(os.environ.get('INABEL_SESSION_TTL', DEFAULT_TTL))
+max_sessions = int(os.environ.get('INABEL_MAX_SESSIONS', DEFAULT_MAX_SESSIONS))
+session_db = os.environ.get('INABEL_SESSION_DB') or None
+if session_db:
+    session_store = SQLiteSessionStore(session_db, ttl=session_ttl, max_sessions=max_sessions)
+else:
+    session_store = MemorySessionStore(ttl=session_ttl, max_sessions=max_sessions)
+# INABEL_SESSION_MODE=token makes sessions stateless: /api/start and
+# /api/answer hand out an HMAC-signed token (keyed by INABEL_SESSION_SECRET,
+# shared by every worker) instead of keeping the session server-side.
+session_mode = os.environ.get('INABEL_SESSION_MODE', 'server')
+session_secret = os.environ.get('INABEL_SESSION_SECRET', '').encode('utf-8') or None
+if session_mode not in ('server', 'token'):
+    raise ValueError(f"INABEL_SESSION_MODE must be 'server' or 'token', not {session_mode!r}")
+if session_mode == 'token' and not session_secret:
+    raise ValueError("INABEL_SESSION_MODE=token requires INABEL_SESSION_SECRET")
+
+# INABEL_FAST_START=1 starts workers from a precompiled .qlf of the KB and
+# keeps one spare, already-warmed worker to swap in when a worker dies.
+fast_start = os.environ.get('INABEL_FAST_START', '0') == '1'
+
+# The KB file is checked for changes every INABEL_KB_WATCH seconds and
+# reloaded without a restart (server.py only; 0 disables watching).
+kb_watch_interval = float(os.environ.get('INABEL_KB_WATCH', 2.0))
+
+# Candidates and next questions are cached for the INABEL_ANSWER_CACHE most
+# recently seen answer sets (0 disables the cache).
+answer_cache_size = int(os.environ.get('INABEL_ANSWER_CACHE', DEFAULT_CACHE_SIZE))
+
+# Log level for the servers' own messages; DEBUG also logs every
+# /api/answer result.
+log_level = os.environ.get('INABEL_LOG_LEVEL', 'INFO').upper()
+
+# Port the servers listen on when run directly.
+port = int(os.environ.get('INABEL_PORT', 5000))
+
+# Number of server processes forked by prefork.py (INABEL_PREFORK).
+# The parent builds the KB and indexes once; each process runs
+# INABEL_PROLOG_WORKERS Prolog workers of its own.
+prefork_workers = int(os.environ.get('INABEL_PREFORK', 0))
+
+# Longest wait, in seconds, for the question tree before forking; processes
+# forked without it build their own and use live selection meanwhile.
+prefork_tree_wait = float(os.environ.get('INABEL_PREFORK_TREE_WAIT', 60.0))
+
+# Every INABEL_HEALTH_CHECK seconds (default 30, 0 disables) a background
+# thread pings the idle Prolog workers and replaces any that do not answer.
+health_check_interval = float(os.environ.get('INABEL_HEALTH_CHECK', 30.0))
+
+# Largest number of items accepted by one /api/identify/batch request.
+max_batch = int(os.environ.get('INABEL_MAX_BATCH', 10000))
+
+
+def create_api(workers: Optional[int] = None) -> InabelAPI:
+    """Build the `InabelAPI` described by the environment.
+
+    `workers` overrides INABEL_PROLOG_WORKERS for the synchronous pool.
+    """
+    return InabelAPI(
+        prolog_file_path,
+        workers=prolog_workers if workers is None else workers,
+        engine=engine_name,
+        kb_snapshot=kb_snapshot,
+        selector=question_selector,
+        session_store=session_store,
+        session_secret=session_secret,
+        precompiled=fast_start,
+        spare_worker=fast_start,
+        answer_cache_size=answer_cache_size,
+        health_check_interval=health_check_interval,
+    )
@@ -0,0 +1,292 @@
+"""
+Session stores for Inabel Pattern Identification.
+
+An identification session is a small dict:
+    {responses: [(feature, answer), ...], answered: {feature, ...},
+     candidates: [name, ...] or None, selector: str, kb_version: str}
+
+Sessions that are abandoned mid-way (closed tabs) are never completed, so
+every store bounds its size: entries expire `ttl` seconds after their last
+use, and when `max_sessions` is exceeded the least recently used entries are
+evicted. Both stores expose the same small interface (`get`, `save`,
+`delete`, `purge_expired`, `stats`).
+
+* `MemorySessionStore` keeps live dicts in an LRU-ordered dict; it is the
+  default and is private to one process.
+* `SQLiteSessionStore` keeps sessions as JSON rows in an SQLite file, so
+  several server processes (e.g. gunicorn workers) can share sessions
+  without sticky routing.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+# Defaults: one hour of inactivity, at most 10k open sessions.
+DEFAULT_TTL = 3600.0
+DEFAULT_MAX_SESSIONS = 10000
+
+
+def dump_session(session: Dict[str, Any]) -> str:
+    """Serialise a session dict to JSON (`answered` is derived on load)."""
+    data = {
+        "responses": [list(r) for r in session["responses"]],
+        "candidates": session["candidates"],
+        "selector": session["selector"],
+    }
+    if "kb_version" in session:
+        data["kb_version"] = session["kb_version"]
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def load_session(data: str) -> Dict[str, Any]:
+    """Inverse of `dump_session`."""
+    raw = json.loads(data)
+    responses = [tuple(r) for r in raw["responses"]]
+    session = {
+        "responses": responses,
+        "answered": {feature for feature, _ in responses},
+        "candidates": raw["candidates"],
+        "selector": raw["selector"],
+    }
+    if "kb_version" in raw:
+        session["kb_version"] = raw["kb_version"]
+    return session
+
+
+class SessionStore:
+    """Interface shared by the session stores."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        # Counters since start-up (per process for the shared store).
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session (refreshing its TTL), or None if unknown or expired."""
+        raise NotImplementedError
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        """Create or update a session, evicting the LRU entries if over capacity."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session (no-op if unknown)."""
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Drop every expired session and return how many were dropped."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, limits and expiry/eviction counters."""
+        return {
+            "backend": self.backend,
+            "sessions": len(self),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store: an LRU-ordered dict of session -> (last use, session)."""
+
+    backend = "memory"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            last_used, session = entry
+            if now - last_used > self.ttl:
+                del self._sessions[session_id]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._sessions[session_id] = (now, session)
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            return session
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        now = self.clock()
+        with self._lock:
+            if session_id not in self._sessions:
+                self.created += 1
+            self._sessions[session_id] = (now, session)
+            self._sessions.move_to_end(session_id)
+            self._purge_expired(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_expired(self.clock())
+
+    def _purge_expired(self, now: float) -> int:
+        # Entries are in last-use order, so expired ones are at the front.
+        purged = 0
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            purged += 1
+        self.expired += purged
+        return purged
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store backed by an SQLite file that several processes can share."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe,
+        # and must not be used across fork() either (see prefork.py).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT data, last_used FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            data, last_used = row
+            if now - last_used > self.ttl:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE sessions SET last_used = ? WHERE id = ?", (now, session_id)
+            )
+        self.hits += 1
+        return load_session(data)
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        now = self.clock()
+        data = dump_session(session)
+        conn = self._conn()
+        with conn:
+            updated = conn.execute(
+                "UPDATE sessions SET data = ?, last_used = ? WHERE id = ?",
+                (data, now, session_id),
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    "INSERT INTO sessions (id, data, last_used) VALUES (?, ?, ?)",
+                    (session_id, data, now),
+                )
+                self.created += 1
+                # Only inserts can push the table over capacity.
+                self._purge_expired(conn, now)
+                (count,) = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+                if count > self.max_sessions:
+                    self.evicted += conn.execute(
+                        "DELETE FROM sessions WHERE id IN ("
+                        " SELECT id FROM sessions ORDER BY last_used LIMIT ?)",
+                        (count - self.max_sessions,),
+                    ).rowcount
+
+    def delete(self, session_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        with conn:
+            return self._purge_expired(conn, self.clock())
+
+    def _purge_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        purged = conn.execute(
+            "DELETE FROM sessions WHERE last_used < ?", (now - self.ttl,)
+        ).rowcount
+        self.expired += purged
+        return purged
+
+    def __len__(self) -> int:
+        (count,) = self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return count
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
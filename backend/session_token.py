@@ -0,0 +1,95 @@
+"""
+Stateless session tokens for Inabel Pattern Identification.
+
+A session is fully described by its selector and the (feature, answer) pairs
+given so far; the candidate set follows from them. Instead of keeping that in
+a session store, the server can hand the client a token carrying the answers
+as two bitmasks over the KB's feature list (features answered YES and NO),
+signed with HMAC-SHA256 so that clients cannot forge or edit it:
+
+    <selector>.<issued at hex>.<yes mask hex>.<no mask hex>.<signature>
+
+The signature also covers the KB version, so tokens issued against another
+KB are rejected. Every answer issues a new token; like a stored session, a
+token expires `ttl` seconds after it was issued. Any worker holding the same
+secret and KB can continue the session.
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+from typing import List, Optional, Tuple
+
+from question_selector import SELECTORS
+from session_store import DEFAULT_TTL
+
+
+class SessionTokenCodec:
+    """Encode/decode signed answer-set tokens for one KB."""
+
+    # Truncated HMAC-SHA256 length, in bytes.
+    SIGNATURE_BYTES = 16
+
+    def __init__(
+        self, secret: bytes, features: List[str], kb_version: str, ttl: float = DEFAULT_TTL
+    ) -> None:
+        if not secret:
+            raise ValueError("A non-empty secret is required for session tokens")
+        self.secret = secret
+        self.features = list(features)
+        self.kb_version = kb_version
+        self.ttl = ttl
+        self.bits = {feature: 1 << i for i, feature in enumerate(self.features)}
+
+    def _sign(self, body: str) -> str:
+        mac = hmac.new(
+            self.secret, f"{self.kb_version}|{body}".encode('utf-8'), hashlib.sha256
+        ).digest()[:self.SIGNATURE_BYTES]
+        return base64.urlsafe_b64encode(mac).rstrip(b'=').decode('ascii')
+
+    def can_encode(self, feature: str, answer: str) -> bool:
+        """Whether a (feature, answer) pair is representable in a token."""
+        return feature in self.bits and answer in ('yes', 'no')
+
+    def encode(self, selector: str, responses: List[tuple], now: Optional[float] = None) -> str:
+        """Token for a selector and its answers (see `can_encode`), issued `now`."""
+        issued = int(time.time() if now is None else now)
+        yes_mask = no_mask = 0
+        for feature, answer in responses:
+            if answer == 'yes':
+                yes_mask |= self.bits[feature]
+            else:
+                no_mask |= self.bits[feature]
+        body = f"{selector}.{issued:x}.{yes_mask:x}.{no_mask:x}"
+        return f"{body}.{self._sign(body)}"
+
+    def decode(self, token: str, now: Optional[float] = None) -> Optional[Tuple[str, List[tuple]]]:
+        """(selector, responses) for a valid, unexpired token, or None.
+
+        Responses come back in feature order: the answer set, not the order
+        the questions were asked in, determines the session's state.
+        """
+        if not isinstance(token, str):
+            return None
+        body, _, signature = token.rpartition('.')
+        if not hmac.compare_digest(signature.encode('ascii', 'replace'),
+                                   self._sign(body).encode('ascii')):
+            return None
+        try:
+            selector, issued_hex, yes_hex, no_hex = body.split('.')
+            issued, yes_mask, no_mask = int(issued_hex, 16), int(yes_hex, 16), int(no_hex, 16)
+        except ValueError:
+            return None
+        if selector not in SELECTORS:
+            return None
+        if (time.time() if now is None else now) - issued > self.ttl:
+            return None
+
+        responses = []
+        for feature, bit in self.bits.items():
+            if yes_mask & bit:
+                responses.append((feature, 'yes'))
+            if no_mask & bit:
+                responses.append((feature, 'no'))
+        return selector, responses
@@ -0,0 +1,120 @@
+"""Test the answer cache (canonical response keys, LRU, API parity)."""
+import sys
+import os
+import tempfile
+import random
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from answer_cache import AnswerCache
+from decision_tree import response_key
+from prolog_interface import InabelAPI
+
+
+def play(api, session_id, rng, selector):
+    """One session with random answers; returns every reply."""
+    step = api.start_session(session_id, selector=selector)
+    steps = [step]
+    while step.get('feature') and step.get('status', 'continue') == 'continue':
+        step = api.answer_question(session_id, step['feature'], rng.choice(('yes', 'no')))
+        steps.append(step)
+    return steps
+
+
+def test_answer_cache():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        # Test 1: Keys ignore answer order but keep repeated features
+        print("Test 1: response_key()")
+        a = [('geometric', 'yes'), ('floral', 'no')]
+        assert response_key(a) == response_key(list(reversed(a)))
+        assert response_key(a) != response_key([('geometric', 'yes'), ('floral', 'yes')])
+        assert response_key(a) != response_key(a + [('floral', 'yes')])
+        assert response_key([]) == ''
+        print("  ✓ PASSED\n")
+
+        # Test 2: LRU eviction and hit-rate statistics
+        print("Test 2: AnswerCache LRU")
+        cache = AnswerCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)  # evicts 'b', the least recently used
+        assert cache.get('b') is None and cache.get('c') == 3
+        stats = cache.stats()
+        print(f"  Stats: {stats}")
+        assert stats['entries'] == 2 and stats['evicted'] == 1
+        assert stats['hits'] == 2 and stats['misses'] == 1
+        assert abs(stats['hit_rate'] - 2 / 3) < 1e-9
+        disabled = AnswerCache(max_size=0)
+        disabled.put('a', 1)
+        assert disabled.get('a') is None and len(disabled) == 0
+        print("  ✓ PASSED\n")
+
+        # Test 3: Cached sessions give the same replies with fewer engine calls
+        print("Test 3: cached vs uncached sessions")
+        for engine in ('prolog', 'python'):
+            cached = InabelAPI(prolog_file, engine=engine, question_tree=False, cache_dir=cache_dir)
+            uncached = InabelAPI(prolog_file, engine=engine, question_tree=False,
+                                 answer_cache_size=0, cache_dir=cache_dir)
+            calls = {'cached': 0, 'uncached': 0}
+            for label, api in (('cached', cached), ('uncached', uncached)):
+                refine = api.engine.refine_candidates
+
+                def counting(*args, label=label, refine=refine):
+                    calls[label] += 1
+                    return refine(*args)
+
+                api.engine.refine_candidates = counting
+            for i in range(200):
+                selector = ('first', 'information_gain')[i % 2]
+                seed = i % 25  # Many sessions repeat the same answers.
+                got = play(cached, f's{i}', random.Random(seed), selector)
+                expected = play(uncached, f's{i}', random.Random(seed), selector)
+                assert got == expected, (engine, i)
+            stats = cached.answer_cache.stats()
+            print(f"  {engine}: refine calls {calls}, hit rate {stats['hit_rate']:.2f}")
+            assert calls['cached'] < calls['uncached']
+            assert stats['hits'] > 0
+            assert uncached.answer_cache.stats()['hits'] == 0
+            cached.prolog_interface.stop()
+            uncached.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        # Test 4: A feature answered twice is cached under its own key
+        print("Test 4: the same feature answered twice")
+        cached = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+        uncached = InabelAPI(prolog_file, question_tree=False, answer_cache_size=0,
+                             cache_dir=cache_dir)
+        for i, (first, second) in enumerate((('yes', 'yes'), ('no', 'no'), ('yes', 'no'),
+                                             ('no', 'yes'), ('no', 'yes'))):
+            replies = []
+            for api in (cached, uncached):
+                api.start_session(f'twice{i}')
+                replies.append([api.answer_question(f'twice{i}', 'geometric', answer)
+                                for answer in (first, second)])
+            print(f"  {first}/{second}: {[r.get('status') for r in replies[0]]}")
+            assert replies[0] == replies[1], (first, second)
+        assert cached.answer_cache.stats()['hits'] > 0
+        cached.prolog_interface.stop()
+        uncached.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All answer cache tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_answer_cache()
+    sys.exit(0 if success else 1)
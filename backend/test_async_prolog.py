@@ -0,0 +1,121 @@
+"""Test the asyncio Prolog transport (multiplexing, recovery, API parity)."""
+import sys
+import os
+import tempfile
+import asyncio
+import random
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from prolog_interface import InabelAPI
+from session_store import SQLiteSessionStore
+from async_prolog import AsyncInabelAPI, AsyncPrologPool, AsyncPrologProcess
+
+def test_async_prolog():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        api = InabelAPI(prolog_file, cache_dir=cache_dir)
+        features = api.kb.features
+
+        async def run():
+            # Test 1: Many commands in flight on one worker
+            print("Test 1: 200 concurrent commands multiplexed on one process")
+            proc = await AsyncPrologProcess(prolog_file).start()
+            assert await proc.ping(), "Worker should answer ping"
+            queries = [[(f, a)] for f in features for a in ('yes', 'no')] * 3
+            replies = await asyncio.gather(*(proc.filter_patterns(q) for q in queries[:200]))
+            for query, reply in zip(queries, replies):
+                assert reply == api.engine.filter_patterns(query), query
+            assert proc.in_flight == 0
+            await proc.stop()
+            print("  ✓ PASSED\n")
+
+            # Test 2: A dead worker fails its callers and is replaced
+            print("Test 2: worker crash and replacement")
+            pool = await AsyncPrologPool(prolog_file, size=2).start()
+            names = await pool.get_all_pattern_names()
+            assert names == api.kb.pattern_names
+            pool._workers[0].proc.kill()
+            await pool._workers[0].proc.wait()
+            results = await asyncio.gather(*(pool.get_all_pattern_names() for _ in range(10)))
+            stats = pool.stats()
+            print(f"  Stats: {stats}")
+            assert all(r == names for r in results)
+            assert stats['replaced'] == 1 and stats['alive'] == 2
+            print("  ✓ PASSED\n")
+
+            # Test 3: Async sessions follow the synchronous API exactly
+            print("Test 3: AsyncInabelAPI vs InabelAPI")
+            rng = random.Random(3)
+            reference = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+            live = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+            async_api = AsyncInabelAPI(live, pool)
+
+            async def play(i):
+                sid = f"s{i}"
+                step = reference.start_session(sid)
+                assert live.start_session(sid) == step
+                while step.get('status', 'continue') == 'continue' and step.get('feature'):
+                    feature = step['feature'] if rng.random() < 0.8 else rng.choice(features)
+                    answer = rng.choice(('yes', 'no'))
+                    step = reference.answer_question(sid, feature, answer)
+                    async_step = await async_api.answer_question(sid, feature, answer)
+                    assert async_step == step, (async_step, step)
+
+            await asyncio.gather(*(play(i) for i in range(30)))
+            responses = [(features[0], 'yes'), (features[1], 'no')]
+            assert await async_api.identify_pattern(responses) == api.engine.identify_pattern(responses)
+            for other in (reference, live):
+                other.prolog_interface.stop()
+            print("  ✓ PASSED\n")
+
+            # Test 4: An SQLite session store is used off the event loop
+            print("Test 4: SQLite session store calls run in the executor")
+            store = SQLiteSessionStore(os.path.join(cache_dir, 'sessions.db'))
+            threads = set()
+            for method in ('get', 'save', 'delete'):
+                def recorded(*args, method=getattr(store, method)):
+                    threads.add(threading.get_ident())
+                    return method(*args)
+                setattr(store, method, recorded)
+            reference = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+            stored = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir,
+                               session_store=store)
+            async_api = AsyncInabelAPI(stored, pool)
+            target = set(reference.kb.patterns_by_name['binakul']['features'])
+            step = reference.start_session('db')
+            assert await async_api.start_session('db') == step
+            while step.get('status', 'continue') == 'continue':
+                feature = step['feature']
+                answer = 'yes' if feature in target else 'no'
+                step = reference.answer_question('db', feature, answer)
+                assert await async_api.answer_question('db', feature, answer) == step
+            print(f"  Store calls from {len(threads)} thread(s)")
+            assert threads and threading.get_ident() not in threads
+            assert step['pattern']['name'] == 'binakul' and store.get('db') is None
+            for other in (reference, stored):
+                other.prolog_interface.stop()
+            await pool.stop()
+            print("  ✓ PASSED\n")
+
+        asyncio.run(run())
+        api.prolog_interface.stop()
+        print("=" * 50)
+        print("All async Prolog tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_async_prolog()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,142 @@
+"""Test the binary KB snapshot: round trip, lazy metadata and start-up cache."""
+import sys
+import os
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from binary_kb import FORMAT_VERSION, BinaryKnowledgeBase, is_binary_kb, load_snapshot, write_binary_kb
+from generate_kb import generate_kb, write_kb
+from knowledge_base import KnowledgeBase
+from pattern_index import PatternIndex
+from prolog_interface import InabelAPI, PrologProcess
+
+
+def play(api, session_id, rng):
+    """One session with random answers; returns every reply."""
+    step = api.start_session(session_id)
+    steps = [step]
+    while step.get('feature') and step.get('status', 'continue') == 'continue':
+        step = api.answer_question(session_id, step['feature'], rng.choice(('yes', 'no')))
+        steps.append(step)
+    return steps
+
+
+def test_binary_kb():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Test 1: Round trip of the real KB
+            print("Test 1: write_binary_kb() / BinaryKnowledgeBase")
+            proc = PrologProcess(prolog_file)
+            try:
+                kb = KnowledgeBase.from_prolog(proc, version='a' * 64)
+            finally:
+                proc.stop()
+            path = os.path.join(tmp, 'kb.bin')
+            write_binary_kb(kb, path)
+            binary = BinaryKnowledgeBase(path)
+            assert binary.version == kb.version
+            assert binary.pattern_names == kb.pattern_names
+            assert binary.features == kb.features
+            assert binary.feature_questions == kb.feature_questions
+            assert binary.all_feature_questions == kb.all_feature_questions
+            assert dict(binary.patterns_by_name) == kb.patterns_by_name
+            assert binary.patterns == kb.patterns
+            assert PatternIndex(binary).feature_masks == PatternIndex(kb).feature_masks
+            print(f"  {os.path.getsize(path)} bytes")
+            print("  ✓ PASSED\n")
+
+            # Test 2: Metadata is decoded only for the patterns looked up
+            print("Test 2: lazy pattern metadata")
+            big = generate_kb(2000, 300, seed=5)
+            big.version = 'b' * 64
+            write_binary_kb(big, path)
+            binary = BinaryKnowledgeBase(path)
+            assert len(binary.pattern_names) == 2000 and not binary._decoded
+            assert PatternIndex(binary).unique_features() == PatternIndex(big).unique_features()
+            assert binary.patterns_by_name['pattern_1234'] == big.patterns_by_name['pattern_1234']
+            assert 'pattern_9999' not in binary.patterns_by_name
+            assert len(binary._decoded) == 1
+            assert binary.patterns == big.patterns
+            print("  ✓ PASSED\n")
+
+            # Test 3: Snapshot type detection and bad files
+            print("Test 3: load_snapshot()")
+            json_path = os.path.join(tmp, 'kb.json')
+            kb.save(json_path)
+            assert is_binary_kb(path) and not is_binary_kb(json_path)
+            assert type(load_snapshot(json_path)) is KnowledgeBase
+            assert isinstance(load_snapshot(path), BinaryKnowledgeBase)
+            with open(os.path.join(tmp, 'bad.bin'), 'wb') as fh:
+                fh.write(b'INABELKB\x63\x00')
+            try:
+                BinaryKnowledgeBase(os.path.join(tmp, 'bad.bin'))
+                raise AssertionError("truncated snapshot accepted")
+            except ValueError:
+                pass
+            print("  ✓ PASSED\n")
+
+            # Test 4: InabelAPI caches the binary snapshot and maps it next time
+            print("Test 4: start-up from the cached snapshot")
+            kb_path = os.path.join(tmp, 'kb-300.pl')
+            write_kb(generate_kb(300, 60, seed=9), kb_path)
+            for engine in ('prolog', 'python'):
+                cache = os.path.join(tmp, f'cache-{engine}')
+                exported = InabelAPI(kb_path, engine=engine, cache_dir=cache, kb_cache=False)
+                first = InabelAPI(kb_path, engine=engine, cache_dir=cache)
+                mapped = InabelAPI(kb_path, engine=engine, cache_dir=cache)
+                assert type(exported.kb) is KnowledgeBase and type(first.kb) is KnowledgeBase
+                assert isinstance(mapped.kb, BinaryKnowledgeBase)
+                for i in range(100):
+                    expected = play(exported, f's{i}', random.Random(i))
+                    assert play(mapped, f's{i}', random.Random(i)) == expected, (engine, i)
+                assert mapped.get_patterns_catalogue() == exported.get_patterns_catalogue()
+                print(f"  {engine}: kb {first.startup_timings['kb_ms'] - first.startup_timings['workers_ms']:.1f} ms"
+                      f" exported, {mapped.startup_timings['kb_ms'] - mapped.startup_timings['workers_ms']:.1f} ms mapped")
+                for api in (exported, first, mapped):
+                    api.prolog_interface.stop()
+
+            # A changed KB is exported again into a snapshot of its own.
+            with open(kb_path, 'a', encoding='utf-8') as fh:
+                fh.write('\n% edited\n')
+            stale = InabelAPI(kb_path, cache_dir=cache)
+            assert type(stale.kb) is KnowledgeBase
+            snapshot = stale._cache_path('kb', FORMAT_VERSION, stale.kb.version, 'bin')
+            assert BinaryKnowledgeBase(snapshot).version == stale.kb.version
+            assert snapshot != mapped._cache_path('kb', FORMAT_VERSION, mapped.kb.version, 'bin')
+            stale.prolog_interface.stop()
+            print("  ✓ PASSED\n")
+
+            # Test 5: Different KB files never share a cached snapshot
+            print("Test 5: one cache dir, two KB files")
+            other_path = os.path.join(tmp, 'kb-200.pl')
+            write_kb(generate_kb(200, 40, seed=3), other_path)
+            other = InabelAPI(other_path, cache_dir=cache)
+            again = InabelAPI(kb_path, cache_dir=cache)
+            assert other.kb.pattern_names != again.kb.pattern_names
+            assert isinstance(again.kb, BinaryKnowledgeBase)
+            assert again.kb.pattern_names == stale.kb.pattern_names
+            print(f"  Cache files: {sorted(os.listdir(cache))}")
+            for api in (other, again):
+                api.prolog_interface.stop()
+            print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All binary KB tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_binary_kb()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,99 @@
+"""Test the precomputed question tree against live answer_question logic."""
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from prolog_interface import InabelAPI
+from decision_tree import FORMAT_VERSION as TREE_FORMAT_VERSION
+from decision_tree import QuestionTree
+from question_selector import SELECTORS
+
+def play(api, session_id, selector, pattern_features):
+    """Answer a whole session truthfully, returning every reply."""
+    replies = [api.start_session(session_id, selector=selector)]
+    feature = replies[0].get('feature')
+    while feature:
+        answer = 'yes' if feature in pattern_features else 'no'
+        reply = api.answer_question(session_id, feature, answer)
+        replies.append(reply)
+        if reply.get('status') != 'continue':
+            break
+        feature = reply.get('feature')
+    return replies
+
+def test_decision_tree():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        cache_dir = tempfile.mkdtemp(prefix='inabel-tree-')
+        cached = InabelAPI(prolog_file, cache_dir=cache_dir)
+        live = InabelAPI(prolog_file, question_tree=False,
+                         cache_dir=tempfile.mkdtemp(prefix='inabel-tree-'))
+        print("✓ InabelAPI initialized with and without question trees\n")
+
+        # Test 1: Tree answers match the live Prolog path for every pattern
+        print("Test 1: tree vs live replies for every pattern and selector")
+        for selector in sorted(SELECTORS):
+            assert cached.wait_for_question_tree(selector, timeout=120) is not None
+            for name in cached.kb.pattern_names + ['<no pattern>']:
+                features = set(cached.kb.patterns_by_name.get(name, {}).get('features', []))
+                assert play(cached, 't', selector, features) == play(live, 't', selector, features), \
+                       (selector, name)
+            print(f"  {selector}: {len(cached.question_trees[selector].nodes)} nodes")
+        print("  ✓ PASSED\n")
+
+        # Test 2: Trees are written to disk and invalidated by the KB hash
+        print("Test 2: cached trees load warm and respect the KB hash")
+        path = cached._cache_path('question_tree-first', TREE_FORMAT_VERSION,
+                                  cached.kb.version, 'json')
+        assert os.path.exists(path), "Tree should be serialized to the cache dir"
+        warm = QuestionTree.load(path, cached.kb.version, cached.MIN_CONFIDENCE_QUESTIONS)
+        assert warm is not None and warm.nodes == cached.question_trees['first'].nodes
+        assert QuestionTree.load(path, 'stale-hash', cached.MIN_CONFIDENCE_QUESTIONS) is None
+        print("  ✓ PASSED\n")
+
+        # Test 3: Start-up does not wait for the tree; live selection fills in
+        print("Test 3: trees are built in the background")
+        release = threading.Event()
+        build = InabelAPI._build_question_tree
+
+        def held_build(api, selector):
+            release.wait(120)
+            build(api, selector)
+
+        InabelAPI._build_question_tree = held_build
+        try:
+            cold = InabelAPI(prolog_file, cache_dir=tempfile.mkdtemp(prefix='inabel-tree-'))
+            features = set(cold.kb.patterns_by_name['binakul']['features'])
+            assert cold._question_tree('first') is None
+            assert play(cold, 'c', 'first', features) == play(live, 'c', 'first', features)
+        finally:
+            InabelAPI._build_question_tree = build
+            release.set()
+        assert cold.wait_for_question_tree('first', timeout=120) is not None
+        assert play(cold, 'c', 'first', features) == play(live, 'c', 'first', features)
+        cold.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        # Clean up
+        cached.prolog_interface.stop()
+        live.prolog_interface.stop()
+        print("=" * 50)
+        print("All question tree tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_decision_tree()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,83 @@
+"""Test the synthetic KB generator and that generated KBs load and identify."""
+import sys
+import os
+import tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_questions import simulate_session
+from generate_kb import generate_kb, write_kb
+from prolog_interface import InabelAPI, PrologProcess
+
+
+def test_generate_kb():
+    try:
+        # Test 1: Shape and determinism
+        print("Test 1: generate_kb() shape")
+        kb = generate_kb(500, 100, features_per_pattern=4, unique_density=0.25, seed=7)
+        assert kb.patterns == generate_kb(500, 100, 4, unique_density=0.25, seed=7).patterns
+        assert kb.patterns != generate_kb(500, 100, 4, unique_density=0.25, seed=8).patterns
+        assert len(kb.pattern_names) == len(set(kb.pattern_names)) == 500
+        counts = Counter(f for p in kb.patterns for f in p['features'])
+        unique = [f for f in kb.features if f.startswith('u')]
+        assert all(counts[f] == 1 for f in unique)
+        print(f"  {len(kb.features)} features, {len(unique)} unique")
+        assert 0.15 < len(unique) / 500 < 0.35
+        assert all(len([f for f in p['features'] if f.startswith('f')]) == 4 for p in kb.patterns)
+        assert set(kb.features) <= set(kb.feature_questions)
+        assert len({frozenset(p['features']) for p in kb.patterns}) == 500
+        assert not [f for f in generate_kb(200, 50, unique_density=0.0).features if f.startswith('u')]
+        print("  ✓ PASSED\n")
+
+        # Test 2: Overlap concentrates features on a hot set
+        print("Test 2: overlap")
+        spread = generate_kb(300, 200, unique_density=0.0, overlap=0.0)
+        shared = generate_kb(300, 200, unique_density=0.0, overlap=1.0)
+        widest = {label: max(Counter(f for p in k.patterns for f in p['features']).values())
+                  for label, k in (('overlap=0', spread), ('overlap=1', shared))}
+        print(f"  Patterns per most common feature: {widest}")
+        assert widest['overlap=1'] > 2 * widest['overlap=0']
+        assert len(shared.features) <= 20
+        print("  ✓ PASSED\n")
+
+        # Test 3: Generated facts load in Prolog and every pattern is identifiable
+        print("Test 3: generated KB end to end")
+        kb = generate_kb(300, 60, seed=3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'kb-300.pl')
+            write_kb(kb, path)
+            proc = PrologProcess(path)
+            try:
+                assert proc.get_all_pattern_names() == kb.pattern_names
+                assert proc.get_all_features() == kb.features
+                assert proc.get_pattern_by_name(kb.pattern_names[5]) == kb.patterns[5]
+            finally:
+                proc.stop()
+            for engine in ('prolog', 'python'):
+                api = InabelAPI(path, engine=engine, cache_dir=tmp)
+                expected = {f: p['name'] for p in kb.patterns for f in p['features']
+                            if f.startswith('u')}
+                assert {f: n for f, n in api.unique_features.items() if f.startswith('u')} == expected
+                runs = [simulate_session(api, name, api.default_selector) for name in kb.pattern_names]
+                correct = sum(1 for r in runs if r['correct'])
+                print(f"  {engine}: {correct}/{len(runs)} identified")
+                assert correct == len(runs)
+                api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All KB generator tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_generate_kb()
+    sys.exit(0 if success else 1)
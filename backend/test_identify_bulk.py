@@ -0,0 +1,79 @@
+"""Test the NDJSON bulk identification CLI helpers."""
+import sys
+import os
+import tempfile
+import io
+import json
+import random
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from prolog_interface import InabelAPI
+from identify_bulk import run
+
+def test_identify_bulk():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        api = InabelAPI(prolog_file, workers=3, question_tree=False, cache_dir=cache_dir)
+        features = api.kb.features
+        rng = random.Random(15)
+
+        # Test 1: Results stream back in input order and match identify_pattern
+        print("Test 1: 1000 records through 3 workers in chunks of 64")
+        records, expected = [], []
+        for i in range(1000):
+            responses = [(f, rng.choice(('yes', 'no'))) for f in rng.sample(features, rng.randint(0, 4))]
+            records.append(json.dumps({
+                'id': i,
+                'responses': [{'feature': f, 'answer': a} for f, a in responses],
+            }))
+            expected.append(api.engine.identify_pattern(responses))
+        source = io.StringIO('\n'.join(records) + '\n')
+        sink = io.StringIO()
+        counts = run(api, source, sink, workers=3, chunk_size=64)
+        results = [json.loads(line) for line in sink.getvalue().splitlines()]
+        print(f"  Counts: {counts}")
+        assert [r['id'] for r in results] == list(range(1000)), "Results must keep input order"
+        for result, pattern in zip(results, expected):
+            assert result['status'] == ('found' if pattern else 'not_found')
+            assert result.get('pattern') == (pattern['name'] if pattern else None)
+        assert counts['found'] + counts['not_found'] == 1000
+        print("  ✓ PASSED\n")
+
+        # Test 2: Bad lines become per-line errors without stopping the stream
+        print("Test 2: invalid lines")
+        source = io.StringIO(
+            '{"id": "a", "responses": [{"feature": "dizzying", "answer": "yes"}]}\n'
+            '\n'
+            'not json\n'
+            '{"id": "b", "responses": "oops"}\n'
+        )
+        sink = io.StringIO()
+        counts = run(api, source, sink, workers=2, chunk_size=2, full_pattern=True)
+        results = [json.loads(line) for line in sink.getvalue().splitlines()]
+        assert [r['line'] for r in results] == [1, 3, 4], "Blank lines are skipped"
+        assert results[0]['pattern']['name'] == 'binakul'
+        assert results[1]['status'] == 'error' and results[2]['status'] == 'error'
+        assert results[2]['id'] == 'b'
+        assert counts == {'found': 1, 'not_found': 0, 'error': 2}
+        print("  ✓ PASSED\n")
+
+        api.prolog_interface.stop()
+        print("=" * 50)
+        print("All bulk identification tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_identify_bulk()
+    sys.exit(0 if success else 1)
@@ -1,6 +1,7 @@
 """Test the InabelAPI class (session-based interface)."""
 import sys
 import os
+import tempfile
 
 sys.path.insert(0, os.path.dirname(__file__))
 
@@ -8,10 +9,11 @@ from prolog_interface import InabelAPI
 
 def test_inabel_api():
     prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
     print(f"Loading Prolog KB from: {prolog_file}")
     
     try:
-        api = InabelAPI(prolog_file)
+        api = InabelAPI(prolog_file, cache_dir=cache_dir)
         print("✓ InabelAPI initialized successfully")
         print(f"  MIN_CONFIDENCE_QUESTIONS = {api.MIN_CONFIDENCE_QUESTIONS}")
         print(f"  Unique features detected: {len(api.unique_features)}")
@@ -134,6 +136,61 @@ def test_inabel_api():
         assert len(features) > 0
         print("  ✓ PASSED\n")
         
+        # Test 5: Batch identification matches one-shot identify_pattern
+        print("Test 5: identify_batch() / identify_items()")
+        features = list(features)
+        response_sets = [[(f, a)] for f in features[:10] for a in ('yes', 'no')]
+        response_sets += [[('geometric', 'yes'), ('dizzying', 'yes')]] * 3
+        response_sets += [[('dizzying', 'yes'), ('geometric', 'yes')], []]
+        results = api.identify_batch(response_sets)
+        assert len(results) == len(response_sets)
+        for responses, result in zip(response_sets, results):
+            expected = api.engine.identify_pattern(responses)
+            assert result['status'] == ('found' if expected else 'not_found'), responses
+            assert result.get('pattern') == expected, responses
+        python_api = InabelAPI(prolog_file, engine='python', question_tree=False,
+                               cache_dir=cache_dir)
+        assert python_api.identify_batch(response_sets) == results
+        python_api.prolog_interface.stop()
+        items = api.identify_items([
+            {'id': 'rec-1', 'responses': [{'feature': 'dizzying', 'answer': 'yes'}]},
+            {'id': 'rec-2', 'responses': 'geometric'},
+            ['not', 'an', 'object'],
+            {'responses': []},
+        ])
+        print(f"  Item statuses: {[r['status'] for r in items]}")
+        assert items[0]['id'] == 'rec-1' and items[0]['pattern']['name'] == 'binakul'
+        assert items[1]['id'] == 'rec-2' and items[1]['status'] == 'error'
+        assert items[2]['status'] == 'error' and 'id' not in items[2]
+        assert items[3] == results[-1]
+        print("  ✓ PASSED\n")
+
+        # Test 6: Completing a session never fetches the pattern from Prolog
+        print("Test 6: terminal results come from the pattern table")
+        live_api = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+
+        def no_fetch(name):
+            raise AssertionError(f"get_pattern_by_name({name!r}) went to Prolog")
+
+        live_api.engine.get_pattern_by_name = no_fetch
+        methods = set()
+        for first in ('yes', 'no'):
+            for second in ('yes', 'no'):
+                step = live_api.start_session('fast')
+                answers = iter([first, second])
+                while step.get('status', 'continue') == 'continue':
+                    step = live_api.answer_question('fast', step['feature'], next(answers, 'no'))
+                methods.add(step.get('identification_method'))
+                if step['status'] == 'complete':
+                    name = step['pattern']['name']
+                    assert step['pattern'] == api.engine.get_pattern_by_name(name)
+        result = live_api.answer_question(live_api.start_session('u')['session_id'], 'dizzying', 'yes')
+        assert result['pattern'] == api.engine.get_pattern_by_name('binakul')
+        assert result['unique_feature'] == 'dizzying'
+        print(f"  Methods seen: {sorted(m for m in methods if m)}")
+        live_api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
         # Clean up
         api.prolog_interface.stop()
         
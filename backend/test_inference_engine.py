@@ -0,0 +1,100 @@
+"""Parity test: the Python engine must agree with the Prolog engine."""
+import sys
+import os
+import itertools
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from prolog_interface import PrologProcess
+from knowledge_base import KnowledgeBase
+from inference_engine import PythonEngine
+
+def test_inference_engine_parity():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        proc = PrologProcess(prolog_file)
+        engine = PythonEngine(KnowledgeBase.from_prolog(proc))
+        print("✓ Python engine built from exported KB\n")
+
+        # Test 1: Static lookups
+        print("Test 1: names, features and questions")
+        assert engine.get_all_pattern_names() == proc.get_all_pattern_names()
+        assert engine.get_all_features() == proc.get_all_features(), \
+               "Feature order must match get_all_features/1"
+        assert engine.get_all_feature_questions() == proc.get_all_feature_questions()
+        for feature in proc.get_all_features() + ['no_such_feature']:
+            assert engine.get_feature_question(feature) == proc.get_feature_question(feature)
+        for name in proc.get_all_pattern_names() + ['no_such_pattern']:
+            assert engine.get_pattern_by_name(name) == proc.get_pattern_by_name(name)
+        assert engine.get_all_patterns() == proc.get_all_patterns()
+        print("  ✓ PASSED\n")
+
+        # Test 2: Filtering and identification for one and two answers
+        print("Test 2: filter_patterns / refine_candidates / identify_pattern / get_next_question")
+        features = proc.get_all_features()
+        response_sets = [[(f, a)] for f in features for a in ('yes', 'no')]
+        for f1, f2 in itertools.combinations(features[::3], 2):
+            for a1, a2 in itertools.product(('yes', 'no'), repeat=2):
+                response_sets.append([(f1, a1), (f2, a2)])
+
+        for responses in response_sets:
+            candidates = proc.filter_patterns(responses)
+            assert engine.filter_patterns(responses) == candidates, responses
+            assert engine.identify_pattern(responses) == proc.identify_pattern(responses), responses
+            assert engine.get_next_question_with_text(responses, candidates) == \
+                   proc.get_next_question_with_text(responses, candidates), responses
+            # Incremental refinement must equal refiltering from scratch
+            previous = proc.filter_patterns(responses[:-1])
+            feature, answer = responses[-1]
+            assert proc.refine_candidates(previous, feature, answer) == candidates, responses
+            assert engine.refine_candidates(previous, feature, answer) == candidates, responses
+        print(f"  Compared {len(response_sets)} response sets")
+        print("  ✓ PASSED\n")
+
+        # Test 3: Full question paths for every pattern
+        print("Test 3: question paths for every pattern")
+        for name in proc.get_all_pattern_names():
+            pattern_features = set(engine.get_pattern_by_name(name)['features'])
+            responses = []
+            candidates = proc.get_all_pattern_names()
+            while True:
+                expected = proc.get_next_question(responses, candidates)
+                assert engine.get_next_question(responses, candidates) == expected, (name, responses)
+                if expected is None:
+                    break
+                responses.append((expected, 'yes' if expected in pattern_features else 'no'))
+                candidates = proc.filter_patterns(responses)
+                assert engine.filter_patterns(responses) == candidates, (name, responses)
+            assert engine.identify_pattern(responses) == proc.identify_pattern(responses)
+        print("  ✓ PASSED\n")
+
+        # Test 4: Unique features from the bitset index
+        print("Test 4: PatternIndex.unique_features()")
+        owners = {}
+        for name in proc.get_all_pattern_names():
+            for feature in proc.get_pattern_by_name(name)['features']:
+                owners.setdefault(feature, []).append(name)
+        expected = {f: names[0] for f, names in owners.items() if len(names) == 1}
+        assert engine.index.unique_features() == expected
+        print(f"  {len(expected)} unique features")
+        print("  ✓ PASSED\n")
+
+        # Clean up
+        proc.stop()
+        print("=" * 50)
+        print("All inference engine parity tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_inference_engine_parity()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,146 @@
+"""Test hot reload of the KB file (KBReloader)."""
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kb_reload import KBReloader
+from prolog_interface import InabelAPI
+from session_store import MemorySessionStore
+
+NEW_PATTERN = """
+pattern(sinan_reload_test,
+    [reload_test_feature, geometric],
+    'Added while the server was running',
+    'bi-star',
+    'reload-test-pattern',
+    [],
+    []).
+"""
+
+
+def play(answer, step, key):
+    """Answer 'no' to every question until the session ends."""
+    steps = [step]
+    while step.get('status', 'continue') == 'continue':
+        step = answer(key, step['feature'], 'no')
+        if step.get('token'):
+            key = step['token']
+        steps.append(step)
+    return steps
+
+
+def test_kb_reload():
+    source = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    tmp_dir = tempfile.mkdtemp()
+    prolog_file = os.path.join(tmp_dir, 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    shutil.copy(source, prolog_file)
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        store = MemorySessionStore()
+        factories = []
+
+        def factory():
+            if factories:
+                return factories[0]()
+            return InabelAPI(prolog_file, cache_dir=tmp_dir, session_store=store,
+                             session_secret=b'secret')
+
+        reloader = KBReloader(factory, prolog_file, retire_after=60.0)
+        old_api = reloader.api
+        reference = InabelAPI(source, question_tree=False, session_secret=b'secret',
+                              cache_dir=cache_dir)
+
+        # Test 1: Only a settled change to the file is reloaded
+        print("Test 1: check() after editing the KB")
+        assert reloader.check() is False, "Unchanged KB must not reload"
+        first = reloader.api.start_session('old')
+        token_step = reloader.api.start_token_session()
+        with open(prolog_file, 'a', encoding='utf-8') as f:
+            f.write(NEW_PATTERN)
+        assert reloader.check() is False, "First sight of a change only arms the reload"
+        assert reloader.check() is True, "Second identical sight reloads"
+        assert reloader.api is not old_api
+        assert reloader.api.kb.version != old_api.kb.version
+        assert 'sinan_reload_test' in reloader.api.kb.pattern_names
+        assert reloader.api.unique_features.get('reload_test_feature') == 'sinan_reload_test'
+        assert len(reloader.api.kb.pattern_names) == len(old_api.kb.pattern_names) + 1
+        assert reloader.check() is False
+        print(f"  Stats: {reloader.stats()}")
+        print("  ✓ PASSED\n")
+
+        # Test 2: Sessions started before the reload finish on the old KB
+        print("Test 2: in-flight sessions keep their KB")
+        expected = play(reference.answer_question, reference.start_session('ref'), 'ref')
+        hits = reloader.api.sessions.hits
+        got = play(reloader.answer_question, first, 'old')
+        answers = len(got) - 1
+        assert reloader.api.sessions.hits - hits == answers, "One session read per answer"
+        for step in expected[1:] + got[1:]:
+            step.pop('session_id', None)
+        assert got[1:] == expected[1:], "Old session must follow the old KB"
+        ref_token = reference.start_token_session()
+        expected = play(reference.answer_token, ref_token, ref_token['token'])
+        got = play(reloader.answer_token, token_step, token_step['token'])
+        strip = lambda steps: [{k: v for k, v in s.items() if k != 'token'} for s in steps]
+        assert strip(got) == strip(expected), "Old token must follow the old KB"
+        assert old_api.answer_question('old', 'geometric', 'yes') == {'error': 'Invalid session ID'}
+        new = reloader.api.start_session('new')
+        assert new['total_patterns'] == len(reloader.api.kb.pattern_names)
+        reloader.api.sessions.get('new')['kb_version'] = old_api.kb.version
+        assert reloader.api.answer_question('new', new['feature'], 'no') == \
+               {'error': 'Session belongs to another knowledge base version'}
+        print("  ✓ PASSED\n")
+
+        # Test 3: Idle replaced APIs are retired
+        print("Test 3: retire_idle()")
+        reloader.api.start_session('stale')
+        reloader.api.sessions.get('stale')['kb_version'] = old_api.kb.version
+        assert reloader.retire_idle() == 0, "Recently used APIs are kept"
+        assert reloader.retire_idle(now=float('inf')) == 1
+        assert not old_api.prolog_interface.ping(), "Retired workers are stopped"
+        assert reloader.answer_question('stale', 'geometric', 'no') == \
+               {'error': 'Session expired after a knowledge base update'}
+        print("  ✓ PASSED\n")
+
+        # Test 4: A KB that fails to load keeps the current one serving
+        print("Test 4: failed reload")
+
+        def broken():
+            raise RuntimeError("syntax error")
+
+        factories.append(broken)
+        current = reloader.api
+        with open(prolog_file, 'a', encoding='utf-8') as f:
+            f.write('% edited\n')
+        assert reloader.check() is False and reloader.check() is False
+        assert reloader.api is current
+        assert reloader.failures == 1 and 'syntax error' in reloader.stats()['last_error']
+        assert reloader.check() is False and reloader.failures == 1, \
+               "A failed KB is not retried until the file changes"
+        print("  ✓ PASSED\n")
+
+        reloader.stop()
+        reference.prolog_interface.stop()
+
+        print("=" * 50)
+        print("All KB reload tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return True
+
+if __name__ == '__main__':
+    success = test_kb_reload()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,82 @@
+"""Test latency histograms, the Prometheus rendering and the timing hooks."""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from metrics import REGISTRY, Histogram, MetricsRegistry
+from prolog_interface import InabelAPI
+
+
+def test_metrics():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        # Test 1: Histogram buckets are cumulative
+        print("Test 1: Histogram")
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for seconds in (0.0005, 0.005, 0.005, 0.05, 3.0):
+            histogram.observe(seconds)
+        snapshot = histogram.snapshot()
+        print(f"  Snapshot: {snapshot}")
+        assert snapshot['buckets'] == {0.001: 1, 0.01: 3, 0.1: 4}
+        assert snapshot['count'] == 5 and abs(snapshot['sum'] - 3.0605) < 1e-9
+        print("  ✓ PASSED\n")
+
+        # Test 2: Prometheus text format
+        print("Test 2: MetricsRegistry.render()")
+        registry = MetricsRegistry(buckets=(0.01, 1.0))
+        registry.observe('inabel_prolog_command_seconds', 0.5, cmd='refine', phase='wait')
+        with registry.timer('inabel_answer_seconds', status='a"b'):
+            pass
+        text = registry.render()
+        print("  " + text.replace("\n", "\n  ").rstrip())
+        assert '# TYPE inabel_prolog_command_seconds histogram' in text
+        assert 'inabel_prolog_command_seconds_bucket{cmd="refine",phase="wait",le="0.01"} 0' in text
+        assert 'inabel_prolog_command_seconds_bucket{cmd="refine",phase="wait",le="1"} 1' in text
+        assert 'inabel_prolog_command_seconds_bucket{cmd="refine",phase="wait",le="+Inf"} 1' in text
+        assert 'inabel_prolog_command_seconds_count{cmd="refine",phase="wait"} 1' in text
+        assert 'inabel_answer_seconds_count{status="a\\"b"} 1' in text
+        print("  ✓ PASSED\n")
+
+        # Test 3: answer_question records every phase
+        print("Test 3: timing hooks in PrologProcess and InabelAPI")
+        api = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+        REGISTRY.reset()
+        step = api.start_session('timed')
+        while step.get('status', 'continue') == 'continue':
+            step = api.answer_question('timed', step['feature'], 'no')
+        snapshot = REGISTRY.snapshot()
+        phases = {s['labels']['phase'] for s in snapshot['inabel_prolog_command_seconds']
+                  if s['labels']['cmd'] == 'refine'}
+        assert phases == {'serialize', 'write', 'wait', 'parse'}, phases
+        methods = {s['labels']['method'] for s in snapshot['inabel_engine_call_seconds']}
+        assert 'refine_candidates' in methods
+        answers = snapshot['inabel_answer_seconds']
+        assert sum(s['count'] for s in answers) == step['questions_asked']
+        assert {s['labels']['status'] for s in answers} >= {'continue', step['status']}
+        answer_phases = {s['labels']['phase'] for s in snapshot['inabel_answer_phase_seconds']}
+        assert answer_phases == {'session_load', 'tree_lookup', 'session_save'}
+        assert snapshot['inabel_prolog_checkout_wait_seconds'][0]['count'] > 0
+        print(f"  Metrics: {sorted(snapshot)}")
+        api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All metrics tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_metrics()
+    sys.exit(0 if success else 1)
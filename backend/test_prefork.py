@@ -0,0 +1,161 @@
+"""Test pre-fork mode: shared listening socket, shared sessions, restarts."""
+import sys
+import os
+import json
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from kb_reload import KBReloader
+from prefork import prepare
+from prolog_interface import InabelAPI
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def call(url, body=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(url, data, {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def wait_for(base, deadline=60.0):
+    stop_at = time.time() + deadline
+    while time.time() < stop_at:
+        try:
+            return call(f'{base}/health')
+        except OSError:
+            time.sleep(0.2)
+    raise AssertionError("server did not answer")
+
+
+def test_prefork():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        # Test 1: A forked process gets a pool of its own
+        print("Test 1: InabelAPI.restart_workers()")
+        api = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+        old_pool = api.prolog_interface
+        api.restart_workers(2)
+        assert api.engine is api.prolog_interface is not old_pool
+        assert api.prolog_interface.size == 2 and not old_pool.ping()
+        assert api.identify_batch([[('dizzying', 'yes')]])[0]['status'] == 'found'
+        api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            base = f'http://127.0.0.1:{port}/api'
+            env = dict(os.environ, INABEL_PREFORK='3', INABEL_PORT=str(port),
+                       INABEL_PROLOG_WORKERS='1', INABEL_KB_WATCH='0',
+                       INABEL_SESSION_DB=os.path.join(tmp, 'sessions.db'))
+            log = open(os.path.join(tmp, 'server.log'), 'w')
+            server = subprocess.Popen([sys.executable, os.path.join(HERE, 'server.py')],
+                                      env=env, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                # Test 2: Requests are served by the forked processes
+                print("Test 2: forked server processes")
+                wait_for(base)
+                pids = {call(f'{base}/health')['pid'] for _ in range(30)}
+                print(f"  Parent {server.pid}, answered by {sorted(pids)}")
+                assert server.pid not in pids and 1 <= len(pids) <= 3
+                print("  ✓ PASSED\n")
+
+                # Test 3: Sessions continue on whichever process answers
+                print("Test 3: a session across processes")
+                step = call(f'{base}/start', {})['data']
+                session_id, feature = step['session_id'], step['feature']
+                features = {'geometric', 'dizzying', 'repeating', 'optical_illusion'}
+                while feature:
+                    step = call(f'{base}/answer', {
+                        'session_id': session_id, 'feature': feature,
+                        'answer': 'yes' if feature in features else 'no',
+                    })['data']
+                    feature = step.get('feature') if step.get('status') == 'continue' else None
+                print(f"  Identified: {step['pattern']['name']}")
+                assert step['status'] == 'complete' and step['pattern']['name'] == 'binakul'
+                print("  ✓ PASSED\n")
+
+                # Test 4: A process that dies is replaced
+                print("Test 4: restart after a crash")
+                victim = next(iter(pids))
+                os.kill(victim, signal.SIGKILL)
+                stop_at = time.time() + 30
+                while True:
+                    seen = {wait_for(base)['pid'] for _ in range(30)}
+                    if seen - pids or time.time() > stop_at:
+                        break
+                    time.sleep(0.5)
+                print(f"  Killed {victim}, now answered by {sorted(seen)}")
+                assert victim not in seen and seen - pids
+                print("  ✓ PASSED\n")
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+                log.close()
+
+            # Test 5: Per-process memory sessions are refused
+            print("Test 5: pre-fork needs shared sessions")
+            env.pop('INABEL_SESSION_DB')
+            result = subprocess.run([sys.executable, os.path.join(HERE, 'server.py')], env=env,
+                                    capture_output=True, text=True, timeout=120)
+            assert result.returncode != 0 and 'INABEL_SESSION_DB' in result.stderr
+            print("  ✓ PASSED\n")
+
+        # Test 6: prepare() does not wait longer than tree_wait for the tree
+        print("Test 6: bounded question-tree wait")
+        release = threading.Event()
+        build = InabelAPI._build_question_tree
+
+        def held_build(api, selector):
+            release.wait(60)
+            build(api, selector)
+
+        InabelAPI._build_question_tree = held_build
+        try:
+            api = InabelAPI(prolog_file, cache_dir=tempfile.mkdtemp(prefix='inabel-test-'))
+            started = time.time()
+            prepare(KBReloader(lambda: api, prolog_file, api=api), tree_wait=0.2)
+            print(f"  prepare() returned after {time.time() - started:.2f} s")
+            assert time.time() - started < 30 and not api.prolog_interface.ping()
+            assert api.question_trees == {}
+            api.restart_workers(1)  # As in a forked process; questions are chosen live.
+            step = api.start_session('no-tree')
+            assert step['feature'] and api.answer_question('no-tree', step['feature'], 'no')['status']
+            api.prolog_interface.stop()
+        finally:
+            release.set()
+            InabelAPI._build_question_tree = build
+        print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All pre-fork tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_prefork()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,175 @@
+"""Test the PrologProcessPool class (concurrent access and worker replacement)."""
+import sys
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import prolog_interface
+from prolog_interface import InabelAPI, PrologProcessPool, compile_kb
+
+def test_prolog_pool():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        pool = PrologProcessPool(prolog_file, size=3)
+        print("✓ PrologProcessPool started successfully\n")
+
+        # Test 1: Commands work through the pool
+        print("Test 1: get_all_pattern_names() through the pool")
+        names = pool.get_all_pattern_names()
+        print(f"  Found {len(names)} patterns")
+        assert len(names) > 0, "Should have at least one pattern"
+        assert pool.ping(), "Workers should answer ping"
+        print("  ✓ PASSED\n")
+
+        # Test 2: Concurrent callers never see each other's replies
+        print("Test 2: concurrent filter_patterns() from 12 threads")
+        expected = pool.filter_patterns([('geometric', 'yes')])
+        errors = []
+
+        def worker():
+            for _ in range(20):
+                candidates = pool.filter_patterns([('geometric', 'yes')])
+                if candidates != expected:
+                    errors.append(candidates)
+
+        threads = [threading.Thread(target=worker) for _ in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"  Mismatched replies: {len(errors)}")
+        assert not errors, "Concurrent replies should not interleave"
+        print("  ✓ PASSED\n")
+
+        # Test 3: Dead workers are replaced transparently
+        print("Test 3: kill a worker and keep serving")
+        with pool.checkout() as victim:
+            victim.proc.kill()
+            victim.proc.wait()
+        names_after = pool.get_all_pattern_names()
+        stats = pool.stats()
+        print(f"  Stats: {stats}")
+        assert names_after == names, "Pool should keep answering after a crash"
+        assert stats['replaced'] >= 1, "Dead worker should have been replaced"
+        assert stats['idle'] == stats['size'], "All workers should be back in the pool"
+        print("  ✓ PASSED\n")
+
+        # Test 4: A warmed spare takes over from a dead worker
+        print("Test 4: spare worker swap")
+        spare_pool = PrologProcessPool(prolog_file, size=1, spare=True)
+        deadline = time.time() + 30
+        while not spare_pool.stats()['spare_ready'] and time.time() < deadline:
+            time.sleep(0.05)
+        assert spare_pool.stats()['spare_ready'], "Spare should be warmed in the background"
+        spare = spare_pool._spare
+        with spare_pool.checkout() as victim:
+            victim.proc.kill()
+            victim.proc.wait()
+        assert spare_pool.get_all_pattern_names() == names
+        stats = spare_pool.stats()
+        print(f"  Stats: {stats}")
+        assert stats['spares_used'] == 1 and spare in spare_pool._workers
+        spare_pool.stop()
+        print("  ✓ PASSED\n")
+
+        # Test 5: Workers started from a precompiled KB answer the same
+        print("Test 5: compile_kb() and a pool on the .qlf")
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            source = shutil.copy(prolog_file, os.path.join(tmp_dir, 'inabel.ai.pl'))
+            qlf = compile_kb(source)
+            print(f"  Load path: {os.path.basename(qlf)}")
+            assert qlf.endswith('.qlf') and os.path.exists(qlf)
+            assert compile_kb(source) == qlf, "An up-to-date .qlf should be reused"
+            qlf_pool = PrologProcessPool(qlf, size=2)
+            assert qlf_pool.get_all_pattern_names() == names
+            assert qlf_pool.filter_patterns([('geometric', 'yes')]) == expected
+            qlf_pool.stop()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        print("  ✓ PASSED\n")
+
+        # Test 6: A worker that stops answering is replaced by health_check()
+        print("Test 6: health_check() with a hung worker")
+        with pool.checkout() as hung:
+            os.kill(hung.proc.pid, signal.SIGSTOP)
+        replaced_before = pool.stats()['replaced']
+        started = time.perf_counter()
+        assert pool.health_check(timeout=0.5) == 1, "Only the hung worker should be replaced"
+        print(f"  Checked in {time.perf_counter() - started:.2f}s")
+        assert hung not in pool._workers and not hung.is_alive()
+        assert pool.stats()['replaced'] == replaced_before + 1
+        assert pool.health_check(timeout=0.5) == 0
+        assert pool.get_all_pattern_names() == names
+        print("  ✓ PASSED\n")
+
+        # Test 7: The background health check finds a hung worker on its own
+        print("Test 7: periodic health checks")
+        watched = PrologProcessPool(prolog_file, size=2, health_check_interval=0.2)
+        with watched.checkout() as hung:
+            os.kill(hung.proc.pid, signal.SIGSTOP)
+        deadline = time.time() + 30
+        while watched.stats()['replaced'] == 0 and time.time() < deadline:
+            time.sleep(0.1)
+        print(f"  Stats: {watched.stats()}")
+        assert watched.stats()['replaced'] == 1 and hung not in watched._workers
+        assert watched.get_all_pattern_names() == names
+        watched.stop()
+        print("  ✓ PASSED\n")
+
+        # Test 8: A lazy pool starts on its first command; the Python engine
+        # exports the KB with one worker and never starts the pool
+        print("Test 8: lazy pools")
+        lazy = PrologProcessPool(prolog_file, size=2, lazy=True)
+        assert not lazy.stats()['started'] and lazy._workers == []
+        assert lazy.get_all_pattern_names() == names and lazy.stats()['started']
+        lazy.stop()
+        spawned = []
+        original_init = prolog_interface.PrologProcess.__init__
+
+        def counting_init(worker, *args, **kwargs):
+            spawned.append(worker)
+            original_init(worker, *args, **kwargs)
+
+        cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+        with mock.patch.object(prolog_interface.PrologProcess, '__init__', counting_init):
+            exported = InabelAPI(prolog_file, workers=4, engine='python', cache_dir=cache_dir,
+                                 question_tree=False, spare_worker=True)
+            print(f"  Workers spawned for an export: {len(spawned)}")
+            assert len(spawned) == 1 and spawned[0].proc is None
+            assert not exported.prolog_interface.started
+            cached = InabelAPI(prolog_file, workers=4, engine='python', cache_dir=cache_dir,
+                               question_tree=False)
+            assert len(spawned) == 1 and not cached.prolog_interface.started
+            result = cached.identify_batch([[('dizzying', 'yes')]])[0]
+            assert result['status'] == 'found' and not cached.prolog_interface.started
+        exported.prolog_interface.stop()
+        cached.prolog_interface.stop()
+        shutil.rmtree(cache_dir)
+        print("  ✓ PASSED\n")
+
+        # Clean up
+        pool.stop()
+        print("=" * 50)
+        print("All PrologProcessPool tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_prolog_pool()
+    sys.exit(0 if success else 1)
@@ -73,6 +73,14 @@ def test_prolog_process():
         assert pattern is not None, "Should find kusikos"
         print("  ✓ PASSED\n")
         
+        # Test 8: Unknown commands get an error reply and the loop keeps going
+        print("Test 8: unknown command followed by a normal one")
+        reply = proc._send({"cmd": "no_such_command", "text": "braces { } and \"quotes\""})
+        print(f"  Reply status: {reply.get('status')}")
+        assert reply.get('status') == 'error', "Unknown command should report an error"
+        assert proc.get_all_pattern_names() == names, "Next reply should match its request"
+        print("  ✓ PASSED\n")
+        
         # Clean up
         proc.stop()
         print("=" * 50)
@@ -0,0 +1,130 @@
+"""Test the Flask endpoints through app.test_client()."""
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def import_server(prolog_file, **env):
+    """Import server.py configured for `prolog_file` (read at import time)."""
+    sys.modules.pop('server', None)
+    sys.modules.pop('server_config', None)
+    settings = dict(INABEL_KB=prolog_file, INABEL_KB_WATCH='0', INABEL_PROLOG_WORKERS='1', **env)
+    with mock.patch.dict(os.environ, settings):
+        import server
+    return server
+
+
+def test_server():
+    # A private copy of the KB, so it can be edited; its cache goes next to it.
+    tmp_dir = tempfile.mkdtemp(prefix='inabel-server-')
+    prolog_file = os.path.join(tmp_dir, 'inabel.ai.pl')
+    shutil.copy(os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl'), prolog_file)
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        server = import_server(prolog_file)
+        client = server.app.test_client()
+
+        # Test 1: /api/patterns answers a matching If-None-Match with a 304
+        print("Test 1: /api/patterns ETag")
+        first = client.get('/api/patterns')
+        etag = first.headers['ETag']
+        assert first.status_code == 200 and first.get_json()['success']
+        repeat = client.get('/api/patterns', headers={'If-None-Match': etag})
+        assert repeat.status_code == 304 and repeat.data == b''
+        assert repeat.headers['ETag'] == etag
+        weak = client.get('/api/patterns', headers={'If-None-Match': f'"other", W/{etag}'})
+        assert weak.status_code == 304, "If-None-Match uses the weak comparison"
+        print("  ✓ PASSED\n")
+
+        # Test 2: A reloaded KB with other pattern data gets a new ETag
+        print("Test 2: ETag after a KB reload")
+        with open(prolog_file, encoding='utf-8') as fh:
+            source = fh.read()
+        meaning = 'Represents human figures or ancestors'
+        assert meaning in source
+        with open(prolog_file, 'w', encoding='utf-8') as fh:
+            fh.write(source.replace(meaning, meaning + ' (edited)'))
+        assert server.kb_reloader.reload()
+        reloaded = client.get('/api/patterns', headers={'If-None-Match': etag})
+        assert reloaded.status_code == 200 and reloaded.headers['ETag'] != etag
+        assert b'(edited)' in reloaded.data
+        print("  ✓ PASSED\n")
+
+        # Test 3: /api/identify/batch rejects bodies without a list of items
+        print("Test 3: /api/identify/batch request errors")
+        for body in ({}, {'items': {'id': 1}}, {'items': 'abc'}):
+            reply = client.post('/api/identify/batch', json=body)
+            assert reply.status_code == 400 and not reply.get_json()['success'], body
+        with mock.patch.object(server, 'max_batch', 3):
+            items = [{'responses': []}] * 4
+            reply = client.post('/api/identify/batch', json={'items': items})
+            assert reply.status_code == 413 and 'At most 3' in reply.get_json()['error']
+            reply = client.post('/api/identify/batch', json={'items': items[:3]})
+            assert reply.status_code == 200
+        print("  ✓ PASSED\n")
+
+        # Test 4: A bad item gets an error in its own slot of a 200 reply
+        print("Test 4: /api/identify/batch per-item errors")
+        found = {'id': 'a', 'responses': [{'feature': 'dizzying', 'answer': 'yes'}]}
+        items = [found, {'id': 'b', 'responses': 'yes'}, 42, dict(found, id='c')]
+        reply = client.post('/api/identify/batch', json={'items': items})
+        data = reply.get_json()['data']
+        assert reply.status_code == 200 and data['count'] == 4
+        results = data['results']
+        assert [r.get('id') for r in results] == ['a', 'b', None, 'c']
+        assert [r['status'] for r in results] == ['found', 'error', 'error', 'found']
+        assert results[0]['pattern']['name'] == 'binakul' and results[3] == dict(results[0], id='c')
+        assert results[1]['error'] == 'responses must be a list'
+        print("  ✓ PASSED\n")
+
+        # Test 5: /api/metrics has a request histogram per endpoint
+        print("Test 5: /api/metrics")
+        server.REGISTRY.reset()
+        client.get('/api/patterns')
+        client.get('/api/pattern/binakul')
+        client.get('/api/pattern/binakul')
+        client.get('/api/pattern/no_such_pattern')
+        text = client.get('/api/metrics')
+        assert text.status_code == 200
+        assert text.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+        lines = text.get_data(as_text=True).splitlines()
+        assert '# TYPE inabel_http_request_seconds histogram' in lines
+        series = 'inabel_http_request_seconds_count{endpoint="/api/pattern/<pattern_name>",method="GET",'
+        assert series + 'status="200"} 2' in lines
+        assert series + 'status="404"} 1' in lines
+        reply = client.get('/api/metrics?format=json')
+        assert reply.status_code == 200 and reply.get_json()['success']
+        requests = {
+            (entry['labels']['endpoint'], entry['labels']['status']): entry['count']
+            for entry in reply.get_json()['data']['inabel_http_request_seconds']
+        }
+        print(f"  Requests by endpoint: {requests}")
+        assert requests == {
+            ('/api/patterns', '200'): 1,
+            ('/api/pattern/<pattern_name>', '200'): 2,
+            ('/api/pattern/<pattern_name>', '404'): 1,
+            ('/api/metrics', '200'): 1,
+        }
+        print("  ✓ PASSED\n")
+
+        server.kb_reloader.api.prolog_interface.stop()
+        print("=" * 50)
+        print("All server endpoint tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_server()
+    sys.exit(0 if success else 1)
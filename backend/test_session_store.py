@@ -0,0 +1,124 @@
+"""Test the session stores (TTL expiry, LRU cap, shared SQLite backend)."""
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from prolog_interface import InabelAPI
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def new_session(selector='first'):
+    return {"responses": [], "answered": set(), "candidates": ['a', 'b'], "selector": selector}
+
+
+def test_session_store():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    tmp_dir = tempfile.mkdtemp()
+
+    try:
+        for label, make_store in (
+            ("memory", lambda **kw: MemorySessionStore(**kw)),
+            ("sqlite", lambda **kw: SQLiteSessionStore(os.path.join(tmp_dir, 'ttl.db'), **kw)),
+        ):
+            # Test 1: Sessions expire after the TTL, counted in stats
+            print(f"Test 1 ({label}): TTL expiry")
+            clock = FakeClock()
+            store = make_store(ttl=60, max_sessions=10, clock=clock)
+            store.save('s1', new_session())
+            store.save('s2', new_session())
+            clock.now += 30
+            assert store.get('s1') is not None, "Session used within the TTL should survive"
+            clock.now += 45
+            assert store.get('s2') is None, "Idle session should have expired"
+            assert store.get('s1') is not None, "get() should refresh the TTL"
+            stats = store.stats()
+            print(f"  Stats: {stats}")
+            assert stats['expired'] == 1 and stats['sessions'] == 1
+            print("  ✓ PASSED\n")
+
+            # Test 2: The least recently used sessions are evicted first
+            print(f"Test 2 ({label}): LRU size cap")
+            for i in range(3):
+                clock.now += 1
+                store.save(f"lru{i}", new_session())
+            clock.now += 1
+            store.get('s1')
+            for i in range(3, 12):
+                clock.now += 1
+                store.save(f"lru{i}", new_session())
+            assert len(store) == 10, "Store should stay at max_sessions"
+            assert store.get('s1') is not None, "Recently used session should be kept"
+            assert store.get('lru0') is None, "Oldest session should be evicted"
+            assert store.stats()['evicted'] == 3
+            store.delete('s1')
+            assert 's1' not in store
+            store.close()
+            print("  ✓ PASSED\n")
+
+        # Test 3: Two SQLite stores on one file share sessions
+        print("Test 3: shared SQLite sessions round-trip")
+        path = os.path.join(tmp_dir, 'shared.db')
+        first, second = SQLiteSessionStore(path), SQLiteSessionStore(path)
+        session = new_session('information_gain')
+        session['responses'].append(('geometric', 'yes'))
+        session['answered'].add('geometric')
+        first.save('shared', session)
+        assert second.get('shared') == session, "Session should round-trip unchanged"
+        first.close()
+        second.close()
+        print("  ✓ PASSED\n")
+
+        # Test 4: A session started in one API can be answered in another
+        print("Test 4: InabelAPI sessions across processes")
+        path = os.path.join(tmp_dir, 'api.db')
+        api_a = InabelAPI(prolog_file, question_tree=False, session_store=SQLiteSessionStore(path),
+                          cache_dir=cache_dir)
+        api_b = InabelAPI(prolog_file, question_tree=False, session_store=SQLiteSessionStore(path),
+                          cache_dir=cache_dir)
+        local = InabelAPI(prolog_file, question_tree=False, cache_dir=cache_dir)
+        step_a = api_a.start_session('cross')
+        step_l = local.start_session('cross')
+        assert step_a == step_l
+        apis = [api_a, api_b]
+        turn = 0
+        while step_l.get('feature') and step_l.get('status', 'continue') == 'continue':
+            feature = step_l['feature']
+            step_a = apis[turn % 2].answer_question('cross', feature, 'no')
+            step_l = local.answer_question('cross', feature, 'no')
+            assert step_a == step_l, (step_a, step_l)
+            turn += 1
+        print(f"  Alternated {turn} answers between two APIs")
+        assert api_a.answer_question('cross', 'geometric', 'no') == {'error': 'Invalid session ID'}
+        for api in (api_a, api_b, local):
+            api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All session store tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return True
+
+if __name__ == '__main__':
+    success = test_session_store()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,109 @@
+"""Test stateless signed session tokens against server-side sessions."""
+import sys
+import os
+import tempfile
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from prolog_interface import InabelAPI
+from session_store import MemorySessionStore
+from session_token import SessionTokenCodec
+
+def test_session_token():
+    prolog_file = os.path.join(os.path.dirname(__file__), '..', 'inabel.ai.pl')
+    cache_dir = tempfile.mkdtemp(prefix='inabel-test-')
+    print(f"Loading Prolog KB from: {prolog_file}")
+
+    try:
+        # Test 1: Tokens round-trip and reject tampering
+        print("Test 1: encode/decode and signature checks")
+        codec = SessionTokenCodec(b'secret', ['a', 'b', 'c'], 'v1')
+        token = codec.encode('first', [('c', 'yes'), ('a', 'no')])
+        print(f"  Token: {token}")
+        assert codec.decode(token) == ('first', [('a', 'no'), ('c', 'yes')])
+        body, _, signature = token.rpartition('.')
+        selector, issued_hex, yes_hex, no_hex = body.split('.')
+        forged = f"{selector}.{issued_hex}.{yes_hex}.{int(no_hex, 16) | 2:x}.{signature}"
+        assert codec.decode(forged) is None, "Edited answers must be rejected"
+        renewed = f"{selector}.{int(issued_hex, 16) + 60:x}.{yes_hex}.{no_hex}.{signature}"
+        assert codec.decode(renewed) is None, "Edited issue times must be rejected"
+        assert codec.decode(token + 'x') is None, "Bad signature must be rejected"
+        assert codec.decode('garbage') is None
+        assert SessionTokenCodec(b'other', ['a', 'b', 'c'], 'v1').decode(token) is None
+        assert SessionTokenCodec(b'secret', ['a', 'b', 'c'], 'v2').decode(token) is None, \
+               "Tokens from another KB version must be rejected"
+        print("  ✓ PASSED\n")
+
+        # Test 2: Token sessions follow the same path as server-side sessions
+        print("Test 2: token sessions vs server-side sessions")
+        rng = random.Random(12)
+        for question_tree in (True, False):
+            api = InabelAPI(prolog_file, question_tree=question_tree, session_secret=b'secret',
+                            cache_dir=cache_dir)
+            features = api.kb.features
+            for i in range(40):
+                selector = ('first', 'information_gain')[i % 2]
+                step = api.start_session('ref', selector=selector)
+                token_step = api.start_token_session(selector=selector)
+                token = token_step.pop('token')
+                assert {**token_step, 'session_id': 'ref'} == step
+                while step.get('feature') and step.get('status', 'continue') == 'continue':
+                    feature = step['feature'] if rng.random() < 0.8 else rng.choice(features)
+                    if feature in api.sessions.get('ref')['answered']:
+                        feature = step['feature']
+                    answer = rng.choice(('yes', 'no'))
+                    step = api.answer_question('ref', feature, answer)
+                    token_step = api.answer_token(token, feature, answer)
+                    token = token_step.pop('token', None)
+                    assert token_step == step, (token_step, step)
+                    assert (token is not None) == (step['status'] == 'continue')
+            api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        # Test 3: Invalid tokens and unencodable answers are refused
+        print("Test 3: invalid tokens")
+        api = InabelAPI(prolog_file, session_secret=b'secret', cache_dir=cache_dir)
+        token = api.start_token_session()['token']
+        feature = api.kb.features[0]
+        assert api.answer_token(token[:-1], feature, 'yes') == {'error': 'Invalid session token'}
+        assert api.answer_token(token, 'no_such_feature', 'no') == {'error': 'Unknown feature or answer'}
+        assert api.answer_token(token, feature, 'maybe') == {'error': 'Unknown feature or answer'}
+        api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        # Test 4: Tokens expire `ttl` seconds after they were issued
+        print("Test 4: token expiry")
+        codec = SessionTokenCodec(b'secret', ['a', 'b', 'c'], 'v1', ttl=60)
+        token = codec.encode('first', [('b', 'yes')], now=1000)
+        assert codec.decode(token, now=1000) == ('first', [('b', 'yes')])
+        assert codec.decode(token, now=1060) == ('first', [('b', 'yes')])
+        assert codec.decode(token, now=1061) is None, "Expired tokens must be rejected"
+        store = MemorySessionStore(ttl=60)
+        api = InabelAPI(prolog_file, session_secret=b'secret', session_store=store,
+                        cache_dir=cache_dir)
+        assert api.token_codec.ttl == 60
+        feature = api.kb.features[0]
+        old = api.token_codec.encode('first', [], now=time.time() - 61)
+        assert api.answer_token(old, feature, 'no') == {'error': 'Invalid session token'}
+        fresh = api.token_codec.encode('first', [], now=time.time() - 30)
+        assert 'error' not in api.answer_token(fresh, feature, 'no')
+        api.prolog_interface.stop()
+        print("  ✓ PASSED\n")
+
+        print("=" * 50)
+        print("All session token tests PASSED!")
+        print("=" * 50)
+
+    except Exception as e:
+        print(f"✗ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+if __name__ == '__main__':
+    success = test_session_token()
+    sys.exit(0 if success else 1)
@@ -339,8 +339,7 @@ identify_pattern_api(Responses, Result) :-
 % Filter patterns based on user responses
 filter_patterns_by_responses([], _, []).
 filter_patterns_by_responses([PatternName|Rest], Responses, Filtered) :-
-    pattern(PatternName, Features, _, _, _, _, _),
-    check_pattern_matches(Features, Responses),
+    pattern_matches(PatternName, Responses),
     !,
     filter_patterns_by_responses(Rest, Responses, RestFiltered),
     Filtered = [PatternName|RestFiltered].
@@ -350,29 +349,64 @@ filter_patterns_by_responses([_|Rest], Responses, Filtered) :-
 % Check if a pattern matches the user responses
 % A pattern matches if all YES responses are in its features
 % NO responses can be ignored (lenient matching)
-check_pattern_matches(Features, Responses) :-
+% Each check is an indexed pattern_has_feature/2 lookup, so the cost does
+% not grow with the length of the pattern's feature list.
+pattern_matches(PatternName, Responses) :-
+    pattern_has_feature(PatternName, _),
+    !,
     % All YES features must be in pattern
-    \+ (member([Feature, yes], Responses), \+ member(Feature, Features)),
+    \+ (member([Feature, yes], Responses), \+ pattern_has_feature(PatternName, Feature)),
     % All NO features must NOT be in pattern
-    \+ (member([Feature, no], Responses), member(Feature, Features)).
+    \+ (member([Feature, no], Responses), pattern_has_feature(PatternName, Feature)).
+pattern_matches(PatternName, Responses) :-
+    % A pattern without features only fails YES answers.
+    pattern(PatternName, [], _, _, _, _, _),
+    \+ member([_, yes], Responses).
 
 % Find best match when multiple candidates remain
 find_best_match([Best|_], _, Result) :-
     pattern(Best, Features, Meaning, Icon, Placeholder, Images, References),
     Result = pattern(Best, Features, Meaning, Icon, Placeholder, Images, References).
 
+% Feature index, built once when the KB is loaded (see build_feature_index/0):
+%   feature(Feature)                     - every distinct feature, in question order
+%   pattern_has_feature(Pattern, Feature) - one fact per feature of each pattern
+% Both are plain facts, so lookups use SWI-Prolog's first-argument (and JIT
+% second-argument) clause indexing instead of scanning feature lists.
+:- use_module(library(lists)).
+:- use_module(library(ordsets)).
+:- dynamic feature/1, pattern_has_feature/2.
+
+build_feature_index :-
+    retractall(feature(_)),
+    retractall(pattern_has_feature(_, _)),
+    forall(( pattern(Name, Features, _, _, _, _, _),
+             member(Feature, Features),
+             \+ pattern_has_feature(Name, Feature)
+           ),
+           assertz(pattern_has_feature(Name, Feature))),
+    % Question order: each feature at its last occurrence in the pattern
+    % facts, as the original flatten + list_to_set version produced it.
+    findall(Feature,
+            ( pattern(_, Features, _, _, _, _, _), member(Feature, Features) ),
+            FlatList),
+    reverse(FlatList, Reversed),
+    list_to_set(Reversed, ReversedSet),
+    reverse(ReversedSet, AllFeatures),
+    forall(member(Feature, AllFeatures), assertz(feature(Feature))).
+
+:- initialization(build_feature_index).
+
 % Get all unique features from all patterns (for generating questions)
 get_all_features(AllFeatures) :-
-    findall(Features, pattern(_, Features, _, _, _, _, _), FeatureLists),
-    flatten(FeatureLists, FlatList),
-    list_to_set(FlatList, AllFeatures).
+    findall(Feature, feature(Feature), AllFeatures).
 
 % Get next relevant question based on current responses and candidates
 get_next_question(Responses, Candidates, NextFeature) :-
-    get_all_features(AllFeatures),
     get_answered_features(Responses, AnsweredFeatures),
-    member(NextFeature, AllFeatures),
-    \+ member(NextFeature, AnsweredFeatures),
+    sort(AnsweredFeatures, Answered),
+    feature(NextFeature),
+    \+ ord_memberchk(NextFeature, Answered),
     feature_is_relevant(NextFeature, Candidates),
     !.
 
@@ -383,8 +417,7 @@ get_answered_features([[Feature, _]|Rest], [Feature|RestFeatures]) :-
 % Check if a feature is relevant to any candidate pattern
 feature_is_relevant(Feature, Candidates) :-
     member(CandidateName, Candidates),
-    pattern(CandidateName, Features, _, _, _, _, _),
-    member(Feature, Features),
+    pattern_has_feature(CandidateName, Feature),
     !.
 
 
@@ -487,22 +520,8 @@ ask_yes_no(Question, Answer) :-
         ask_yes_no(Question, Answer)
     ).
 
-% Flatten a list of lists
-flatten([], []).
-flatten([[]|Rest], Flat) :-
-    !, flatten(Rest, Flat).
-flatten([[H|T]|Rest], Flat) :-
-    !, flatten([H, T|Rest], Flat).
-flatten([H|T], [H|FlatT]) :-
-    flatten(T, FlatT).
-
-% Convert list to set (remove duplicates)
-list_to_set([], []).
-list_to_set([H|T], Set) :-
-    member(H, T),
-    !, list_to_set(T, Set).
-list_to_set([H|T], [H|SetT]) :-
-    list_to_set(T, SetT).
+% List utilities (list_to_set/2, reverse/2, ord_memberchk/2) come from
+% SWI-Prolog's library(lists) and library(ordsets), loaded above.
 
 
 % =====================================================================
@@ -532,6 +551,10 @@ get_feature_question(Feature, Question) :-
 % main_json_loop/0
 % Continually read JSON commands from stdin, handle them, and write JSON
 % responses to stdout, until a {"cmd": "stop"} is received.
+%
+% Framing: every request and every reply is exactly one line of compact
+% JSON. If a request carries an "id" field it is echoed back in the reply
+% so that the caller can match replies to requests.
 main_json_loop :-
     % Read one line from stdin as a string
     (   read_line_to_string(user_input, Line)
@@ -539,25 +562,45 @@ main_json_loop :-
         ->  true
         ;   % Try to parse JSON from the line
             (   catch(atom_json_dict(Line, Dict, []), _, fail)
-            ->  handle_json_command(Dict, Response),
-                json_write_dict(current_output, Response, []),
-                nl,
-                flush_output(current_output),
-                (   _{cmd:"stop"} :< Dict
+            ->  take_request_id(Dict, Id, Command),
+                catch(once(handle_json_command(Command, Response0)),
+                      Error,
+                      ( term_string(Error, Message),
+                        Response0 = _{status:"error", error:Message}
+                      )),
+                add_request_id(Id, Response0, Response),
+                write_json_reply(Response),
+                (   _{cmd:"stop"} :< Command
                 ->  true
                 ;   main_json_loop
                 )
             ;   % If JSON parse fails, send an error and continue.
-                json_write_dict(current_output,
-                                _{status:"error", error:"invalid_json"}, []),
-                nl,
-                flush_output(current_output),
+                write_json_reply(_{status:"error", error:"invalid_json"}),
                 main_json_loop
             )
         )
     ;   true  % EOF / no input, just exit
     ).
 
+% Split the optional request id off a command dict.
+take_request_id(Dict, Id, Command) :-
+    (   del_dict(id, Dict, Id0, Command0)
+    ->  Id = id(Id0),
+        Command = Command0
+    ;   Id = none,
+        Command = Dict
+    ).
+
+add_request_id(none, Response, Response).
+add_request_id(id(Id), Response0, Response) :-
+    put_dict(id, Response0, Id, Response).
+
+% Write a reply as a single line of compact JSON.
+write_json_reply(Response) :-
+    json_write_dict(current_output, Response, [width(0)]),
+    nl,
+    flush_output(current_output).
+
 % Dispatch from JSON command dict to the appropriate Prolog predicates.
 
 handle_json_command(_{cmd:"get_all_pattern_names"}, Response) :-
@@ -580,9 +623,8 @@ handle_json_command(_{cmd:"get_feature_question", feature:FeatureInput}, Respons
     ).
 
 handle_json_command(_{cmd:"get_all_feature_questions"}, Response) :-
-    get_all_features(Features),
     findall(Feature-Question,
-            ( member(Feature, Features),
+            ( feature(Feature),
               get_feature_question(Feature, Question)
             ),
             Pairs),
@@ -636,7 +678,11 @@ handle_json_command(_{cmd:"get_next_question",
             ),
             Candidates),
     (   get_next_question(Responses, Candidates, NextFeature)
-    ->  Response = _{status:"ok", feature:NextFeature}
+    ->  % Include the question text so callers need no second round trip.
+        (   get_feature_question(NextFeature, Question)
+        ->  Response = _{status:"ok", feature:NextFeature, question:Question}
+        ;   Response = _{status:"ok", feature:NextFeature}
+        )
     ;   Response = _{status:"none"}
     ).
 
@@ -654,6 +700,22 @@ handle_json_command(_{cmd:"filter_patterns", responses:JsonResponses}, Response)
     filter_patterns_by_responses(All, Responses, Candidates),
     Response = _{status:"ok", candidates:Candidates}.
 
+handle_json_command(_{cmd:"refine",
+                      candidates:CandidatesInput,
+                      feature:FeatureInput,
+                      answer:AnswerInput}, Response) :-
+    % Narrow a previous candidate list by one new answer, so that sessions
+    % do not resend and refilter their whole response history.
+    findall(C,
+            ( member(CandStr, CandidatesInput),
+              (atom(CandStr) -> C = CandStr ; atom_string(C, CandStr))
+            ),
+            Candidates),
+    (atom(FeatureInput) -> F = FeatureInput ; atom_string(F, FeatureInput)),
+    (atom(AnswerInput) -> A = AnswerInput ; atom_string(A, AnswerInput)),
+    filter_patterns_by_responses(Candidates, [[F, A]], Filtered),
+    Response = _{status:"ok", candidates:Filtered}.
+
 handle_json_command(_{cmd:"get_pattern_by_name", name:NameInput}, Response) :-
     % Convert string to atom if necessary
     (   atom(NameInput)
@@ -675,11 +737,61 @@ handle_json_command(_{cmd:"get_pattern_by_name", name:NameInput}, Response) :-
     ;   Response = _{status:"not_found"}
     ).
 
+handle_json_command(_{cmd:"get_all_patterns"}, _{status:"ok", patterns:Patterns}) :-
+    % Every pattern dict in one reply (instead of one get_pattern_by_name
+    % round trip per pattern).
+    all_patterns_json(Patterns).
+
+handle_json_command(_{cmd:"export_kb"}, Response) :-
+    % Export every pattern/7 and feature_question/2 fact so that the Python
+    % engine can mirror the identification logic without further round trips.
+    all_patterns_json(Patterns),
+    findall(_{feature:Feature, question:Question},
+            feature_question(Feature, Question),
+            Questions),
+    Response = _{status:"ok", patterns:Patterns, questions:Questions}.
+
+handle_json_command(_{cmd:"batch", commands:Commands}, _{status:"ok", results:Results}) :-
+    % Run several independent sub-commands and return all of their replies,
+    % in order, in a single response.
+    maplist(handle_batch_entry, Commands, Results).
+
+handle_json_command(_{cmd:"ping"}, _{status:"ok"}) :- !.
+
 handle_json_command(_{cmd:"stop"}, _{status:"stopping"}) :- !.
 
 % Fallback for unknown commands
 handle_json_command(Dict, _{status:"error", error:"unknown_command", received:Dict}).
 
+% Handle one sub-command of a batch; errors are reported per entry.
+handle_batch_entry(Command, Result) :-
+    catch(once(handle_json_command(Command, Result)),
+          Error,
+          ( term_string(Error, Message),
+            Result = _{status:"error", error:Message}
+          )).
+
+% All patterns, in KB order, as JSON dicts.
+all_patterns_json(Patterns) :-
+    findall(PatternJson,
+            ( pattern(Name, Features, Meaning, Icon, Placeholder, Images, Refs),
+              pattern_json(pattern(Name, Features, Meaning, Icon, Placeholder, Images, Refs),
+                           PatternJson)
+            ),
+            Patterns).
+
+% Convert a pattern/7 term to the JSON dict shape used by the Python side.
+pattern_json(pattern(Name, Features, Meaning, Icon, Placeholder, Images, Refs),
+             _{ name:Name,
+                features:Features,
+                meaning:Meaning,
+                icon:Icon,
+                placeholderPattern:Placeholder,
+                images:Images,
+                references:RefsJson
+              }) :-
+    convert_references(Refs, RefsJson).
+
 % Convert Prolog reference terms to JSON-friendly dicts.
 % Your facts use ref('Text', 'URL').
 